@@ -0,0 +1,194 @@
+"""Chunking of converted markdown for retrieval (RAG)
+
+Two steps, so the text work happens where the markdown is produced:
+- segment_page splits the markdown of one page into segments (headings,
+  sentences, table/list lines) with their token counts; it runs in the
+  conversion workers, right after each page is converted
+- ChunkPacker packs segments, in page order, into chunks under a token
+  budget: a heading starts a new chunk, a chunk that outgrows the budget
+  continues in the next one with a few segments of overlap
+
+Tokens are approximated without a tokenizer: every run of up to 6 word
+characters and every punctuation mark counts as one token. This errs on
+the high side for common subword tokenizers, so chunks stay within budget.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+# Blocks whose lines are kept as separate segments (never joined into prose)
+_LINE_BLOCK_PATTERN = re.compile(r"^\s*([|>]|[-*+]\s|\d+[.)]\s|```)")
+
+# Separators placed before a segment when chunk text is assembled
+SEP_BLOCK = "\n\n"
+SEP_LINE = "\n"
+SEP_SENTENCE = " "
+
+
+@dataclass(frozen=True)
+class ChunkingOptions:
+    """Chunk size and overlap, in (approximate) tokens"""
+    max_tokens: int = 512
+    overlap_tokens: int = 64  # capped at half of max_tokens
+
+
+class Segment(NamedTuple):
+    """A piece of page markdown that is never split across chunks"""
+    page: int  # 1-based page number
+    text: str
+    tokens: int
+    level: int  # heading level, 0 for body text
+    sep: str  # separator from the previous segment (SEP_*)
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _split_words(text: str, max_tokens: int) -> List[str]:
+    """Split an oversized sentence or line into pieces of at most max_tokens (barring single huge words)"""
+    pieces: List[str] = []
+    words: List[str] = []
+    tokens = 0
+    for word in text.split():
+        word_tokens = count_tokens(word)
+        if words and tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(words))
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def segment_page(markdown: str, page: int, max_tokens: int) -> List[Segment]:
+    """
+    Split the markdown of a page into segments.
+
+    Headings are segments of their own. Prose is split into sentences;
+    tables, lists, quotes and code are split into lines. Sentences and lines
+    longer than half the chunk budget are split at words, so that a segment
+    always fits in a chunk next to its section headings or the overlap.
+
+    Args:
+        markdown: Markdown of the page
+        page: 1-based page number
+        max_tokens: Chunk budget
+    """
+    max_segment_tokens = max(1, max_tokens // 2)
+    segments: List[Segment] = []
+    for block in re.split(r"\n\s*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+
+        heading = _HEADING_PATTERN.match(block) if "\n" not in block else None
+        if heading:
+            text = heading.group(2).strip("* ")
+            segments.append(Segment(page, block, count_tokens(text), len(heading.group(1)), SEP_BLOCK))
+            continue
+
+        if _LINE_BLOCK_PATTERN.match(block):
+            parts = [(line, SEP_LINE) for line in block.split("\n") if line.strip()]
+        else:
+            parts = [(sentence, SEP_SENTENCE) for sentence in _SENTENCE_END.split(" ".join(block.split()))]
+
+        sep = SEP_BLOCK
+        for text, part_sep in parts:
+            tokens = count_tokens(text)
+            for piece in (_split_words(text, max_segment_tokens) if tokens > max_segment_tokens else [text]):
+                segments.append(Segment(page, piece, count_tokens(piece), 0, sep))
+                sep = part_sep
+    return segments
+
+
+class ChunkPacker:
+    """
+    Packs segments, fed in page order, into chunks.
+
+    Each chunk is a dict: index, text, tokens, page_start, page_end and
+    headings (the section path the chunk belongs to, outermost first).
+    """
+
+    def __init__(self, options: ChunkingOptions):
+        self.max_tokens = options.max_tokens
+        self.overlap_tokens = min(options.overlap_tokens, options.max_tokens // 2)
+        self._segments: List[Segment] = []
+        self._tokens = 0
+        self._has_body = False
+        self._headings: List[Optional[str]] = [None] * 6  # current heading per level
+        self._chunk_headings: List[str] = []
+        self._index = 0
+
+    def add(self, segments: Iterable[Segment]) -> List[Dict[str, Any]]:
+        """Add the segments of the next page(s) and return the chunks they complete"""
+        done: List[Dict[str, Any]] = []
+        for segment in segments:
+            if segment.level:
+                # A new section starts a new chunk (without overlap)
+                if self._has_body:
+                    done.append(self._close(overlap=False))
+                self._headings[segment.level - 1] = _HEADING_PATTERN.match(segment.text).group(2).strip("* ")
+                self._headings[segment.level:] = [None] * (6 - segment.level)
+            elif self._tokens + segment.tokens > self.max_tokens and self._has_body:
+                done.append(self._close(overlap=True))
+                if self._tokens + segment.tokens > self.max_tokens:
+                    # No room for the overlap next to this segment
+                    self._segments, self._tokens, self._has_body = [], 0, False
+
+            if not self._has_body and not segment.level:
+                self._chunk_headings = [heading for heading in self._headings if heading]
+                self._has_body = True
+            self._segments.append(segment)
+            self._tokens += segment.tokens
+        return done
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Return the last chunk, if any"""
+        if not self._segments:
+            return []
+        if not self._has_body:
+            self._chunk_headings = [heading for heading in self._headings if heading]
+        return [self._close(overlap=False)]
+
+    def _close(self, overlap: bool) -> Dict[str, Any]:
+        segments = self._segments
+        chunk = {
+            "index": self._index,
+            "text": "".join((segment.sep if i else "") + segment.text for i, segment in enumerate(segments)),
+            "tokens": self._tokens,
+            "page_start": min(segment.page for segment in segments),
+            "page_end": max(segment.page for segment in segments),
+            "headings": self._chunk_headings,
+        }
+        self._index += 1
+
+        # Carry the last body segments that fit the overlap into the next chunk
+        carried: List[Segment] = []
+        tokens = 0
+        if overlap:
+            for segment in reversed(segments):
+                if segment.level or tokens + segment.tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, segment)
+                tokens += segment.tokens
+        self._segments = carried
+        self._tokens = tokens
+        self._has_body = bool(carried)
+        return chunk
+
+
+def chunk_pages(page_segments: Iterable[List[Segment]], options: ChunkingOptions) -> List[Dict[str, Any]]:
+    """Pack the segments of consecutive pages into chunks"""
+    packer = ChunkPacker(options)
+    chunks: List[Dict[str, Any]] = []
+    for segments in page_segments:
+        chunks.extend(packer.add(segments))
+    chunks.extend(packer.finish())
+    return chunks
@@ -0,0 +1,196 @@
+"""Response compression (zstd, brotli, gzip) negotiated with Accept-Encoding
+
+Converted markdown compresses several times over, so large JSON responses
+(conversions, transaction lists) are compressed before they go over the wire.
+The client's Accept-Encoding picks the coding; among those it accepts equally,
+zstd is preferred, then brotli, then gzip (brotli and zstandard are
+dependencies; brotlicffi and the compression.zstd module of Python 3.14+ are
+used in their place when present).
+
+Only complete bodies are compressed: streamed responses (NDJSON and SSE
+conversion streams) pass through untouched, so each event still reaches the
+client as soon as it is sent. Large bodies are compressed in a thread, off
+the event loop.
+"""
+
+import asyncio
+import gzip
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+
+
+def _zstd(data: bytes) -> bytes:
+    if zstd is not None:
+        return zstd.compress(data, level=settings.COMPRESSION_ZSTD_LEVEL)
+    return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(data)
+
+
+def _available_codings() -> Dict[str, Callable[[bytes], bytes]]:
+    """Content codings this server can produce, most preferred first"""
+    codings: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstd is not None or zstandard is not None:
+        codings["zstd"] = _zstd
+    if brotli is not None:
+        codings["br"] = _brotli
+    codings["gzip"] = _gzip
+    return codings
+
+
+CODINGS = _available_codings()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding for a response.
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+
+    Returns:
+        The accepted coding with the highest q-value (server preference
+        breaks ties), or None to send the response uncompressed
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in CODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("/json") or media_type.endswith("+json")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete response bodies of at least
+    COMPRESSION_MIN_BYTES with the coding negotiated from Accept-Encoding.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        await _CompressingResponder(self.app, encoding)(scope, receive, send)
+
+
+class _CompressingResponder:
+    """
+    Holds back the response start until the body shows whether it is worth
+    compressing. Every compressible response gets `Vary: Accept-Encoding`,
+    compressed or not, so shared caches keep the variants apart.
+    """
+
+    def __init__(self, app: ASGIApp, encoding: Optional[str]):
+        self.app = app
+        self.encoding = encoding
+        self.send: Send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            if (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self.send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send(message)
+            return
+
+        start_message, self.start_message = self.start_message, None
+        self.passthrough = True
+        body = message.get("body", b"")
+
+        # A first chunk with more to come is a streamed response: leave it as is
+        if message.get("more_body", False) or len(body) < settings.COMPRESSION_MIN_BYTES:
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        compress = CODINGS[self.encoding]
+        if len(body) >= settings.COMPRESSION_THREAD_MIN_BYTES:
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(None, compress, body)
+        else:
+            compressed = compress(body)
+
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(start_message)
+        await self.send({"type": "http.response.body", "body": compressed})
@@ -1,5 +1,6 @@
 """Application configuration"""
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
@@ -30,6 +31,58 @@ class Settings(BaseSettings):
     MAX_PDF_CONVERSION_SIZE_MB: int = 10
     PDF_FETCH_TIMEOUT_SECONDS: int = 30
 
+    # Outbound HTTP clients (PDF fetches, webhooks), connections pooled per hostname
+    OUTBOUND_HTTP2: bool = True
+    OUTBOUND_MAX_POOLED_HOSTS: int = 100  # hostnames whose idle connections are kept
+    OUTBOUND_MAX_CONNECTIONS_PER_HOST: int = 10
+    OUTBOUND_KEEPALIVE_SECONDS: int = 30
+
+    # DNS cache of the SSRF check (getaddrinfo exposes no record TTLs)
+    DNS_CACHE_TTL_SECONDS: int = 60
+    DNS_NEGATIVE_CACHE_TTL_SECONDS: int = 5
+
+    # Conversion worker pool
+    CONVERSION_WORKERS: int = 0  # 0 = one worker process per CPU
+    CONVERSION_TIMEOUT_SECONDS: int = 120  # per conversion, all page batches included
+    CONVERSION_MAX_JOBS_PER_WORKER: int = 200
+    CONVERSION_MAX_RSS_MB: int = 1536  # per worker process, 0 = no limit
+
+    # Fair scheduling of pool jobs across teams (shares of a busy pool)
+    CONVERSION_WEIGHT_PAID: int = 4
+    CONVERSION_WEIGHT_FREE: int = 1
+    CONVERSION_MAX_JOBS_PER_TEAM: int = 0  # workers one team may hold, 0 = all but one
+
+    # Admission control: new conversions get 503 + Retry-After while the pool is this far behind
+    ADMISSION_MAX_WAIT_SECONDS: int = 30  # estimated wait for a worker, 0 = no limit
+    ADMISSION_MAX_QUEUED_JOBS: int = 0  # pool jobs waiting for a worker, 0 = no limit
+
+    # Response compression (zstd and brotli when installed, gzip), negotiated with Accept-Encoding
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024  # smaller bodies are sent as is
+    COMPRESSION_THREAD_MIN_BYTES: int = 64 * 1024  # larger bodies are compressed off the event loop
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5  # 0-11, higher levels cost far more CPU for little gain on text
+    COMPRESSION_ZSTD_LEVEL: int = 6
+
+    # Page-parallel conversion of large documents
+    PARALLEL_CONVERSION_PAGE_THRESHOLD: int = 64
+    PARALLEL_CONVERSION_MIN_BATCH_PAGES: int = 8
+
+    # Batch conversions
+    BATCH_MAX_ITEMS: int = 100
+    BATCH_CONCURRENCY: int = 4  # items fetched/converted at once per batch
+    BATCH_TIMEOUT_SECONDS: int = 300  # whole batch, items not done by then fail with CONVERSION_TIMEOUT
+    BATCH_MAX_UPLOAD_MB: int = 100  # whole multipart body of a batch upload
+
+    # Conversion result cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MEMORY_MB: int = 64
+    RESULT_CACHE_DISK_MB: int = 1024  # 0 = memory tier only
+    RESULT_CACHE_DIR: str = ""  # "" = <system temp dir>/docuprocess-result-cache
+    PAGE_CACHE_DISK_MB: int = 512  # per-page markdown cache, 0 = disabled
+    FETCH_CACHE_DISK_MB: int = 512  # bodies of URL-fetched PDFs, 0 = disabled
+    FETCH_CACHE_MAX_URLS: int = 10000  # URLs whose validators are remembered
+
     # Supabase Configuration
     # Used for:
     # 1. Validating API keys from the profiles table
@@ -39,7 +92,8 @@ class Settings(BaseSettings):
     SUPABASE_SERVICE_ROLE_KEY: str
     NEXT_PUBLIC_SUPABASE_STORAGE_BUCKET: str
 
-    # Fernet encryption key for S3 credentials (from Google Cloud Secret Manager)
+    # Fernet encryption key for S3 credentials and webhook signing secrets of
+    # conversion jobs stored in Supabase (from Google Cloud Secret Manager)
     STORAGE_ENCRYPTION_KEY: str = ""
 
     # Internal API key for server-to-server communication (free tools)
@@ -56,4 +110,25 @@ class Settings(BaseSettings):
     CLOUD_TASKS_SERVICE_ACCOUNT: str = ""
     ASYNC_PDF_TIMEOUT_SECONDS: int = 300
 
+    # Asynchronous conversion jobs (/v1/convert/jobs), conversion time limit: ASYNC_PDF_TIMEOUT_SECONDS
+    CONVERSION_JOB_QUEUE: str = "local"  # "local" (in-process) or "cloud_tasks"
+    CONVERSION_JOB_STORE: str = "memory"  # "memory" (single instance) or "supabase"
+    CONVERSION_JOB_CLOUD_TASKS_QUEUE: str = "pdf-conversion"
+    CONVERSION_JOB_LOCAL_CONCURRENCY: int = 2
+    CONVERSION_JOB_TTL_HOURS: int = 24  # memory store only
+
+    # Conversion job webhooks
+    WEBHOOK_TIMEOUT_SECONDS: int = 10
+    WEBHOOK_MAX_ATTEMPTS: int = 6
+    WEBHOOK_RETRY_BASE_SECONDS: int = 10  # doubled after each failed attempt
+    WEBHOOK_RETRY_MAX_SECONDS: int = 3600
+    WEBHOOK_MAX_RESULT_BYTES: int = 1024 * 1024  # larger markdown is left out of the payload
+
+    @model_validator(mode="after")
+    def check_conversion_job_backends(self) -> "Settings":
+        # A Cloud Tasks job may run on another instance than the one that stored it
+        if self.CONVERSION_JOB_QUEUE == "cloud_tasks" and self.CONVERSION_JOB_STORE != "supabase":
+            raise ValueError("CONVERSION_JOB_QUEUE=cloud_tasks requires CONVERSION_JOB_STORE=supabase")
+        return self
+
 settings = Settings()
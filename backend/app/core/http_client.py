@@ -0,0 +1,183 @@
+"""Outbound HTTP clients (PDF fetches, webhooks)
+
+Requests go to a vetted IP address with the hostname sent as Host header and
+TLS SNI (see pinned_stream). httpcore picks pooled connections by origin
+(scheme, IP, port) and ignores the SNI hostname, so a shared pool would hand a
+connection whose TLS session was set up (and its certificate verified) for
+one hostname to another hostname on the same IP. Connections are therefore
+pooled per hostname: one httpx.AsyncClient per hostname, kept alive for reuse
+(repeated fetches from a host skip the TCP and TLS handshakes) and closed
+when idle beyond OUTBOUND_MAX_POOLED_HOSTS hostnames. Closed by the FastAPI
+lifespan.
+"""
+
+import asyncio
+import ipaddress
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Union
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _create_client(http2: bool) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.PDF_FETCH_TIMEOUT_SECONDS,
+        # Redirects are followed by the caller, which validates every target
+        follow_redirects=False,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.OUTBOUND_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.OUTBOUND_MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=settings.OUTBOUND_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+class _HostClients:
+    """One client (connection pool) per hostname, least recently used first"""
+
+    def __init__(self):
+        self.http2 = settings.OUTBOUND_HTTP2 and _http2_available()
+        if settings.OUTBOUND_HTTP2 and not self.http2:
+            logger.warning("OUTBOUND_HTTP2 is enabled but the h2 package is missing, using HTTP/1.1")
+        # hostname -> [client, number of requests using it]
+        self._clients: "OrderedDict[str, list]" = OrderedDict()
+
+    @asynccontextmanager
+    async def client(self, host: str) -> AsyncIterator[httpx.AsyncClient]:
+        entry = self._clients.get(host)
+        if entry is None:
+            entry = self._clients[host] = [_create_client(self.http2), 0]
+        self._clients.move_to_end(host)
+        entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            entry[1] -= 1
+            await self._prune()
+
+    async def _prune(self) -> None:
+        """Close the least recently used idle clients beyond OUTBOUND_MAX_POOLED_HOSTS"""
+        excess = len(self._clients) - settings.OUTBOUND_MAX_POOLED_HOSTS
+        if excess <= 0:
+            return
+        idle = [host for host, entry in self._clients.items() if entry[1] == 0][:excess]
+        for host in idle:
+            client = self._clients.pop(host)[0]
+            await client.aclose()
+
+    async def close(self) -> None:
+        clients = [entry[0] for entry in self._clients.values()]
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+
+_clients: Optional[_HostClients] = None
+
+
+async def start_http_client() -> None:
+    """Set up the per-hostname clients (idempotent)"""
+    global _clients
+    if _clients is None:
+        _clients = _HostClients()
+
+
+async def close_http_client() -> None:
+    """Close the clients and their pooled connections"""
+    global _clients
+    if _clients is not None:
+        clients, _clients = _clients, None
+        await clients.close()
+
+
+def _host_clients() -> _HostClients:
+    """The per-hostname clients (set up on first use outside the app lifespan)"""
+    global _clients
+    if _clients is None:
+        _clients = _HostClients()
+    return _clients
+
+
+class _HostLimiter:
+    """Per-host concurrency limit (httpx only limits connections globally)"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # host -> (semaphore, number of holders and waiters)
+        self._hosts: Dict[str, list] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.limit), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._hosts[host]
+
+
+_host_limiter = _HostLimiter(settings.OUTBOUND_MAX_CONNECTIONS_PER_HOST)
+
+
+def host_slot(host: str):
+    """
+    Async context manager holding one of the OUTBOUND_MAX_CONNECTIONS_PER_HOST
+    request slots of a host, so one customer's bucket cannot take the whole
+    connection pool.
+    """
+    return _host_limiter.slot(host.lower())
+
+
+@asynccontextmanager
+async def pinned_stream(
+    method: str,
+    url: str,
+    address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address],
+    **kwargs,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Stream a request to an already vetted address of the URL's host (SSRF
+    protection): the connection goes to that address, the hostname is only
+    sent as Host header and TLS SNI (certificates are still verified against
+    it), so it is not resolved again. Connections are only reused for the
+    same hostname. Holds a host_slot for the duration.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        address: Address the URL's hostname was vetted to resolve to
+        **kwargs: Passed to httpx.AsyncClient.stream (headers, content, timeout, ...)
+    """
+    target = httpx.URL(url)
+    headers = {
+        "Host": target.host if target.port is None else f"{target.host}:{target.port}",
+        **kwargs.pop("headers", {}),
+    }
+    async with host_slot(target.host), _host_clients().client(target.host.lower()) as client:
+        async with client.stream(
+            method,
+            target.copy_with(host=str(address)),
+            headers=headers,
+            extensions={"sni_hostname": target.host},
+            **kwargs,
+        ) as response:
+            yield response
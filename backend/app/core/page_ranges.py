@@ -0,0 +1,65 @@
+"""Page range parsing for page selection ("1-3,10,20-")"""
+
+import re
+from typing import List, Optional, Tuple
+
+_RANGE_PATTERN = re.compile(r"^(\d+)?\s*(-)?\s*(\d+)?$")
+
+
+class PageRangeError(ValueError):
+    """Raised when a page selection is malformed or out of range"""
+    pass
+
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, Optional[int]]]:
+    """
+    Parse a page selection into (first, last) ranges, 1-based and inclusive.
+
+    Supported items (comma-separated): "7" (single page), "1-3" (range),
+    "20-" (page 20 to the end), "-5" (first five pages). `last` is None for
+    open-ended ranges.
+
+    Raises:
+        PageRangeError: If the selection is malformed
+    """
+    ranges: List[Tuple[int, Optional[int]]] = []
+    for item in spec.split(","):
+        item = item.strip()
+        match = _RANGE_PATTERN.match(item)
+        if not item or not match or not (match.group(1) or match.group(3)):
+            raise PageRangeError(f"Invalid page range '{item}'")
+
+        first_str, dash, last_str = match.groups()
+        first = int(first_str) if first_str else 1
+        if not dash:
+            last: Optional[int] = first
+        else:
+            last = int(last_str) if last_str else None
+
+        if first < 1 or (last is not None and last < first):
+            raise PageRangeError(f"Invalid page range '{item}'")
+        ranges.append((first, last))
+
+    if not ranges:
+        raise PageRangeError("Page selection is empty")
+    return ranges
+
+
+def resolve_page_ranges(spec: str, page_count: int) -> List[int]:
+    """
+    Resolve a page selection against a document's page count.
+
+    Returns:
+        Sorted, de-duplicated 0-based page numbers
+
+    Raises:
+        PageRangeError: If the selection is malformed or exceeds the page count
+    """
+    pages = set()
+    for first, last in parse_page_ranges(spec):
+        if first > page_count or (last is not None and last > page_count):
+            raise PageRangeError(
+                f"Page range exceeds the document's {page_count} page(s)"
+            )
+        pages.update(range(first - 1, (last or page_count)))
+    return sorted(pages)
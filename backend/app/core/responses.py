@@ -0,0 +1,29 @@
+"""JSON responses serialized by pydantic-core
+
+JSONResponse takes a dict, so handlers used to call model_dump() and let the
+stdlib json module walk the result again. ModelJSONResponse takes the model
+itself and serializes it straight to UTF-8 bytes with pydantic-core (Rust):
+no intermediate dict, and long strings such as converted markdown are escaped
+in a single pass.
+
+The output is the same JSON as JSONResponse's, except for:
+- NaN and infinite floats: written as null (valid JSON), where JSONResponse
+  raised ValueError and the request failed with a 500
+- The exponent of some floats (1.5e-7 instead of 1.5e-07): the same number
+"""
+
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    JSON response whose content is a pydantic model (or anything pydantic-core
+    can serialize: dicts, lists, dataclasses, datetimes, UUIDs...).
+    """
+
+    def render(self, content: Any) -> bytes:
+        # Models serialize NaN and inf as null (ser_json_inf_nan default): same for dicts
+        return pydantic_core.to_json(content, inf_nan_mode="null")
@@ -0,0 +1,182 @@
+"""Bounded readers for binary PDF uploads (raw application/pdf and multipart/form-data)
+
+The body is read chunk by chunk and rejected as soon as it exceeds the size
+limit, instead of being parsed as a JSON string and base64-decoded.
+"""
+
+import io
+from typing import AsyncIterator, List, Optional, Tuple
+
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+# Multipart framing allowance on top of the file itself (boundaries, part
+# headers, small form fields)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Multipart file parts are spooled in memory up to this size, then on disk
+MULTIPART_SPOOL_BYTES = 1024 * 1024
+
+UploadResult = Tuple[Optional[bytes], Optional[str], Optional[str]]
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+async def _limited(stream: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass chunks through, raising once more than max_bytes have been read"""
+    total = 0
+    async for chunk in stream:
+        total += len(chunk)
+        if total > max_bytes:
+            raise _UploadTooLarge()
+        yield chunk
+
+
+def _declared_too_large(request: Request, max_bytes: int) -> bool:
+    content_length = request.headers.get("content-length")
+    return bool(content_length and content_length.isdigit() and int(content_length) > max_bytes)
+
+
+def _too_large(max_bytes: int) -> UploadResult:
+    return None, f"PDF exceeds maximum size of {max_bytes // (1024 * 1024)}MB", "FILE_TOO_LARGE"
+
+
+def _check_pdf(pdf_bytes: bytes) -> UploadResult:
+    if not pdf_bytes:
+        return None, "Request body is empty", "INVALID_REQUEST"
+    # Validate PDF magic bytes
+    if not pdf_bytes.startswith(b"%PDF"):
+        return None, "Invalid PDF data", "INVALID_PDF"
+    return pdf_bytes, None, None
+
+
+async def read_raw_pdf(request: Request, max_bytes: int) -> UploadResult:
+    """
+    Read a raw `application/pdf` request body.
+
+    Args:
+        request: Incoming request (body not yet consumed)
+        max_bytes: Maximum PDF size
+
+    Returns:
+        Tuple of (pdf_bytes, error_message, error_code)
+    """
+    if _declared_too_large(request, max_bytes):
+        return _too_large(max_bytes)
+
+    buffer = io.BytesIO()
+    try:
+        async for chunk in _limited(request.stream(), max_bytes):
+            buffer.write(chunk)
+    except _UploadTooLarge:
+        return _too_large(max_bytes)
+
+    return _check_pdf(buffer.getvalue())
+
+
+async def read_multipart_pdf(request: Request, max_bytes: int, field: str = "file") -> UploadResult:
+    """
+    Read a PDF file part from a `multipart/form-data` request body.
+
+    The part is spooled (memory, then a temporary file past
+    MULTIPART_SPOOL_BYTES) while the body streams in, and the whole body is
+    capped at max_bytes plus framing.
+
+    Args:
+        request: Incoming request (body not yet consumed)
+        max_bytes: Maximum PDF size
+        field: Name of the file field
+
+    Returns:
+        Tuple of (pdf_bytes, error_message, error_code)
+    """
+    body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+    if _declared_too_large(request, body_limit):
+        return _too_large(max_bytes)
+
+    parser = MultiPartParser(
+        request.headers,
+        _limited(request.stream(), body_limit),
+        max_files=1,
+        max_fields=16,
+    )
+    parser.spool_max_size = MULTIPART_SPOOL_BYTES
+    try:
+        form = await parser.parse()
+    except _UploadTooLarge:
+        return _too_large(max_bytes)
+    except MultiPartException as e:
+        return None, f"Invalid multipart body: {e.message}", "INVALID_REQUEST"
+
+    try:
+        upload = form.get(field)
+        if not isinstance(upload, UploadFile):
+            return None, f"Missing '{field}' file field", "INVALID_REQUEST"
+        pdf_bytes = await upload.read()
+    finally:
+        await form.close()
+
+    if len(pdf_bytes) > max_bytes:
+        return _too_large(max_bytes)
+    return _check_pdf(pdf_bytes)
+
+
+async def read_multipart_pdfs(
+    request: Request,
+    max_bytes: int,
+    max_total_bytes: int,
+    max_files: int,
+    field: str = "files",
+) -> Tuple[Optional[List[Tuple[Optional[str], UploadResult]]], Optional[str], Optional[str]]:
+    """
+    Read several PDF file parts from a `multipart/form-data` request body.
+
+    Files that are too large or not PDFs do not fail the request: each file
+    gets its own (pdf_bytes, error_message, error_code) result.
+
+    Args:
+        request: Incoming request (body not yet consumed)
+        max_bytes: Maximum size of each PDF
+        max_total_bytes: Maximum size of the whole body
+        max_files: Maximum number of files
+        field: Name of the (repeated) file field
+
+    Returns:
+        Tuple of (list of (filename, file result), error_message, error_code)
+    """
+    too_large = None, f"Request body exceeds maximum size of {max_total_bytes // (1024 * 1024)}MB", "FILE_TOO_LARGE"
+    if _declared_too_large(request, max_total_bytes):
+        return too_large
+
+    parser = MultiPartParser(
+        request.headers,
+        _limited(request.stream(), max_total_bytes),
+        max_files=max_files,
+        max_fields=16,
+    )
+    parser.spool_max_size = MULTIPART_SPOOL_BYTES
+    try:
+        form = await parser.parse()
+    except _UploadTooLarge:
+        return too_large
+    except MultiPartException as e:
+        return None, f"Invalid multipart body: {e.message}", "INVALID_REQUEST"
+
+    files = []
+    try:
+        for upload in form.getlist(field):
+            if not isinstance(upload, UploadFile):
+                continue
+            if upload.size is not None and upload.size > max_bytes:
+                files.append((upload.filename, _too_large(max_bytes)))
+                continue
+            files.append((upload.filename, _check_pdf(await upload.read())))
+    finally:
+        await form.close()
+
+    if not files:
+        return None, f"Missing '{field}' file fields", "INVALID_REQUEST"
+    return files, None, None
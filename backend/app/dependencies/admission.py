@@ -0,0 +1,49 @@
+"""Admission control dependency for V1 API endpoints"""
+
+from fastapi import Request
+
+from app.core.responses import ModelJSONResponse
+from app.models.convert import ConversionError
+from app.services.admission_service import admission_service, AdmissionInfo
+
+
+class OverloadedError(Exception):
+    """Raised by check_admission when the request is shed (see overloaded_handler)"""
+
+    def __init__(self, info: AdmissionInfo):
+        super().__init__("Conversion capacity is saturated")
+        self.info = info
+
+
+async def check_admission() -> AdmissionInfo:
+    """
+    Reject the request with 503 (code OVERLOADED) if the conversion pool is
+    overloaded for the team (after schedule_as_team).
+
+    Runs before any credit is deducted, so a rejected request costs nothing.
+    Use this for endpoints that convert in the request (asynchronous jobs
+    absorb bursts instead).
+    """
+    info = admission_service.check()
+    if not info.allowed:
+        raise OverloadedError(info)
+    return info
+
+
+async def overloaded_handler(request: Request, exc: OverloadedError) -> ModelJSONResponse:
+    """Shed request: ConversionError envelope, with when to retry"""
+    return ModelJSONResponse(
+        status_code=503,
+        content=ConversionError(
+            success=False,
+            error=(
+                "Conversion capacity is saturated. Please retry after the indicated delay, "
+                "or submit an asynchronous job (POST /v1/convert/jobs)."
+            ),
+            code="OVERLOADED",
+        ),
+        headers={
+            "Retry-After": str(exc.info.retry_after),
+            "X-Estimated-Wait-Seconds": str(exc.info.estimated_wait_seconds),
+        },
+    )
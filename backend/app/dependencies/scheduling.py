@@ -0,0 +1,19 @@
+"""Conversion scheduling dependency for V1 API endpoints"""
+
+from fastapi import Depends
+from app.dependencies.auth import AuthenticatedUser, require_team_context
+from app.services.conversion_pool import set_conversion_team
+
+
+async def schedule_as_team(
+    user: AuthenticatedUser = Depends(require_team_context),
+) -> AuthenticatedUser:
+    """
+    Queue the conversions of this request as the team's jobs, so that the
+    worker pool shares its capacity fairly between teams (paid teams get a
+    larger share).
+
+    Use this for endpoints that convert in the request.
+    """
+    set_conversion_team(user.team_id, user.is_paid)
+    return user
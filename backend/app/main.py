@@ -1,12 +1,21 @@
 """FastAPI backend for DocuProcess - PDF to Markdown API"""
 
+from contextlib import asynccontextmanager
 from importlib.metadata import version as get_version, PackageNotFoundError
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers.v1 import account as v1_account
 from app.routers.v1 import convert as v1_convert
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.http_client import close_http_client, start_http_client
+from app.dependencies.admission import OverloadedError, overloaded_handler
+from app.services.admission_service import admission_service
+from app.services.conversion_pool import conversion_pool
+from app.services.job_service import job_service
+from app.services.pdf_converter_service import warm_up_worker
 
 # Version derived from git tags via setuptools-scm
 # Falls back to "0.0.0" if package not installed or no tags
@@ -15,6 +24,18 @@ try:
 except PackageNotFoundError:
     version = "0.0.0"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources before serving (HTTP client, warm conversion pool), stop them on shutdown"""
+    await start_http_client()
+    await conversion_pool.start(initializer=warm_up_worker)
+    yield
+    await job_service.close()
+    await conversion_pool.stop()
+    await close_http_client()
+
+
 app = FastAPI(
     title="DocuProcess API",
     description="PDF to Markdown conversion API - Extract text from PDFs while preserving structure",
@@ -22,6 +43,7 @@ app = FastAPI(
     servers=[
         {"url": "https://api.docuprocess.com", "description": "Production"},
     ],
+    lifespan=lifespan,
 )
 
 # CORS configuration for Next.js frontend
@@ -33,6 +55,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (converted markdown) for clients that accept it
+app.add_middleware(CompressionMiddleware)
+
+# Requests shed by admission control (check_admission)
+app.add_exception_handler(OverloadedError, overloaded_handler)
+
 # Include routers
 # V1 Public API
 app.include_router(v1_account.router, prefix="/v1/account", tags=["Account"])
@@ -51,12 +79,37 @@ async def root():
 
 @app.get("/health", include_in_schema=False)
 async def health():
-    """Detailed health check"""
+    """Detailed health check with the conversion load (503 until the conversion workers are warm)"""
+    if not conversion_pool.ready:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "starting",
+                "checks": {
+                    "api": "ok",
+                    "conversion_workers": "warming_up",
+                }
+            },
+        )
+    # Overload is reported, not failed: shedding happens per request
+    # (check_admission), failing the check would take the instance out of rotation
+    load = admission_service.check()
     return {
         "status": "healthy",
         "checks": {
             "api": "ok",
-        }
+            "conversion_workers": "ok" if load.allowed else "overloaded",
+        },
+        "load": {
+            "workers": load.workers,
+            "running_jobs": load.running_jobs,
+            "queued_jobs": load.queued_jobs,
+            "running_pages": load.running_pages,
+            "queued_pages": load.queued_pages,
+            "average_page_seconds": load.average_page_seconds,
+            "backlog_seconds": load.backlog_seconds,
+            "estimated_wait_seconds": load.estimated_wait_seconds,  # for a team with nothing queued
+        },
     }
 
 if __name__ == "__main__":
@@ -1,11 +1,66 @@
 """Pydantic models for PDF conversion endpoints"""
 
-from typing import Optional
-from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Dict, List, Literal, Optional
+from pydantic import AfterValidator, BaseModel, Field, model_validator
 
+from app.core.config import settings
+from app.core.page_ranges import PageRangeError, parse_page_ranges
 
-class PdfToMarkdownRequest(BaseModel):
-    """Request model for PDF to Markdown conversion"""
+
+def _check_page_selection(v: Optional[str]) -> Optional[str]:
+    """Check the page selection syntax (bounds are checked against the PDF)"""
+    if v is None:
+        return v
+    try:
+        parse_page_ranges(v)
+    except PageRangeError as e:
+        raise ValueError(str(e))
+    return v
+
+
+# Conversion options, shared by the JSON body and the upload query parameters
+PageSelection = Annotated[Optional[str], AfterValidator(_check_page_selection)]
+ConversionMode = Literal["fast", "balanced", "accurate", "auto"]
+OutputFormat = Literal["markdown", "json"]
+
+PAGES_DESCRIPTION = (
+    "Pages to convert, 1-based and comma-separated: single pages (`10`), "
+    "ranges (`1-3`) or open ranges (`20-`, `-5`). All pages when omitted."
+)
+MODE_DESCRIPTION = (
+    "Conversion mode: `fast` (plain text blocks with headings, no layout or "
+    "table analysis), `balanced` (layout analysis without tables), `accurate` "
+    "(full layout and table analysis) or `auto` (chosen per page from its "
+    "vector graphics)"
+)
+OUTPUT_FORMAT_DESCRIPTION = (
+    "Output format: `markdown` (one markdown document) or `json` (blocks of "
+    "each page with type, text, bounding box and font size, in `pages`)"
+)
+
+
+class ChunkingSettings(BaseModel):
+    """Chunking of the markdown output for retrieval (RAG)"""
+
+    max_tokens: int = Field(
+        default=512,
+        ge=64,
+        le=8192,
+        description="Token budget of a chunk (tokens are approximated, erring high)",
+        examples=[512]
+    )
+    overlap_tokens: int = Field(
+        default=64,
+        ge=0,
+        le=4096,
+        description="Tokens repeated from the end of a chunk at the start of the next one "
+                    "within a section (at most half of `max_tokens`)",
+        examples=[64]
+    )
+
+
+class PdfSource(BaseModel):
+    """A PDF given by URL or as base64 (exactly one of them)"""
 
     url: Optional[str] = Field(
         default=None,
@@ -29,6 +84,40 @@ class PdfToMarkdownRequest(BaseModel):
             raise ValueError("URL must use HTTPS")
         return self
 
+
+class PdfToMarkdownRequest(PdfSource):
+    """Request model for PDF to Markdown conversion"""
+
+    pages: PageSelection = Field(
+        default=None,
+        description=PAGES_DESCRIPTION,
+        examples=["1-3,10,20-"]
+    )
+    mode: ConversionMode = Field(
+        default="accurate",
+        description=MODE_DESCRIPTION,
+        examples=["auto"]
+    )
+    output_format: OutputFormat = Field(
+        default="markdown",
+        description=OUTPUT_FORMAT_DESCRIPTION,
+        examples=["json"]
+    )
+    chunking: Optional[ChunkingSettings] = Field(
+        default=None,
+        description=(
+            "Also split the markdown into chunks for retrieval: one chunk per section "
+            "(heading) at most, under a token budget, with source page spans"
+        )
+    )
+
+    @model_validator(mode='after')
+    def validate_chunking(self):
+        """Chunks are made from the markdown output"""
+        if self.chunking is not None and self.output_format != "markdown":
+            raise ValueError("Chunking requires output_format 'markdown'")
+        return self
+
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -37,12 +126,66 @@ class PdfToMarkdownRequest(BaseModel):
                 },
                 {
                     "pdf_base64": "JVBERi0xLjQKJeLjz9MKMSAwIG9iago8PC..."
+                },
+                {
+                    "url": "https://example.com/document.pdf",
+                    "pages": "1-3,10",
+                    "mode": "auto"
                 }
             ]
         }
     }
 
 
+class PageBlockColumns(BaseModel):
+    """Blocks of a page as parallel arrays: index i of every array describes block i"""
+
+    type: List[Literal["heading", "text", "table", "image"]] = Field(
+        ...,
+        description="Block type, in reading order",
+        examples=[["heading", "text", "table"]]
+    )
+    text: List[str] = Field(
+        ...,
+        description="Block text (markdown for tables, empty for images)",
+        examples=[["Introduction", "This document covers...", "|Year|Revenue|\n|---|---|\n|2024|12.5|"]]
+    )
+    x0: List[float] = Field(..., description="Left edge, in points from the left of the page", examples=[[72.0, 72.0, 72.0]])
+    y0: List[float] = Field(..., description="Top edge, in points from the top of the page", examples=[[70.2, 98.4, 130.0]])
+    x1: List[float] = Field(..., description="Right edge", examples=[[210.5, 540.1, 312.0]])
+    y1: List[float] = Field(..., description="Bottom edge", examples=[[92.8, 112.3, 190.0]])
+    font_size: List[float] = Field(
+        ...,
+        description="Font size of the block's first line (0 for tables and images)",
+        examples=[[20.0, 11.0, 0.0]]
+    )
+    level: List[int] = Field(..., description="Heading level (0 for other blocks)", examples=[[1, 0, 0]])
+
+
+class PageBlocks(BaseModel):
+    """Blocks of one page (`output_format=json`)"""
+
+    page: int = Field(..., description="Page number (1-based)", examples=[1])
+    width: float = Field(..., description="Page width in points", examples=[612.0])
+    height: float = Field(..., description="Page height in points", examples=[792.0])
+    blocks: PageBlockColumns
+
+
+class Chunk(BaseModel):
+    """A chunk of the markdown output"""
+
+    index: int = Field(..., description="Position of the chunk (0-based)", examples=[0])
+    text: str = Field(..., description="Markdown of the chunk", examples=["## Methods\n\nSamples were collected..."])
+    tokens: int = Field(..., description="Approximate token count", examples=[487])
+    page_start: int = Field(..., description="First page the chunk comes from (1-based)", examples=[3])
+    page_end: int = Field(..., description="Last page the chunk comes from (1-based)", examples=[4])
+    headings: List[str] = Field(
+        ...,
+        description="Section headings the chunk belongs to, outermost first",
+        examples=[["Study design", "Methods"]]
+    )
+
+
 class PdfToMarkdownResponse(BaseModel):
     """Response model for PDF to Markdown conversion"""
 
@@ -53,14 +196,47 @@ class PdfToMarkdownResponse(BaseModel):
     )
     markdown: str = Field(
         ...,
-        description="Extracted markdown content",
+        description="Extracted markdown content (empty with `output_format=json`)",
         examples=["# Document Title\n\nThis is the document content..."]
     )
+    pages: Optional[List[PageBlocks]] = Field(
+        default=None,
+        description="Blocks of each converted page, in page order (`output_format=json` only)"
+    )
+    chunks: Optional[List[Chunk]] = Field(
+        default=None,
+        description="Chunks of the markdown, in document order (with `chunking` only)"
+    )
     page_count: int = Field(
         ...,
         description="Number of pages in the PDF",
         examples=[12]
     )
+    pages_converted: int = Field(
+        ...,
+        description="Number of pages converted (less than page_count when `pages` is set)",
+        examples=[12]
+    )
+    pages_from_cache: int = Field(
+        ...,
+        description="Converted pages served from cache (unchanged since a previous conversion)",
+        examples=[10]
+    )
+    mode: str = Field(
+        ...,
+        description="Requested conversion mode",
+        examples=["auto"]
+    )
+    output_format: str = Field(
+        default="markdown",
+        description="Requested output format",
+        examples=["markdown"]
+    )
+    pages_by_mode: Dict[str, int] = Field(
+        ...,
+        description="Number of converted pages per conversion mode actually used",
+        examples=[{"fast": 9, "accurate": 3}]
+    )
     credits_used: int = Field(
         ...,
         description="Number of credits consumed",
@@ -79,6 +255,11 @@ class PdfToMarkdownResponse(BaseModel):
                     "success": True,
                     "markdown": "# Introduction\n\nThis document covers...",
                     "page_count": 12,
+                    "pages_converted": 12,
+                    "pages_from_cache": 10,
+                    "mode": "auto",
+                    "output_format": "markdown",
+                    "pages_by_mode": {"fast": 9, "accurate": 3},
                     "credits_used": 1,
                     "remaining_credits": 149
                 }
@@ -87,6 +268,76 @@ class PdfToMarkdownResponse(BaseModel):
     }
 
 
+class PdfInspectRequest(PdfSource):
+    """Request model for PDF inspection"""
+
+    pages: PageSelection = Field(
+        default=None,
+        description="Pages to inspect (and estimate), as in conversions. All pages when omitted.",
+        examples=["1-3,10,20-"]
+    )
+
+
+class InspectedPage(BaseModel):
+    """Signals about one page, read without converting it"""
+
+    page: int = Field(..., description="Page number (1-based)", examples=[1])
+    width: float = Field(..., description="Page width in points", examples=[612.0])
+    height: float = Field(..., description="Page height in points", examples=[792.0])
+    text_chars: int = Field(
+        ...,
+        description="Non-whitespace characters in the text layer (0: no text layer)",
+        examples=[2480]
+    )
+    images: int = Field(..., description="Images drawn on the page", examples=[1])
+    image_coverage: float = Field(..., description="Fraction of the page covered by images (0 to 1)", examples=[0.12])
+    drawings: int = Field(..., description="Vector paths (lines, rectangles, curves)", examples=[24])
+    scanned: bool = Field(
+        ...,
+        description="Mostly image with no text layer: converts to little or no text (no OCR)",
+        examples=[False]
+    )
+    auto_mode: Literal["fast", "balanced", "accurate"] = Field(
+        ...,
+        description="Mode `auto` would use for the page",
+        examples=["accurate"]
+    )
+
+
+class PdfInspectResponse(BaseModel):
+    """Response model for PDF inspection"""
+
+    success: bool = Field(..., description="Whether the inspection succeeded", examples=[True])
+    page_count: int = Field(..., description="Number of pages in the PDF", examples=[12])
+    pages_inspected: int = Field(..., description="Number of pages inspected (see `pages`)", examples=[12])
+    encrypted: bool = Field(..., description="Whether the PDF is encrypted", examples=[False])
+    password_required: bool = Field(
+        ...,
+        description="Whether the PDF needs a password to open: it cannot be converted, and no page is inspected",
+        examples=[False]
+    )
+    pages: List[InspectedPage] = Field(..., description="Inspected pages, in page order")
+    pages_with_text: int = Field(..., description="Inspected pages with a text layer", examples=[11])
+    scanned_pages: int = Field(..., description="Inspected pages that are scans", examples=[1])
+    pages_by_mode: Dict[str, int] = Field(
+        ...,
+        description="Number of inspected pages per mode `auto` would use",
+        examples=[{"fast": 9, "accurate": 3}]
+    )
+    estimated_seconds: Dict[str, float] = Field(
+        ...,
+        description="Estimated conversion time of the inspected pages in each mode, once a worker is free",
+        examples=[{"fast": 0.05, "balanced": 0.24, "accurate": 0.96, "auto": 0.31}]
+    )
+    estimated_wait_seconds: float = Field(
+        ...,
+        description="Estimated wait for a conversion worker right now (your team's share of a busy pool)",
+        examples=[0.0]
+    )
+    estimated_credits: int = Field(..., description="Credits a conversion would use", examples=[1])
+    exec_time_ms: int = Field(..., description="Inspection time in milliseconds", examples=[14])
+
+
 class ConversionError(BaseModel):
     """Error response for conversion failures"""
 
@@ -109,3 +360,289 @@ class ConversionError(BaseModel):
             ]
         }
     }
+
+
+class MarkdownPageEvent(BaseModel):
+    """Streaming event carrying the markdown of one page"""
+
+    type: Literal["page"] = Field(default="page", examples=["page"])
+    page: int = Field(..., description="Page number (1-based)", examples=[1])
+    markdown: str = Field(
+        ...,
+        description="Markdown content of the page",
+        examples=["# Introduction\n\nThis document covers..."]
+    )
+    elapsed_ms: int = Field(
+        ...,
+        description="Milliseconds since the stream started",
+        examples=[840]
+    )
+    cached: bool = Field(
+        default=False,
+        description="Whether the page was served from cache",
+        examples=[False]
+    )
+    mode: str = Field(..., description="Conversion mode used for the page", examples=["fast"])
+
+
+class ChunkEvent(Chunk):
+    """Streaming event carrying one chunk (streams with `chunking`, instead of page events)"""
+
+    type: Literal["chunk"] = Field(default="chunk", examples=["chunk"])
+    elapsed_ms: int = Field(
+        ...,
+        description="Milliseconds since the stream started",
+        examples=[840]
+    )
+
+
+class StreamSummaryEvent(BaseModel):
+    """Final streaming event, sent after the last page"""
+
+    type: Literal["summary"] = Field(default="summary", examples=["summary"])
+    success: bool = Field(default=True, examples=[True])
+    page_count: int = Field(..., description="Number of pages in the PDF", examples=[12])
+    pages_converted: int = Field(..., description="Number of pages converted", examples=[12])
+    pages_from_cache: int = Field(..., description="Converted pages served from cache", examples=[10])
+    pages_by_mode: Dict[str, int] = Field(
+        ...,
+        description="Number of converted pages per conversion mode used",
+        examples=[{"fast": 9, "accurate": 3}]
+    )
+    chunks: Optional[int] = Field(default=None, description="Number of chunks sent (with `chunking`)", examples=[42])
+    credits_used: int = Field(..., description="Number of credits consumed", examples=[1])
+    remaining_credits: int = Field(
+        ...,
+        description="Remaining credits after this operation",
+        examples=[149]
+    )
+    exec_time_ms: int = Field(..., description="Total conversion time in milliseconds", examples=[5230])
+
+
+class StreamErrorEvent(BaseModel):
+    """Streaming event sent instead of the summary when conversion fails mid-stream"""
+
+    type: Literal["error"] = Field(default="error", examples=["error"])
+    success: bool = Field(default=False, examples=[False])
+    error: str = Field(..., description="Error message", examples=["Conversion worker terminated unexpectedly"])
+    code: str = Field(..., description="Error code", examples=["CONVERSION_FAILED"])
+
+
+class BatchItem(PdfSource):
+    """One PDF of a batch conversion"""
+
+    id: Optional[str] = Field(
+        default=None,
+        max_length=256,
+        description="Client reference, echoed in the item result",
+        examples=["invoice-2024-001"]
+    )
+    pages: PageSelection = Field(
+        default=None,
+        description="Pages to convert for this item (overrides the batch `pages`)",
+        examples=["1-3"]
+    )
+    mode: Optional[ConversionMode] = Field(
+        default=None,
+        description="Conversion mode for this item (overrides the batch `mode`)",
+        examples=["fast"]
+    )
+
+
+class BatchConvertRequest(BaseModel):
+    """Request model for batch PDF to Markdown conversion"""
+
+    items: List[BatchItem] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_ITEMS,
+        description=f"PDFs to convert (at most {settings.BATCH_MAX_ITEMS})"
+    )
+    pages: PageSelection = Field(
+        default=None,
+        description=PAGES_DESCRIPTION,
+        examples=["1-3,10,20-"]
+    )
+    mode: ConversionMode = Field(
+        default="accurate",
+        description=MODE_DESCRIPTION,
+        examples=["auto"]
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "items": [
+                        {"id": "a", "url": "https://example.com/a.pdf"},
+                        {"id": "b", "url": "https://example.com/b.pdf", "pages": "1-3"}
+                    ],
+                    "mode": "auto"
+                }
+            ]
+        }
+    }
+
+
+class BatchItemResult(BaseModel):
+    """Result of one item of a batch conversion (also the `item` streaming event)"""
+
+    type: Literal["item"] = Field(default="item", examples=["item"])
+    index: int = Field(..., description="Position of the item in the request (0-based)", examples=[0])
+    id: Optional[str] = Field(
+        default=None,
+        description="Client reference of the item (file name for uploads)",
+        examples=["invoice-2024-001"]
+    )
+    success: bool = Field(..., examples=[True])
+    markdown: Optional[str] = Field(default=None, description="Extracted markdown content")
+    page_count: Optional[int] = Field(default=None, description="Number of pages in the PDF", examples=[12])
+    pages_converted: Optional[int] = Field(default=None, description="Number of pages converted", examples=[12])
+    pages_from_cache: Optional[int] = Field(
+        default=None,
+        description="Converted pages served from cache",
+        examples=[0]
+    )
+    mode: str = Field(..., description="Requested conversion mode", examples=["auto"])
+    pages_by_mode: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Number of converted pages per conversion mode actually used",
+        examples=[{"fast": 9, "accurate": 3}]
+    )
+    error: Optional[str] = Field(default=None, description="Error message (failed items)")
+    code: Optional[str] = Field(default=None, description="Error code (failed items)", examples=["URL_FETCH_FAILED"])
+
+
+class BatchConvertResponse(BaseModel):
+    """Response model for batch PDF to Markdown conversion"""
+
+    success: bool = Field(..., description="Whether every item was converted", examples=[True])
+    items: List[BatchItemResult] = Field(..., description="Item results, in request order")
+    succeeded: int = Field(..., description="Number of items converted", examples=[2])
+    failed: int = Field(..., description="Number of items that failed (not charged)", examples=[0])
+    credits_used: int = Field(..., description="Number of credits consumed (1 per converted item)", examples=[2])
+    remaining_credits: int = Field(
+        ...,
+        description="Remaining credits after this operation",
+        examples=[148]
+    )
+    exec_time_ms: int = Field(..., description="Total batch time in milliseconds", examples=[5230])
+
+
+class BatchSummaryEvent(BaseModel):
+    """Final event of a streamed batch conversion, sent after the last item"""
+
+    type: Literal["summary"] = Field(default="summary", examples=["summary"])
+    success: bool = Field(..., description="Whether every item was converted", examples=[True])
+    succeeded: int = Field(..., description="Number of items converted", examples=[2])
+    failed: int = Field(..., description="Number of items that failed (not charged)", examples=[0])
+    credits_used: int = Field(..., description="Number of credits consumed", examples=[2])
+    remaining_credits: int = Field(
+        ...,
+        description="Remaining credits after this operation",
+        examples=[148]
+    )
+    exec_time_ms: int = Field(..., description="Total batch time in milliseconds", examples=[5230])
+
+
+class PdfToMarkdownStreamRequest(PdfToMarkdownRequest):
+    """Request model for a streaming PDF to Markdown conversion"""
+
+    output_format: Literal["markdown"] = Field(
+        default="markdown",
+        description="Output format (streams are markdown only)"
+    )
+
+
+class ConversionJobRequest(PdfToMarkdownRequest):
+    """Request model for an asynchronous conversion job"""
+
+    output_format: Literal["markdown"] = Field(
+        default="markdown",
+        description="Output format (jobs return markdown only)"
+    )
+    chunking: None = Field(default=None, description="Not supported by jobs")
+
+    webhook_url: Optional[str] = Field(
+        default=None,
+        description=(
+            "HTTPS URL notified with a signed POST when the job finishes "
+            "(private/internal addresses are blocked)"
+        ),
+        examples=["https://example.com/hooks/docuprocess"]
+    )
+    webhook_secret: Optional[str] = Field(
+        default=None,
+        min_length=16,
+        max_length=256,
+        description="Secret used to sign the webhook requests (generated and returned when omitted)"
+    )
+
+    @model_validator(mode='after')
+    def validate_webhook(self):
+        """Webhooks are HTTPS only"""
+        if self.webhook_url and not self.webhook_url.startswith("https://"):
+            raise ValueError("Webhook URL must use HTTPS")
+        return self
+
+
+class ConversionJobSubmitResponse(BaseModel):
+    """Response model for an accepted conversion job"""
+
+    success: bool = Field(default=True, examples=[True])
+    job_id: str = Field(..., description="Job identifier", examples=["5f0c6a7e-3b7d-4c55-9a43-1f0e3b7a9c21"])
+    status: str = Field(..., description="Job status (`queued` on submission)", examples=["queued"])
+    status_url: str = Field(
+        ...,
+        description="Where to poll the job status and fetch its result",
+        examples=["/v1/convert/jobs/5f0c6a7e-3b7d-4c55-9a43-1f0e3b7a9c21"]
+    )
+    webhook_secret: Optional[str] = Field(
+        default=None,
+        description="Secret signing the webhook requests (jobs with a `webhook_url`)"
+    )
+    credits_used: int = Field(..., description="Credits reserved for the job (refunded if it fails)", examples=[1])
+    remaining_credits: int = Field(
+        ...,
+        description="Remaining credits after this operation",
+        examples=[149]
+    )
+
+
+class ConversionJobResult(BaseModel):
+    """Result of a successful conversion job"""
+
+    markdown: str = Field(..., description="Extracted markdown content")
+    page_count: int = Field(..., description="Number of pages in the PDF", examples=[480])
+    pages_converted: int = Field(..., description="Number of pages converted", examples=[480])
+    pages_from_cache: int = Field(..., description="Converted pages served from cache", examples=[0])
+    pages_by_mode: Dict[str, int] = Field(
+        ...,
+        description="Number of converted pages per conversion mode actually used",
+        examples=[{"accurate": 480}]
+    )
+
+
+class ConversionJobStatus(BaseModel):
+    """Status, progress and (once done) result of a conversion job"""
+
+    job_id: str = Field(..., description="Job identifier", examples=["5f0c6a7e-3b7d-4c55-9a43-1f0e3b7a9c21"])
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(..., examples=["running"])
+    mode: str = Field(..., description="Requested conversion mode", examples=["accurate"])
+    pages_done: int = Field(..., description="Pages converted so far", examples=[120])
+    pages_total: Optional[int] = Field(
+        default=None,
+        description="Pages to convert (known once the conversion has started)",
+        examples=[480]
+    )
+    progress: float = Field(..., description="Fraction of the pages converted (0 to 1)", examples=[0.25])
+    result: Optional[ConversionJobResult] = Field(default=None, description="Conversion result (`succeeded` jobs)")
+    error: Optional[str] = Field(default=None, description="Error message (`failed` jobs)")
+    code: Optional[str] = Field(default=None, description="Error code (`failed` jobs)", examples=["CONVERSION_TIMEOUT"])
+    webhook_status: Optional[Literal["pending", "delivered", "failed"]] = Field(
+        default=None,
+        description="Webhook delivery status (jobs with a `webhook_url`, once finished); `failed` after the last retry",
+        examples=["delivered"]
+    )
+    created_at: str = Field(..., description="Submission time (ISO 8601)")
+    updated_at: str = Field(..., description="Last status change (ISO 8601)")
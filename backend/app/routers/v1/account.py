@@ -5,18 +5,18 @@ import logging
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from app.dependencies.auth import require_team_context, AuthenticatedUser
 from app.dependencies.ratelimit import get_rate_limit_info, rate_limit_headers
 from app.services.ratelimit_service import RateLimitInfo
 from app.services.credit_service import credit_service
+from app.core.responses import ModelJSONResponse
 from app.core.supabase import get_supabase
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ModelJSONResponse)
 
 
 class AccountInfoResponse(BaseModel):
@@ -124,11 +124,11 @@ async def get_account_info(
 
     credits = await credit_service.get_credits(user.team_id)
 
-    return JSONResponse(
+    return ModelJSONResponse(
         content=AccountInfoResponse(
             credits=credits,
             email=user.email
-        ).model_dump(),
+        ),
         headers=rate_limit_headers(rate_limit),
     )
 
@@ -242,13 +242,13 @@ async def list_transactions(
                 created_at=t["created_at"],
             ))
 
-        return JSONResponse(
+        return ModelJSONResponse(
             content=TransactionsResponse(
                 transactions=transactions,
                 total=total,
                 limit=limit,
                 offset=offset
-            ).model_dump(),
+            ),
             headers=rate_limit_headers(rate_limit),
         )
 
@@ -1,31 +1,73 @@
 """V1 Convert API endpoint for PDF to Markdown conversion"""
 
+import asyncio
+import hmac
 import logging
+import secrets
 import time
+from collections import Counter
+from typing import Annotated, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
 from app.dependencies.auth import require_team_context, AuthenticatedUser
+from app.dependencies.admission import check_admission
 from app.dependencies.ratelimit import check_rate_limit, rate_limit_headers
+from app.dependencies.scheduling import schedule_as_team
+from app.services.admission_service import admission_service
 from app.services.ratelimit_service import RateLimitInfo
 from app.services.credit_service import credit_service
-from app.services.pdf_converter_service import pdf_converter_service
+from app.services.job_service import job_service
+from app.core.chunking import ChunkingOptions, ChunkPacker
+from app.core.config import settings
+from app.core.responses import ModelJSONResponse
+from app.core.uploads import read_multipart_pdf, read_multipart_pdfs, read_raw_pdf
+from app.services.pdf_converter_service import (
+    MAX_PDF_SIZE_BYTES,
+    ConversionOptions,
+    ConversionResult,
+    pdf_converter_service,
+)
 from app.models.convert import (
+    MODE_DESCRIPTION,
+    OUTPUT_FORMAT_DESCRIPTION,
+    PAGES_DESCRIPTION,
+    ChunkingSettings,
+    ConversionMode,
+    OutputFormat,
+    PageSelection,
     PdfToMarkdownRequest,
     PdfToMarkdownResponse,
+    PdfToMarkdownStreamRequest,
+    PdfInspectRequest,
+    PdfInspectResponse,
+    InspectedPage,
     ConversionError,
+    MarkdownPageEvent,
+    ChunkEvent,
+    StreamSummaryEvent,
+    StreamErrorEvent,
+    BatchConvertRequest,
+    BatchConvertResponse,
+    BatchItemResult,
+    BatchSummaryEvent,
+    ConversionJobRequest,
+    ConversionJobStatus,
+    ConversionJobSubmitResponse,
 )
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ModelJSONResponse)
 
 
 @router.post(
     "/pdf-to-markdown",
     operation_id="convertPdfToMarkdown",
+    dependencies=[Depends(schedule_as_team), Depends(check_admission)],
     response_model=PdfToMarkdownResponse,
     summary="Convert PDF to Markdown",
     description="""
@@ -37,13 +79,45 @@ Convert a PDF document to clean Markdown format.
 - `url`: HTTPS URL of a publicly accessible PDF
 - `pdf_base64`: Base64-encoded PDF content
 
+**Options:**
+- `pages`: Pages to convert, e.g. `1-3,10,20-` (all pages when omitted).
+  A selection beyond the last page fails with `INVALID_PAGE_RANGE`.
+- `mode`: `fast`, `balanced`, `accurate` (default) or `auto`. `fast` skips
+  layout and table analysis and is several times cheaper on plain prose;
+  `auto` picks a mode for each page. `pages_by_mode` in the response reports
+  the modes used.
+- `output_format`: `markdown` (default) or `json`.
+- `chunking`: also split the markdown into chunks for retrieval (markdown
+  output only), e.g. `{"max_tokens": 512, "overlap_tokens": 64}`.
+
 **Output:** Markdown text with preserved structure, headings, tables, and formatting.
 
+With `chunking`, `chunks` holds the markdown split into chunks of at most
+`max_tokens` tokens. A section heading always starts a new chunk; a section
+longer than the budget is split at sentence (or table row / list item)
+boundaries, each chunk repeating up to `overlap_tokens` of the end of the
+previous one. Each chunk has `text`, `tokens`, `page_start`/`page_end` (the
+pages it comes from) and `headings` (its section path). Token counts are an
+approximation that errs on the high side for common LLM tokenizers.
+
+With `output_format=json`, `markdown` is empty and `pages` holds the blocks of
+each page (headings, text, tables and images, in reading order). Blocks are
+column-wise: `type`, `text`, `x0`, `y0`, `x1`, `y1`, `font_size` and `level`
+are parallel arrays, index i of each describing block i. Coordinates are in
+points from the top-left corner of the page. Tables are detected in
+`accurate` mode (their text is markdown).
+
 **Limits:**
 - Maximum file size: 10MB
 - HTTPS URLs only (no HTTP)
 - Private/internal URLs are blocked for security
 
+**Caching:** Results are cached by PDF content and options; the `X-Cache`
+response header reports `HIT-MEMORY` or `HIT-DISK` when your team's own
+earlier conversion was reused, `MISS` otherwise. Pages are also
+cached individually, so a re-uploaded document with a few edited pages only
+converts those pages (`pages_from_cache` in the response).
+
 **Credits:** 1 credit per conversion
 
 **Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
@@ -58,6 +132,11 @@ Convert a PDF document to clean Markdown format.
                         "success": True,
                         "markdown": "# Introduction\n\nThis document covers...",
                         "page_count": 12,
+                        "pages_converted": 12,
+                        "pages_from_cache": 0,
+                        "mode": "accurate",
+                        "output_format": "markdown",
+                        "pages_by_mode": {"accurate": 12},
                         "credits_used": 1,
                         "remaining_credits": 149
                     }
@@ -83,6 +162,10 @@ Convert a PDF document to clean Markdown format.
         },
         403: {"description": "Invalid or missing API key"},
         429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "Conversion capacity saturated (code OVERLOADED), retry after the Retry-After delay (no credit used)",
+            "model": ConversionError,
+        },
     },
 )
 async def convert_pdf_to_markdown(
@@ -92,14 +175,49 @@ async def convert_pdf_to_markdown(
 ):
     """Convert PDF to Markdown with authentication and credit deduction"""
 
-    start_time = time.time()
-    resource_id = str(uuid4())
-
     logger.info(
         f"PDF conversion request: user={user.user_id}, team={user.team_id}, "
         f"url={bool(request.url)}, base64={bool(request.pdf_base64)}"
     )
 
+    options = ConversionOptions(
+        pages=request.pages,
+        mode=request.mode,
+        output_format=request.output_format,
+        chunking=_chunking_options(request.chunking),
+    )
+    return await _convert_with_credits(
+        user,
+        rate_limit,
+        options,
+        lambda: pdf_converter_service.convert(
+            url=request.url,
+            pdf_base64=request.pdf_base64,
+            options=options
+        ),
+    )
+
+
+def _chunking_options(chunking: Optional[ChunkingSettings]) -> Optional[ChunkingOptions]:
+    """Chunking options of the converter from the request settings"""
+    if chunking is None:
+        return None
+    return ChunkingOptions(max_tokens=chunking.max_tokens, overlap_tokens=chunking.overlap_tokens)
+
+
+async def _convert_with_credits(
+    user: AuthenticatedUser,
+    rate_limit: RateLimitInfo,
+    options: ConversionOptions,
+    convert: Callable[[], Awaitable[ConversionResult]],
+) -> ModelJSONResponse:
+    """
+    Deduct a credit, run the conversion and build the response (the credit
+    is refunded if the conversion fails).
+    """
+    start_time = time.time()
+    resource_id = str(uuid4())
+
     # Deduct credit atomically before processing
     deduction_result = await credit_service.deduct_credit_atomic(
         team_id=user.team_id,
@@ -113,13 +231,13 @@ async def convert_pdf_to_markdown(
         error_msg = deduction_result.get("error", "Insufficient credits")
         logger.warning(f"Credit deduction failed for team {user.team_id}: {error_msg}")
 
-        return JSONResponse(
+        return ModelJSONResponse(
             status_code=402,
             content=ConversionError(
                 success=False,
                 error="Insufficient credits. Please purchase more credits.",
                 code="INSUFFICIENT_CREDITS"
-            ).model_dump(),
+            ),
             headers=rate_limit_headers(rate_limit),
         )
 
@@ -127,10 +245,7 @@ async def convert_pdf_to_markdown(
 
     try:
         # Perform the conversion
-        result = await pdf_converter_service.convert(
-            url=request.url,
-            pdf_base64=request.pdf_base64
-        )
+        result = await convert()
 
         if not result.success:
             # Refund credit on conversion failure
@@ -147,31 +262,43 @@ async def convert_pdf_to_markdown(
                 f"{result.error_code} - {result.error}"
             )
 
-            return JSONResponse(
+            return ModelJSONResponse(
                 status_code=400,
                 content=ConversionError(
                     success=False,
                     error=result.error or "Conversion failed",
                     code=result.error_code or "CONVERSION_FAILED"
-                ).model_dump(),
+                ),
                 headers=rate_limit_headers(rate_limit),
             )
 
         exec_time_ms = int((time.time() - start_time) * 1000)
         logger.info(
             f"PDF conversion successful: team={user.team_id}, "
-            f"pages={result.page_count}, exec_time={exec_time_ms}ms"
+            f"pages={result.pages_converted}/{result.page_count}, "
+            f"cache={result.cache_status}, cached_pages={result.pages_from_cache}, "
+            f"exec_time={exec_time_ms}ms"
         )
 
-        return JSONResponse(
+        return ModelJSONResponse(
             content=PdfToMarkdownResponse(
                 success=True,
                 markdown=result.markdown,
+                pages=result.pages,
+                chunks=result.chunks,
                 page_count=result.page_count,
+                pages_converted=result.pages_converted,
+                pages_from_cache=result.pages_from_cache,
+                mode=options.mode,
+                output_format=options.output_format,
+                pages_by_mode=result.pages_by_mode,
                 credits_used=1,
                 remaining_credits=remaining_credits
-            ).model_dump(),
-            headers=rate_limit_headers(rate_limit),
+            ),
+            headers={
+                **rate_limit_headers(rate_limit),
+                "X-Cache": result.cache_status,
+            },
         )
 
     except Exception as e:
@@ -188,3 +315,1129 @@ async def convert_pdf_to_markdown(
             status_code=500,
             detail="Internal server error during conversion"
         )
+
+
+@router.post(
+    "/pdf-to-markdown/upload",
+    operation_id="convertPdfUploadToMarkdown",
+    dependencies=[Depends(schedule_as_team), Depends(check_admission)],
+    response_model=PdfToMarkdownResponse,
+    summary="Convert an uploaded PDF to Markdown",
+    description="""
+Convert a PDF sent as binary data, without base64 encoding.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Request body (either):**
+- `multipart/form-data` with the PDF in a `file` field
+- The raw PDF with `Content-Type: application/pdf`
+
+**Options (query parameters):** `pages`, `mode` and `output_format`, as in
+`POST /v1/convert/pdf-to-markdown`. `chunk_max_tokens` turns chunking on
+(with `chunk_overlap_tokens`, see `chunking` there).
+
+**Output:** Same response as `POST /v1/convert/pdf-to-markdown`.
+
+**Limits:**
+- Maximum file size: 10MB (larger bodies are rejected with 413 as soon as
+  the limit is crossed)
+
+**Credits:** 1 credit per conversion
+
+**Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
+""",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                },
+                "application/pdf": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+        }
+    },
+    responses={
+        200: {
+            "description": "Conversion successful",
+            "model": PdfToMarkdownResponse,
+        },
+        400: {
+            "description": "Invalid request (invalid PDF, missing file, etc.)",
+            "model": ConversionError,
+        },
+        402: {
+            "description": "Insufficient credits",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        413: {
+            "description": "PDF exceeds the maximum size",
+            "model": ConversionError,
+        },
+        415: {
+            "description": "Unsupported content type",
+            "model": ConversionError,
+        },
+        429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "Conversion capacity saturated (code OVERLOADED), retry after the Retry-After delay (no credit used)",
+            "model": ConversionError,
+        },
+    },
+)
+async def convert_pdf_upload_to_markdown(
+    request: Request,
+    pages: Annotated[PageSelection, Query(description=PAGES_DESCRIPTION, examples=["1-3,10,20-"])] = None,
+    mode: Annotated[ConversionMode, Query(description=MODE_DESCRIPTION)] = "accurate",
+    output_format: Annotated[OutputFormat, Query(description=OUTPUT_FORMAT_DESCRIPTION)] = "markdown",
+    chunk_max_tokens: Annotated[
+        Optional[int],
+        Query(ge=64, le=8192, description="Split the markdown into chunks of at most this many tokens"),
+    ] = None,
+    chunk_overlap_tokens: Annotated[
+        int,
+        Query(ge=0, le=4096, description="Tokens repeated between consecutive chunks of a section"),
+    ] = 64,
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Convert a binary PDF upload (multipart or raw body) to Markdown"""
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    logger.info(
+        f"PDF upload conversion request: user={user.user_id}, team={user.team_id}, "
+        f"content_type={content_type}"
+    )
+
+    # Read the upload before deducting: a bad upload costs nothing
+    if content_type == "multipart/form-data":
+        pdf_bytes, error, error_code = await read_multipart_pdf(request, MAX_PDF_SIZE_BYTES)
+    elif content_type == "application/pdf":
+        pdf_bytes, error, error_code = await read_raw_pdf(request, MAX_PDF_SIZE_BYTES)
+    else:
+        pdf_bytes = None
+        error = "Content-Type must be multipart/form-data or application/pdf"
+        error_code = "UNSUPPORTED_MEDIA_TYPE"
+
+    if error:
+        logger.warning(f"PDF upload rejected for team {user.team_id}: {error_code} - {error}")
+        status_code = {"FILE_TOO_LARGE": 413, "UNSUPPORTED_MEDIA_TYPE": 415}.get(error_code, 400)
+        return ModelJSONResponse(
+            status_code=status_code,
+            content=ConversionError(
+                success=False,
+                error=error,
+                code=error_code
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    chunking = None
+    if chunk_max_tokens is not None:
+        if output_format != "markdown":
+            raise HTTPException(status_code=422, detail="Chunking requires output_format 'markdown'")
+        chunking = ChunkingOptions(max_tokens=chunk_max_tokens, overlap_tokens=chunk_overlap_tokens)
+
+    options = ConversionOptions(pages=pages, mode=mode, output_format=output_format, chunking=chunking)
+    return await _convert_with_credits(
+        user,
+        rate_limit,
+        options,
+        lambda: pdf_converter_service.convert_bytes(pdf_bytes, options),
+    )
+
+
+@router.post(
+    "/inspect",
+    operation_id="inspectPdf",
+    dependencies=[Depends(schedule_as_team)],
+    response_model=PdfInspectResponse,
+    summary="Inspect a PDF before converting it",
+    description="""
+Preflight a PDF without converting it: page count, encryption, and for each
+page its text layer, images and vector graphics, with conversion time
+estimates. Takes milliseconds; use it to pick a `mode` (or route scans
+elsewhere) and to plan around the estimated time and queue wait.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Input:** `url` or `pdf_base64`, as in `POST /v1/convert/pdf-to-markdown`
+(same fetching, caching and limits), and optionally `pages`.
+
+**Output:**
+- `page_count`, `encrypted`, `password_required` (such PDFs cannot be converted)
+- `pages`: per inspected page, `text_chars` (0 = no text layer), `images`,
+  `image_coverage`, `drawings` (vector paths), `scanned` (mostly image with no
+  text layer: there is no OCR, it converts to little or no text) and
+  `auto_mode` (the mode `auto` would use)
+- `estimated_seconds`: conversion time in each mode once a worker is free
+  (page-parallel conversion included), and `estimated_wait_seconds` for a
+  worker right now
+- `estimated_credits`: credits a conversion would use
+
+Estimates come from page statistics, not from a trial conversion: expect the
+right order of magnitude, not an exact time.
+
+**Credits:** Free
+
+**Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
+""",
+    responses={
+        200: {"description": "Inspection result", "model": PdfInspectResponse},
+        400: {
+            "description": "Invalid request (bad URL, invalid PDF, invalid page range)",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        429: {"description": "Rate limit exceeded"},
+    },
+)
+async def inspect_pdf(
+    request: PdfInspectRequest,
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Inspect a PDF: page statistics and conversion estimates (free)"""
+
+    start_time = time.time()
+    logger.info(
+        f"PDF inspection request: user={user.user_id}, team={user.team_id}, "
+        f"url={bool(request.url)}, base64={bool(request.pdf_base64)}"
+    )
+
+    pdf_bytes, error, error_code = await pdf_converter_service.load_pdf(
+        url=request.url,
+        pdf_base64=request.pdf_base64
+    )
+    inspection = None
+    if not error:
+        inspection, error, error_code = await pdf_converter_service.inspect(pdf_bytes, request.pages)
+
+    if error:
+        logger.warning(f"PDF inspection failed for team {user.team_id}: {error_code} - {error}")
+        return ModelJSONResponse(
+            status_code=400,
+            content=ConversionError(
+                success=False,
+                error=error,
+                code=error_code
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    pages = inspection.pages
+    return ModelJSONResponse(
+        content=PdfInspectResponse(
+            success=True,
+            page_count=inspection.page_count,
+            pages_inspected=len(pages),
+            encrypted=inspection.encrypted,
+            password_required=inspection.password_required,
+            pages=[InspectedPage(**vars(page)) for page in pages],
+            pages_with_text=sum(1 for page in pages if page.text_chars),
+            scanned_pages=sum(1 for page in pages if page.scanned),
+            pages_by_mode=dict(Counter(page.auto_mode for page in pages)),
+            estimated_seconds=inspection.estimated_seconds,
+            estimated_wait_seconds=admission_service.check().estimated_wait_seconds,
+            estimated_credits=0 if inspection.password_required else 1,
+            exec_time_ms=int((time.time() - start_time) * 1000),
+        ),
+        headers=rate_limit_headers(rate_limit),
+    )
+
+
+def _format_event(event: BaseModel, sse: bool) -> str:
+    """Serialize a streaming event as an SSE message or an NDJSON line"""
+    if sse:
+        return f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+    return event.model_dump_json() + "\n"
+
+
+@router.post(
+    "/pdf-to-markdown/stream",
+    operation_id="convertPdfToMarkdownStream",
+    dependencies=[Depends(schedule_as_team), Depends(check_admission)],
+    summary="Convert PDF to Markdown (streaming)",
+    description="""
+Convert a PDF document to Markdown and stream each page as soon as it is ready.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Input:** Same request body as `POST /v1/convert/pdf-to-markdown`.
+
+**Output format:**
+- Newline-delimited JSON (`application/x-ndjson`) by default
+- Server-Sent Events when the request has `Accept: text/event-stream`
+
+**Events (in order):**
+- `page`: one per converted page (see `pages` in the request body), in page order, with `page` (1-based), `markdown`, `elapsed_ms`, `cached` and `mode`
+- `summary`: after the last page, with `page_count`, `pages_converted`, `pages_from_cache`, `pages_by_mode`, `credits_used` and `remaining_credits`
+- `error`: replaces `summary` if conversion fails mid-stream (the credit is refunded)
+
+With `chunking`, `chunk` events replace `page` events: each chunk is sent as
+soon as the pages it spans are converted, with the fields of `chunks` in the
+non-streaming response and `elapsed_ms`. The summary then also has `chunks`
+(the number of chunks sent).
+
+Errors detected before the first page (bad URL, invalid PDF, insufficient credits)
+are returned as regular JSON error responses.
+
+**Credits:** 1 credit per conversion (refunded if the client disconnects
+before the conversion completes)
+
+**Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
+""",
+    responses={
+        200: {
+            "description": "Stream of page events followed by a summary event",
+            "content": {
+                "application/x-ndjson": {
+                    "example": (
+                        '{"type":"page","page":1,"markdown":"# Introduction\\n\\n...","elapsed_ms":840,'
+                        '"cached":false,"mode":"accurate"}\n'
+                        '{"type":"summary","success":true,"page_count":1,"pages_converted":1,"pages_from_cache":0,'
+                        '"pages_by_mode":{"accurate":1},"credits_used":1,"remaining_credits":149,"exec_time_ms":910}\n'
+                    )
+                },
+                "text/event-stream": {},
+            },
+        },
+        400: {
+            "description": "Invalid request (bad URL, invalid PDF, etc.)",
+            "model": ConversionError,
+        },
+        402: {
+            "description": "Insufficient credits",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "Conversion capacity saturated (code OVERLOADED), retry after the Retry-After delay (no credit used)",
+            "model": ConversionError,
+        },
+    },
+)
+async def convert_pdf_to_markdown_stream(
+    request: PdfToMarkdownStreamRequest,
+    accept: Optional[str] = Header(None, include_in_schema=False),
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Stream PDF to Markdown conversion page by page"""
+
+    start_time = time.time()
+    resource_id = str(uuid4())
+    sse = "text/event-stream" in (accept or "")
+
+    logger.info(
+        f"PDF streaming conversion request: user={user.user_id}, team={user.team_id}, "
+        f"url={bool(request.url)}, base64={bool(request.pdf_base64)}, sse={sse}"
+    )
+
+    # Deduct credit atomically before processing
+    deduction_result = await credit_service.deduct_credit_atomic(
+        team_id=user.team_id,
+        user_id=user.user_id,
+        amount=1,
+        resource_id=resource_id,
+        api_key_id=user.api_key_id,
+    )
+
+    if not deduction_result.get("success"):
+        error_msg = deduction_result.get("error", "Insufficient credits")
+        logger.warning(f"Credit deduction failed for team {user.team_id}: {error_msg}")
+
+        return ModelJSONResponse(
+            status_code=402,
+            content=ConversionError(
+                success=False,
+                error="Insufficient credits. Please purchase more credits.",
+                code="INSUFFICIENT_CREDITS"
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    remaining_credits = deduction_result.get("remaining_credits", 0)
+
+    async def refund() -> None:
+        # Shielded: must complete even if the request is being cancelled
+        await asyncio.shield(credit_service.refund_credit(
+            team_id=user.team_id,
+            user_id=user.user_id,
+            amount=1,
+            resource_id=resource_id,
+        ))
+
+    # Load and plan before streaming starts, so these errors get a proper status code
+    pdf_bytes, error, error_code = await pdf_converter_service.load_pdf(
+        url=request.url,
+        pdf_base64=request.pdf_base64
+    )
+    plan = None
+    if not error:
+        try:
+            plan = await pdf_converter_service.plan_stream(
+                pdf_bytes,
+                ConversionOptions(
+                    pages=request.pages,
+                    mode=request.mode,
+                    chunking=_chunking_options(request.chunking),
+                )
+            )
+        except Exception as e:
+            failure = pdf_converter_service.failure_result(e)
+            error, error_code = failure.error, failure.error_code
+
+    if error:
+        await refund()
+        logger.warning(f"PDF streaming conversion failed for team {user.team_id}: {error_code} - {error}")
+
+        return ModelJSONResponse(
+            status_code=400,
+            content=ConversionError(
+                success=False,
+                error=error,
+                code=error_code or "CONVERSION_FAILED"
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    def chunk_events(chunks, elapsed_ms: int):
+        for chunk in chunks:
+            yield _format_event(ChunkEvent(**chunk, elapsed_ms=elapsed_ms), sse)
+
+    async def events():
+        pages_from_cache = 0
+        pages_by_mode = Counter()
+        packer = ChunkPacker(plan.options.chunking) if plan.options.chunking else None
+        chunk_count = 0
+        elapsed_ms = 0
+        try:
+            async for page in pdf_converter_service.stream_pages(pdf_bytes, plan):
+                pages_from_cache += page.cached
+                pages_by_mode[page.mode] += 1
+                elapsed_ms = page.elapsed_ms
+                if packer:
+                    chunks = packer.add(page.segments)
+                    chunk_count += len(chunks)
+                    for event in chunk_events(chunks, page.elapsed_ms):
+                        yield event
+                    continue
+                yield _format_event(
+                    MarkdownPageEvent(
+                        page=page.page,
+                        markdown=page.markdown,
+                        elapsed_ms=page.elapsed_ms,
+                        cached=page.cached,
+                        mode=page.mode,
+                    ),
+                    sse,
+                )
+            if packer:
+                chunks = packer.finish()
+                chunk_count += len(chunks)
+                for event in chunk_events(chunks, elapsed_ms):
+                    yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client disconnected before the conversion completed
+            await refund()
+            logger.info(f"PDF streaming conversion cancelled by the client: team={user.team_id}")
+            raise
+        except Exception as e:
+            failure = pdf_converter_service.failure_result(e)
+            await refund()
+            logger.warning(
+                f"PDF streaming conversion failed for team {user.team_id}: "
+                f"{failure.error_code} - {failure.error}"
+            )
+            yield _format_event(
+                StreamErrorEvent(error=failure.error, code=failure.error_code),
+                sse,
+            )
+            return
+
+        exec_time_ms = int((time.time() - start_time) * 1000)
+        logger.info(
+            f"PDF streaming conversion successful: team={user.team_id}, "
+            f"pages={plan.pages_converted}/{plan.page_count}, exec_time={exec_time_ms}ms"
+        )
+        yield _format_event(
+            StreamSummaryEvent(
+                page_count=plan.page_count,
+                pages_converted=plan.pages_converted,
+                pages_from_cache=pages_from_cache,
+                pages_by_mode=dict(pages_by_mode),
+                chunks=chunk_count if packer else None,
+                credits_used=1,
+                remaining_credits=remaining_credits,
+                exec_time_ms=exec_time_ms,
+            ),
+            sse,
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={
+            **rate_limit_headers(rate_limit),
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# A batch item: (client reference, requested mode, conversion to run within a time limit)
+BatchJob = Tuple[Optional[str], str, Callable[[float], Awaitable[ConversionResult]]]
+
+BATCH_DESCRIPTION_COMMON = """
+**Output:**
+- JSON (default): one result per item, in request order
+- Newline-delimited JSON with `Accept: application/x-ndjson`, or Server-Sent
+  Events with `Accept: text/event-stream`: one `item` event per item as soon
+  as it completes (in completion order, `index` gives the request position),
+  then a `summary` event
+
+A failed item does not fail the batch: it gets `success: false` with `error`
+and `code`, and is not charged.
+
+**Credits:** 1 credit per converted item. Credits for the whole batch are
+reserved up front (402 if the balance does not cover every item), and those of
+failed items are refunded together once the batch completes.
+
+**Concurrency:** Items are converted a few at a time per batch; the batch
+counts as a single request for rate limiting.
+
+**Time limit:** Items not converted within the batch time limit fail with
+`CONVERSION_TIMEOUT` (and are refunded).
+
+**Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
+"""
+
+
+def _batch_timeout_result() -> ConversionResult:
+    return ConversionResult(
+        success=False,
+        error=f"Batch exceeded the {settings.BATCH_TIMEOUT_SECONDS}s time limit",
+        error_code="CONVERSION_TIMEOUT"
+    )
+
+
+async def _run_batch_jobs(jobs: List[BatchJob]) -> AsyncIterator[Tuple[int, ConversionResult]]:
+    """
+    Run batch items at most BATCH_CONCURRENCY at a time, yielding (index, result)
+    as they complete. Items still queued or converting when BATCH_TIMEOUT_SECONDS
+    runs out fail with CONVERSION_TIMEOUT.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    deadline = time.monotonic() + settings.BATCH_TIMEOUT_SECONDS
+
+    async def run(index: int, convert: Callable[[float], Awaitable[ConversionResult]]) -> Tuple[int, ConversionResult]:
+        async with semaphore:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return index, _batch_timeout_result()
+            timeout = min(settings.CONVERSION_TIMEOUT_SECONDS, remaining)
+            try:
+                # The conversion's own time limit stops its pool jobs, wait_for
+                # also covers fetching the PDF
+                return index, await asyncio.wait_for(convert(timeout), remaining)
+            except asyncio.TimeoutError:
+                return index, _batch_timeout_result()
+            except Exception as e:
+                logger.error(f"Unexpected error in batch item conversion: {e}")
+                return index, pdf_converter_service.failure_result(e)
+
+    tasks = [asyncio.ensure_future(run(index, convert)) for index, (_, _, convert) in enumerate(jobs)]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            yield await completed
+    finally:
+        # Client gone or error: stop the remaining items
+        for task in tasks:
+            task.cancel()
+
+
+def _batch_item_result(index: int, ref: Optional[str], mode: str, result: ConversionResult) -> BatchItemResult:
+    if not result.success:
+        return BatchItemResult(
+            index=index,
+            id=ref,
+            success=False,
+            mode=mode,
+            error=result.error or "Conversion failed",
+            code=result.error_code or "CONVERSION_FAILED",
+        )
+    return BatchItemResult(
+        index=index,
+        id=ref,
+        success=True,
+        markdown=result.markdown,
+        page_count=result.page_count,
+        pages_converted=result.pages_converted,
+        pages_from_cache=result.pages_from_cache,
+        mode=mode,
+        pages_by_mode=result.pages_by_mode,
+    )
+
+
+async def _convert_batch_with_credits(
+    user: AuthenticatedUser,
+    rate_limit: RateLimitInfo,
+    jobs: List[BatchJob],
+    accept: Optional[str],
+):
+    """
+    Reserve credits for every item in one deduction, run the items and
+    build the response (JSON, or streamed item by item). Credits of failed
+    (or, when the client goes away, unfinished) items are refunded in one call.
+    """
+    start_time = time.time()
+    resource_id = str(uuid4())
+    sse = "text/event-stream" in (accept or "")
+    stream = sse or "application/x-ndjson" in (accept or "")
+
+    deduction_result = await credit_service.deduct_credit_atomic(
+        team_id=user.team_id,
+        user_id=user.user_id,
+        amount=len(jobs),
+        resource_id=resource_id,
+        api_key_id=user.api_key_id,
+    )
+
+    if not deduction_result.get("success"):
+        error_msg = deduction_result.get("error", "Insufficient credits")
+        logger.warning(f"Batch credit deduction failed for team {user.team_id}: {error_msg}")
+
+        return ModelJSONResponse(
+            status_code=402,
+            content=ConversionError(
+                success=False,
+                error=f"Insufficient credits for a batch of {len(jobs)} conversions. Please purchase more credits.",
+                code="INSUFFICIENT_CREDITS"
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    remaining_credits = deduction_result.get("remaining_credits", 0)
+    succeeded = 0
+
+    async def item_results() -> AsyncIterator[BatchItemResult]:
+        nonlocal succeeded
+        async for index, result in _run_batch_jobs(jobs):
+            ref, mode, _ = jobs[index]
+            succeeded += result.success
+            if not result.success:
+                logger.warning(
+                    f"Batch item {index} failed for team {user.team_id}: "
+                    f"{result.error_code} - {result.error}"
+                )
+            yield _batch_item_result(index, ref, mode, result)
+
+    async def settle() -> int:
+        """Refund failed and unfinished items in one call, returning the refunded amount"""
+        refund_amount = len(jobs) - succeeded
+        if refund_amount:
+            # Shielded: must complete even if the request is being cancelled
+            await asyncio.shield(credit_service.refund_credit(
+                team_id=user.team_id,
+                user_id=user.user_id,
+                amount=refund_amount,
+                resource_id=resource_id,
+            ))
+        return refund_amount
+
+    def log_completion(exec_time_ms: int) -> None:
+        logger.info(
+            f"Batch conversion complete: team={user.team_id}, items={len(jobs)}, "
+            f"succeeded={succeeded}, exec_time={exec_time_ms}ms"
+        )
+
+    if not stream:
+        items: List[Optional[BatchItemResult]] = [None] * len(jobs)
+        try:
+            async for item in item_results():
+                items[item.index] = item
+        finally:
+            refunded = await settle()
+
+        exec_time_ms = int((time.time() - start_time) * 1000)
+        log_completion(exec_time_ms)
+        return ModelJSONResponse(
+            content=BatchConvertResponse(
+                success=succeeded == len(jobs),
+                items=items,
+                succeeded=succeeded,
+                failed=len(jobs) - succeeded,
+                credits_used=succeeded,
+                remaining_credits=remaining_credits + refunded,
+                exec_time_ms=exec_time_ms,
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    async def events():
+        try:
+            async for item in item_results():
+                yield _format_event(item, sse)
+        finally:
+            refunded = await settle()
+
+        exec_time_ms = int((time.time() - start_time) * 1000)
+        log_completion(exec_time_ms)
+        yield _format_event(
+            BatchSummaryEvent(
+                success=succeeded == len(jobs),
+                succeeded=succeeded,
+                failed=len(jobs) - succeeded,
+                credits_used=succeeded,
+                remaining_credits=remaining_credits + refunded,
+                exec_time_ms=exec_time_ms,
+            ),
+            sse,
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={
+            **rate_limit_headers(rate_limit),
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post(
+    "/batch",
+    operation_id="convertPdfBatchToMarkdown",
+    dependencies=[Depends(schedule_as_team), Depends(check_admission)],
+    response_model=BatchConvertResponse,
+    summary="Convert a batch of PDFs to Markdown",
+    description=f"""
+Convert up to {settings.BATCH_MAX_ITEMS} PDFs in one request.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Input:** `items`, each with exactly one of `url` or `pdf_base64` (as in
+`POST /v1/convert/pdf-to-markdown`), an optional `id` echoed in its result,
+and optional `pages` / `mode` overriding the batch-level `pages` / `mode`.
+""" + BATCH_DESCRIPTION_COMMON,
+    responses={
+        200: {
+            "description": "Batch processed (see each item for its outcome)",
+            "model": BatchConvertResponse,
+            "content": {"application/x-ndjson": {}, "text/event-stream": {}},
+        },
+        402: {
+            "description": "Insufficient credits for the whole batch",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        422: {"description": "Invalid request (no items, too many items, invalid item)"},
+        429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "Conversion capacity saturated (code OVERLOADED), retry after the Retry-After delay (no credit used)",
+            "model": ConversionError,
+        },
+    },
+)
+async def convert_pdf_batch_to_markdown(
+    request: BatchConvertRequest,
+    accept: Optional[str] = Header(None, include_in_schema=False),
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Convert a batch of PDFs (URLs or base64) with a single credit reservation"""
+
+    logger.info(
+        f"PDF batch conversion request: user={user.user_id}, team={user.team_id}, "
+        f"items={len(request.items)}"
+    )
+
+    def job(item) -> BatchJob:
+        mode = item.mode or request.mode
+        options = ConversionOptions(pages=item.pages or request.pages, mode=mode)
+        return item.id, mode, lambda timeout: pdf_converter_service.convert(
+            url=item.url,
+            pdf_base64=item.pdf_base64,
+            options=options,
+            timeout=timeout
+        )
+
+    return await _convert_batch_with_credits(user, rate_limit, [job(item) for item in request.items], accept)
+
+
+@router.post(
+    "/batch/upload",
+    operation_id="convertPdfBatchUploadToMarkdown",
+    dependencies=[Depends(schedule_as_team), Depends(check_admission)],
+    response_model=BatchConvertResponse,
+    summary="Convert a batch of uploaded PDFs to Markdown",
+    description=f"""
+Convert up to {settings.BATCH_MAX_ITEMS} PDFs sent as binary data in one request.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Request body:** `multipart/form-data` with one `files` part per PDF. Each
+item's `id` is its file name.
+
+**Options (query parameters):** `pages` and `mode`, applied to every file.
+
+**Limits:** 10MB per file (larger files fail individually with
+`FILE_TOO_LARGE`), {settings.BATCH_MAX_UPLOAD_MB}MB for the whole body.
+""" + BATCH_DESCRIPTION_COMMON,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "files": {"type": "array", "items": {"type": "string", "format": "binary"}}
+                        },
+                        "required": ["files"],
+                    }
+                },
+            },
+        }
+    },
+    responses={
+        200: {
+            "description": "Batch processed (see each item for its outcome)",
+            "model": BatchConvertResponse,
+            "content": {"application/x-ndjson": {}, "text/event-stream": {}},
+        },
+        400: {
+            "description": "Invalid request (no files, too many files, malformed body)",
+            "model": ConversionError,
+        },
+        402: {
+            "description": "Insufficient credits for the whole batch",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        413: {
+            "description": "Request body exceeds the maximum size",
+            "model": ConversionError,
+        },
+        415: {
+            "description": "Unsupported content type",
+            "model": ConversionError,
+        },
+        429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "Conversion capacity saturated (code OVERLOADED), retry after the Retry-After delay (no credit used)",
+            "model": ConversionError,
+        },
+    },
+)
+async def convert_pdf_batch_upload_to_markdown(
+    request: Request,
+    pages: Annotated[PageSelection, Query(description=PAGES_DESCRIPTION, examples=["1-3,10,20-"])] = None,
+    mode: Annotated[ConversionMode, Query(description=MODE_DESCRIPTION)] = "accurate",
+    accept: Optional[str] = Header(None, include_in_schema=False),
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Convert a batch of binary PDF uploads with a single credit reservation"""
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    logger.info(
+        f"PDF batch upload conversion request: user={user.user_id}, team={user.team_id}, "
+        f"content_type={content_type}"
+    )
+
+    # Read the uploads before deducting: a bad request costs nothing
+    if content_type == "multipart/form-data":
+        files, error, error_code = await read_multipart_pdfs(
+            request,
+            MAX_PDF_SIZE_BYTES,
+            settings.BATCH_MAX_UPLOAD_MB * 1024 * 1024,
+            settings.BATCH_MAX_ITEMS,
+        )
+    else:
+        files = None
+        error = "Content-Type must be multipart/form-data"
+        error_code = "UNSUPPORTED_MEDIA_TYPE"
+
+    if error:
+        logger.warning(f"PDF batch upload rejected for team {user.team_id}: {error_code} - {error}")
+        status_code = {"FILE_TOO_LARGE": 413, "UNSUPPORTED_MEDIA_TYPE": 415}.get(error_code, 400)
+        return ModelJSONResponse(
+            status_code=status_code,
+            content=ConversionError(
+                success=False,
+                error=error,
+                code=error_code
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    options = ConversionOptions(pages=pages, mode=mode)
+
+    def job(filename: Optional[str], pdf_bytes: Optional[bytes], error: Optional[str], error_code: Optional[str]) -> BatchJob:
+        async def convert(timeout: float) -> ConversionResult:
+            if error:
+                return ConversionResult(success=False, error=error, error_code=error_code)
+            return await pdf_converter_service.convert_bytes(pdf_bytes, options, timeout=timeout)
+        return filename, mode, convert
+
+    return await _convert_batch_with_credits(
+        user,
+        rate_limit,
+        [job(filename, *upload) for filename, upload in files],
+        accept,
+    )
+
+
+@router.post(
+    "/jobs",
+    operation_id="submitPdfConversionJob",
+    status_code=202,
+    response_model=ConversionJobSubmitResponse,
+    summary="Submit an asynchronous PDF to Markdown conversion",
+    description=f"""
+Queue a conversion and return a job id immediately, for documents too large
+to convert within a client or load balancer timeout.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token
+
+**Input:** Same request body as `POST /v1/convert/pdf-to-markdown`, plus
+optional `webhook_url` and `webhook_secret`.
+
+**Output:** `202 Accepted` with `job_id` and `status_url` (also in the
+`Location` header). Poll `GET /v1/convert/jobs/{{job_id}}` for status,
+progress and result, or pass a `webhook_url`.
+
+**Webhooks:** When the job finishes, `webhook_url` receives a POST with
+`event` (`conversion_job.succeeded` or `conversion_job.failed`), `job` (the
+job status, with the markdown unless larger than
+{settings.WEBHOOK_MAX_RESULT_BYTES // 1024}KB, see `result_included`) and
+`status_url`. Requests carry:
+- `X-DocuProcess-Signature: t=<unix time>,v1=<hex HMAC-SHA256 of "<t>.<raw body>"
+  keyed with webhook_secret>`
+- `X-DocuProcess-Delivery`: the job id, identical across retries
+
+Any non-2xx answer (or no answer within {settings.WEBHOOK_TIMEOUT_SECONDS}s) is
+retried with exponential backoff, {settings.WEBHOOK_MAX_ATTEMPTS} attempts in total;
+then `webhook_status` on the job becomes `failed`. Redirects are not followed.
+
+**Limits:** The conversion may take up to {settings.ASYNC_PDF_TIMEOUT_SECONDS}s.
+
+**Credits:** 1 credit per job, reserved on submission and refunded if the
+job fails
+
+**Rate Limits:** 60 requests/min (free), 120 requests/min (paid)
+""",
+    responses={
+        202: {"description": "Job queued", "model": ConversionJobSubmitResponse},
+        400: {
+            "description": "Invalid request (invalid PDF data, blocked webhook URL, etc.)",
+            "model": ConversionError,
+        },
+        402: {
+            "description": "Insufficient credits",
+            "model": ConversionError,
+        },
+        403: {"description": "Invalid or missing API key"},
+        429: {"description": "Rate limit exceeded"},
+        503: {
+            "description": "The job could not be queued (the credit is refunded)",
+            "model": ConversionError,
+        },
+    },
+)
+async def submit_pdf_conversion_job(
+    request: ConversionJobRequest,
+    user: AuthenticatedUser = Depends(require_team_context),
+    rate_limit: RateLimitInfo = Depends(check_rate_limit),
+):
+    """Queue a PDF to Markdown conversion and return its job id"""
+
+    job_id = str(uuid4())
+    webhook_secret = None
+    if request.webhook_url:
+        webhook_secret = request.webhook_secret or secrets.token_urlsafe(32)
+
+    logger.info(
+        f"PDF conversion job request: user={user.user_id}, team={user.team_id}, "
+        f"url={bool(request.url)}, base64={bool(request.pdf_base64)}, webhook={bool(request.webhook_url)}"
+    )
+
+    # Check before deducting: invalid data costs nothing (URLs are fetched by the job)
+    pdf_bytes = None
+    error = None
+    if request.pdf_base64:
+        pdf_bytes, error, error_code = pdf_converter_service.decode_base64_pdf(request.pdf_base64)
+    if not error and request.webhook_url:
+        # Checked again on every delivery attempt
+        address, error, error_code = await pdf_converter_service.validate_url(request.webhook_url)
+        if address is None:
+            error = f"Webhook URL rejected: {error}"
+    if error:
+        return ModelJSONResponse(
+            status_code=400,
+            content=ConversionError(
+                success=False,
+                error=error,
+                code=error_code
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    # Deduct credit atomically before queueing
+    deduction_result = await credit_service.deduct_credit_atomic(
+        team_id=user.team_id,
+        user_id=user.user_id,
+        amount=1,
+        resource_id=job_id,
+        api_key_id=user.api_key_id,
+    )
+
+    if not deduction_result.get("success"):
+        error_msg = deduction_result.get("error", "Insufficient credits")
+        logger.warning(f"Credit deduction failed for team {user.team_id}: {error_msg}")
+
+        return ModelJSONResponse(
+            status_code=402,
+            content=ConversionError(
+                success=False,
+                error="Insufficient credits. Please purchase more credits.",
+                code="INSUFFICIENT_CREDITS"
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    try:
+        job = await job_service.submit(
+            team_id=user.team_id,
+            user_id=user.user_id,
+            options=ConversionOptions(pages=request.pages, mode=request.mode),
+            url=request.url,
+            pdf_bytes=pdf_bytes,
+            job_id=job_id,
+            is_paid=user.is_paid,
+            webhook_url=request.webhook_url,
+            webhook_secret=webhook_secret,
+        )
+    except Exception:
+        await credit_service.refund_credit(
+            team_id=user.team_id,
+            user_id=user.user_id,
+            amount=1,
+            resource_id=job_id,
+        )
+        return ModelJSONResponse(
+            status_code=503,
+            content=ConversionError(
+                success=False,
+                error="The conversion job could not be queued. Please retry.",
+                code="JOB_ENQUEUE_FAILED"
+            ),
+            headers=rate_limit_headers(rate_limit),
+        )
+
+    status_url = f"/v1/convert/jobs/{job.id}"
+    return ModelJSONResponse(
+        status_code=202,
+        content=ConversionJobSubmitResponse(
+            job_id=job.id,
+            status=job.status,
+            status_url=status_url,
+            webhook_secret=webhook_secret,
+            credits_used=1,
+            remaining_credits=deduction_result.get("remaining_credits", 0),
+        ),
+        headers={
+            **rate_limit_headers(rate_limit),
+            "Location": status_url,
+        },
+    )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    operation_id="getPdfConversionJob",
+    response_model=ConversionJobStatus,
+    summary="Get an asynchronous conversion job",
+    description="""
+Status, progress and, once `succeeded`, the result of a conversion job
+submitted with `POST /v1/convert/jobs`.
+
+**Authentication:** API Key required (`x-api-key` header) or JWT token. Only
+jobs of the caller's team are visible.
+
+**Statuses:** `queued`, `running` (`pages_done` / `pages_total` and `progress`
+advance as pages complete), `succeeded` (`result` is set) or `failed`
+(`error` and `code` are set, the credit has been refunded). `webhook_status`
+reports the webhook delivery of jobs submitted with a `webhook_url`.
+
+**Credits:** Free
+""",
+    responses={
+        200: {"description": "Job status", "model": ConversionJobStatus},
+        403: {"description": "Invalid or missing API key"},
+        404: {"description": "Job not found", "model": ConversionError},
+    },
+)
+async def get_pdf_conversion_job(
+    job_id: str,
+    user: AuthenticatedUser = Depends(require_team_context),
+):
+    """Get the status (and result) of a conversion job"""
+    job = await job_service.get(job_id)
+    if job is None or job.team_id != user.team_id:
+        return ModelJSONResponse(
+            status_code=404,
+            content=ConversionError(
+                success=False,
+                error="Conversion job not found",
+                code="JOB_NOT_FOUND"
+            ),
+        )
+    return ModelJSONResponse(content=ConversionJobStatus(**job.public_fields()))
+
+
+def _require_internal_key(x_internal_api_key: Optional[str]) -> None:
+    if not settings.INTERNAL_API_KEY or not hmac.compare_digest(
+        x_internal_api_key or "", settings.INTERNAL_API_KEY
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.post("/jobs/{job_id}/run", include_in_schema=False)
+async def run_pdf_conversion_job(
+    job_id: str,
+    x_internal_api_key: Optional[str] = Header(None),
+):
+    """Run a queued conversion job (called by Cloud Tasks, internal API key required)"""
+    _require_internal_key(x_internal_api_key)
+
+    # Failures are recorded on the job: answer 200 so the task is not retried
+    await job_service.run(job_id)
+    return {"success": True}
+
+
+@router.post("/jobs/{job_id}/webhook", include_in_schema=False)
+async def deliver_pdf_conversion_job_webhook(
+    job_id: str,
+    attempt: int = Query(1, ge=1),
+    x_internal_api_key: Optional[str] = Header(None),
+):
+    """Attempt a job's webhook delivery (called by Cloud Tasks, internal API key required)"""
+    _require_internal_key(x_internal_api_key)
+
+    # Retries are queued by the service itself, with backoff
+    await job_service.deliver_webhook(job_id, attempt)
+    return {"success": True}
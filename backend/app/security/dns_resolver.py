@@ -0,0 +1,143 @@
+"""
+Non-blocking, cached DNS resolution for outbound fetches (SSRF protection).
+
+- Lookups run through the event loop's getaddrinfo (in a thread), so a slow
+  resolver never blocks request handling
+- Every A and AAAA record is checked: one private address is enough to block
+  the hostname
+- Results are cached for DNS_CACHE_TTL_SECONDS (getaddrinfo does not expose
+  record TTLs, so the cache TTL is kept short) and concurrent lookups of the
+  same hostname share one query
+
+Callers connect to the vetted address itself (the hostname only goes in the
+Host header and TLS SNI), so the hostname is never resolved a second time and
+cannot be rebound to an internal address between the check and the connection.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+# Hostnames cached at most (least recently used dropped first)
+MAX_CACHED_HOSTNAMES = 1024
+
+
+class DnsResolutionError(Exception):
+    """Raised when a hostname cannot be resolved"""
+    pass
+
+
+def is_blocked_ip(ip: IPAddress) -> bool:
+    """Check if an address is private, loopback, link-local, reserved or otherwise internal"""
+    # IPv6-mapped IPv4 addresses (e.g., ::ffff:127.0.0.1) would bypass IPv4 checks
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return (
+        ip.is_private or
+        ip.is_loopback or
+        ip.is_link_local or
+        ip.is_reserved or
+        ip.is_multicast or
+        ip.is_unspecified
+    )
+
+
+class CachingResolver:
+    """Async hostname resolver with a TTL cache"""
+
+    def __init__(self, ttl: float = None, negative_ttl: float = None):
+        self.ttl = ttl if ttl is not None else settings.DNS_CACHE_TTL_SECONDS
+        self.negative_ttl = negative_ttl if negative_ttl is not None else settings.DNS_NEGATIVE_CACHE_TTL_SECONDS
+        # hostname -> (expires_at, addresses or the resolution error)
+        self._cache: "OrderedDict[str, Tuple[float, Union[List[IPAddress], DnsResolutionError]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def resolve(self, hostname: str) -> List[IPAddress]:
+        """
+        Resolve a hostname to all of its IPv4 and IPv6 addresses.
+
+        Raises:
+            DnsResolutionError: If the hostname does not resolve
+        """
+        hostname = hostname.lower().rstrip(".")
+
+        # Literal IP: nothing to resolve
+        try:
+            return [ipaddress.ip_address(hostname.strip("[]"))]
+        except ValueError:
+            pass
+
+        cached = self._cache.get(hostname)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(hostname)
+            result = cached[1]
+            if isinstance(result, DnsResolutionError):
+                raise result
+            return result
+
+        inflight = self._inflight.get(hostname)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._lookup(hostname))
+            self._inflight[hostname] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(hostname, None))
+        # shield: one caller going away must not cancel the others' lookup
+        return await asyncio.shield(inflight)
+
+    async def _lookup(self, hostname: str) -> List[IPAddress]:
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(hostname, 443, type=socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(
+                ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos
+            ))
+            if not addresses:
+                raise DnsResolutionError(f"No addresses for {hostname}")
+        except (socket.gaierror, UnicodeError, ValueError, DnsResolutionError) as e:
+            error = e if isinstance(e, DnsResolutionError) else DnsResolutionError(f"Cannot resolve {hostname}: {e}")
+            self._store(hostname, error, self.negative_ttl)
+            raise error from None
+
+        self._store(hostname, addresses, self.ttl)
+        return addresses
+
+    def _store(self, hostname: str, result, ttl: float) -> None:
+        self._cache[hostname] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(hostname)
+        while len(self._cache) > MAX_CACHED_HOSTNAMES:
+            self._cache.popitem(last=False)
+
+
+# Singleton instance
+dns_resolver = CachingResolver()
+
+
+async def resolve_public_address(hostname: str) -> Optional[IPAddress]:
+    """
+    Resolve a hostname and vet every address it resolves to.
+
+    Blocks (if any A or AAAA record is):
+    - Private IP ranges (10.x, 172.16-31.x, 192.168.x, fc00::/7)
+    - Loopback addresses (127.x, ::1)
+    - Link-local addresses (169.254.x, fe80::/10)
+    - Reserved, multicast and unspecified addresses
+
+    Returns:
+        The address to connect to (IPv4 preferred), or None if blocked or
+        unresolvable
+    """
+    try:
+        addresses = await dns_resolver.resolve(hostname)
+    except DnsResolutionError:
+        # If we can't resolve, block it
+        return None
+
+    if any(is_blocked_ip(ip) for ip in addresses):
+        return None
+    return min(addresses, key=lambda ip: ip.version)
@@ -0,0 +1,76 @@
+"""Admission control: shed new conversions while the worker pool is overloaded"""
+
+import math
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.services.conversion_pool import conversion_pool
+
+# Bounds of the Retry-After suggested to rejected clients
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 120
+
+
+@dataclass
+class AdmissionInfo:
+    """Load of the conversion pool, and whether new conversions are admitted"""
+    workers: int
+    running_jobs: int
+    queued_jobs: int
+    running_pages: int  # in flight on the workers
+    queued_pages: int
+    average_page_seconds: float
+    backlog_seconds: float  # all queued pages, all workers
+    estimated_wait_seconds: float  # for a new job of the team
+    allowed: bool
+    retry_after: int  # seconds, meaningful when not allowed
+
+
+class AdmissionService:
+    """
+    Admission control for synchronous conversions.
+
+    A conversion accepted while the pool is saturated waits behind queued
+    jobs and is likely to time out after its credit was deducted. Instead,
+    new conversions are rejected up front while the team's estimated wait for
+    a worker (its queued pages x average time per page / its fair share of
+    the workers) exceeds ADMISSION_MAX_WAIT_SECONDS, or too many jobs are
+    queued overall. A team bursting on a busy pool is shed first; other teams keep
+    their share.
+
+    Note: Load is per instance (each Cloud Run instance has its own pool).
+    """
+
+    def check(self) -> AdmissionInfo:
+        """
+        Snapshot the pool load and decide on admission for the current team
+        (set_conversion_team). Records nothing.
+
+        Returns:
+            AdmissionInfo with the current load
+        """
+        queued = conversion_pool.queued
+        wait = conversion_pool.estimated_wait_seconds()
+
+        allowed = True
+        if settings.ADMISSION_MAX_WAIT_SECONDS and wait > settings.ADMISSION_MAX_WAIT_SECONDS:
+            allowed = False
+        if settings.ADMISSION_MAX_QUEUED_JOBS and queued >= settings.ADMISSION_MAX_QUEUED_JOBS:
+            allowed = False
+
+        return AdmissionInfo(
+            workers=conversion_pool.size,
+            running_jobs=conversion_pool.running,
+            queued_jobs=queued,
+            running_pages=conversion_pool.running_pages,
+            queued_pages=conversion_pool.queued_pages,
+            average_page_seconds=round(conversion_pool.average_page_seconds, 3),
+            backlog_seconds=round(conversion_pool.backlog_seconds, 3),
+            estimated_wait_seconds=round(wait, 3),
+            allowed=allowed,
+            retry_after=min(max(math.ceil(wait), MIN_RETRY_AFTER_SECONDS), MAX_RETRY_AFTER_SECONDS),
+        )
+
+
+# Singleton instance
+admission_service = AdmissionService()
@@ -0,0 +1,609 @@
+"""Process pool for CPU-bound PDF conversions
+
+pymupdf4llm is synchronous and CPU-bound: running it inside a request handler
+blocks the event loop for every other request on the uvicorn worker. The pool
+keeps a fixed number of worker processes; handlers only await the result.
+
+Workers are shared by all teams. Jobs wait in one queue per team and idle
+workers go to the team with the smallest weighted share of work so far
+(stride scheduling), so a team converting thousands of pages does not hold
+up another team's one-page document. The team of a job is taken from the
+context of the caller (set_conversion_team).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Spawn (not fork) so workers never inherit the event loop, sockets or
+# threads of the API process
+_mp_context = multiprocessing.get_context("spawn")
+
+# Sent by a worker once its initializer has run
+_READY = "ready"
+
+# How often a running job's worker memory is checked
+_MEMORY_POLL_SECONDS = 0.1
+
+# Workers whose memory stays above this share of the limit after a job are
+# recycled (native heap fragmentation in MuPDF is never returned to the OS)
+_RECYCLE_MEMORY_RATIO = 0.75
+
+# Average conversion time per page (estimated wait): weight of the latest
+# job, and the value used until the first job finishes
+_DURATION_EWMA_ALPHA = 0.2
+_INITIAL_PAGE_SECONDS = 0.5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class ConversionTeam(NamedTuple):
+    """Team on whose behalf pool jobs run, and its share of a busy pool"""
+    team_id: Optional[str]
+    weight: int
+
+
+# Jobs run outside of any team context share one queue
+_NO_TEAM = ConversionTeam(None, 1)
+
+_current_team: ContextVar[ConversionTeam] = ContextVar("conversion_team", default=_NO_TEAM)
+
+
+def set_conversion_team(team_id: Optional[str], is_paid: bool) -> None:
+    """
+    Schedule the pool jobs of the current context (request or task, and the
+    tasks it creates from now on) as jobs of a team.
+
+    Args:
+        team_id: Team charged for the conversion
+        is_paid: Paid teams get a larger share of a busy pool
+    """
+    weight = settings.CONVERSION_WEIGHT_PAID if is_paid else settings.CONVERSION_WEIGHT_FREE
+    _current_team.set(ConversionTeam(team_id, max(1, weight)))
+
+
+def conversion_team() -> ConversionTeam:
+    """Team of the current context (see set_conversion_team)"""
+    return _current_team.get()
+
+
+@dataclass
+class _TeamQueue:
+    """Jobs of one team waiting for a worker"""
+    weight: int
+    # Virtual time of the team's next job: advances by 1/weight per job started
+    stride_pass: float
+    # Waiting jobs and their page counts
+    waiters: Deque[Tuple[asyncio.Future, int]] = field(default_factory=deque)
+    queued_pages: int = 0
+    running: int = 0
+    running_pages: int = 0
+
+
+class ConversionPoolError(Exception):
+    """Base class for job failures caused by the pool rather than by the job"""
+    pass
+
+
+class ConversionTimeoutError(ConversionPoolError):
+    """Raised when a job exceeds its time limit (its worker is killed)"""
+    pass
+
+
+class ConversionMemoryError(ConversionPoolError):
+    """Raised when a worker exceeds its memory limit (the worker is killed)"""
+    pass
+
+
+class WorkerCrashedError(ConversionPoolError):
+    """Raised when a worker process dies while running a job"""
+    pass
+
+
+def _worker_main(conn, initializer: Optional[Callable[[], None]]) -> None:
+    """Worker process loop: run jobs received on the pipe until told to stop"""
+    # Shutdown is driven by the parent; don't die on the terminal's Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if initializer is not None:
+        try:
+            initializer()
+        except Exception as e:
+            # A failed warm-up only costs latency: the worker can still serve
+            logger.error(f"Conversion worker initializer failed: {e}")
+    conn.send(_READY)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        fn, args = job
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                # Exception itself is not picklable
+                conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+    conn.close()
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe"""
+
+    def __init__(self, initializer: Optional[Callable[[], None]] = None):
+        self.conn, child_conn = _mp_context.Pipe()
+        self.process = _mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, initializer),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+        self.ready = False
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory of the worker process (None where /proc is unavailable)"""
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def wait_ready(self) -> None:
+        """Block until the worker has run its initializer (runs in a thread)"""
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def run_job(self, fn: Callable, args: tuple) -> tuple[bool, Any]:
+        """Send a job and block until its result arrives (runs in a thread)"""
+        self.wait_ready()
+        self.conn.send((fn, args))
+        return self.conn.recv()
+
+    def stop(self) -> None:
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        """Kill the worker immediately"""
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ConversionPool:
+    """
+    Fixed-size pool of conversion worker processes.
+
+    - Jobs wait for an idle worker, so at most `size` conversions run at once
+    - A job that exceeds its timeout has its worker killed and replaced
+    - A job whose worker grows beyond `max_rss_bytes` has its worker killed
+      and replaced (Linux only: memory is read from /proc)
+    - Workers are recycled after `max_jobs_per_worker` jobs, or when they stay
+      close to the memory limit, to contain native memory growth in MuPDF
+    - Every worker runs the `initializer` passed to start() (warm-up) before
+      its first job; the pool is `ready` once all initial workers are warm
+      (workers that fail to warm up are replaced first)
+    - Waiting jobs are served fairly across teams, in proportion to their
+      weight, and one team runs at most `max_jobs_per_team` jobs at once
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_jobs_per_worker: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        max_jobs_per_team: Optional[int] = None,
+    ):
+        self.size = size or settings.CONVERSION_WORKERS or os.cpu_count() or 1
+        self.timeout = timeout or settings.CONVERSION_TIMEOUT_SECONDS
+        self.max_jobs_per_worker = max_jobs_per_worker or settings.CONVERSION_MAX_JOBS_PER_WORKER
+        max_rss_mb = max_rss_mb if max_rss_mb is not None else settings.CONVERSION_MAX_RSS_MB
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024  # 0 = no memory limit
+        # By default one worker stays free for other teams during a burst
+        self.max_jobs_per_team = (
+            max_jobs_per_team or settings.CONVERSION_MAX_JOBS_PER_TEAM or max(1, self.size - 1)
+        )
+
+        self._workers: Set[_Worker] = set()
+        self._idle: Deque[_Worker] = deque()
+        # Teams with waiting or running jobs
+        self._queues: Dict[Optional[str], _TeamQueue] = {}
+        self._virtual_time = 0.0
+        self._page_seconds = _INITIAL_PAGE_SECONDS
+        # Threads that block on worker pipes, one per worker
+        self._io: Optional[ThreadPoolExecutor] = None
+        self._initializer: Optional[Callable[[], None]] = None
+        self._ready = False
+        # Warms up the replacements of workers whose warm-up failed
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._io is not None
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial workers have finished warming up"""
+        return self.started and self._ready
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a worker, all teams"""
+        return sum(len(queue.waiters) for queue in self._queues.values())
+
+    @property
+    def running(self) -> int:
+        """Jobs holding a worker, all teams"""
+        return sum(queue.running for queue in self._queues.values())
+
+    @property
+    def queued_pages(self) -> int:
+        """Pages of the jobs waiting for a worker, all teams"""
+        return sum(queue.queued_pages for queue in self._queues.values())
+
+    @property
+    def running_pages(self) -> int:
+        """Pages of the jobs holding a worker, all teams"""
+        return sum(queue.running_pages for queue in self._queues.values())
+
+    @property
+    def average_page_seconds(self) -> float:
+        """Exponentially weighted average conversion time per page of recent jobs"""
+        return self._page_seconds
+
+    @property
+    def backlog_seconds(self) -> float:
+        """Estimated time for all workers to work through the queued pages"""
+        return self.queued_pages * self._page_seconds / self.size
+
+    def estimated_wait_seconds(self, team: Optional[ConversionTeam] = None) -> float:
+        """
+        Estimated time before a new job of a team gets a worker.
+
+        The job waits for a worker to free up, then behind the team's own
+        queued pages, which get the team's fair share of the workers (its
+        weight against the weights of the other teams with queued jobs, at
+        most `max_jobs_per_team`). With k jobs running, the first one ends
+        on average after 1/(k+1) of a job.
+
+        Args:
+            team: Team of the job (default: the caller's team)
+        """
+        team = team or _current_team.get()
+        queue = self._queues.get(team.team_id) or _TeamQueue(team.weight, self._virtual_time)
+        if self._idle and not queue.waiters and queue.running < self.max_jobs_per_team:
+            return 0.0
+
+        # Jobs one of which must end before the new job gets a worker
+        if queue.running >= self.max_jobs_per_team:
+            jobs, pages = queue.running, queue.running_pages
+        else:
+            jobs, pages = self.running, self.running_pages
+        first_free = pages / jobs * self._page_seconds / (jobs + 1) if jobs else 0.0
+
+        weights = team.weight + sum(
+            other.weight for team_id, other in self._queues.items()
+            if other.waiters and team_id != team.team_id
+        )
+        workers = min(self.max_jobs_per_team, self.size * team.weight / weights)
+        return first_free + queue.queued_pages * self._page_seconds / workers
+
+    async def start(self, initializer: Optional[Callable[[], None]] = None) -> None:
+        """
+        Spawn the worker processes and wait for them to warm up (idempotent).
+
+        Workers that fail to warm up within `timeout` are replaced in the
+        background: the pool is not `ready` until the replacements are warm,
+        and serves with the warm workers meanwhile.
+
+        Args:
+            initializer: Module-level function run once in every worker
+                process (including replacements) before its first job
+        """
+        if self.started:
+            return
+        self._io = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="conversion-pool")
+        self._initializer = initializer
+
+        started = time.monotonic()
+        stuck = await self._warm_up(self.size)
+        if stuck:
+            self._warm_up_task = asyncio.ensure_future(self._warm_up_replacements(stuck))
+            return
+        self._ready = True
+        logger.info(
+            f"Conversion pool started with {self.size} worker(s), "
+            f"warm-up took {time.monotonic() - started:.2f}s"
+        )
+
+    async def _warm_up(self, count: int) -> int:
+        """
+        Spawn workers and hand them to the pool once warm.
+
+        Args:
+            count: Number of workers to spawn
+
+        Returns:
+            Number of workers that did not warm up within `timeout` (killed)
+        """
+        workers = [self._spawn() for _ in range(count)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(loop.run_in_executor(self._io, w.wait_ready), timeout=self.timeout)
+                for w in workers
+            ),
+            return_exceptions=True,
+        )
+        stuck = 0
+        for worker, result in zip(workers, results):
+            if worker.ready:
+                self._release(worker)
+                continue
+            logger.error(f"Conversion worker warm-up did not complete: {result!r}")
+            # Killing the worker also unblocks the thread still reading its pipe
+            self._workers.discard(worker)
+            worker.kill()
+            stuck += 1
+        return stuck
+
+    async def _warm_up_replacements(self, count: int) -> None:
+        """Replace the workers whose warm-up failed until all are warm, then mark the pool ready"""
+        while count:
+            count = await self._warm_up(count)
+        self._ready = True
+        logger.info(f"Conversion pool ready with {self.size} worker(s) after replacing workers")
+
+    async def stop(self) -> None:
+        """Stop all workers and release the pool's threads"""
+        if not self.started:
+            return
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            self._warm_up_task = None
+        workers = list(self._workers)
+        self._workers.clear()
+        self._idle.clear()
+        self._ready = False
+
+        # Workers still warming up do not read their pipe: kill them
+        for worker in workers:
+            if not worker.ready:
+                worker.kill()
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._io, w.stop) for w in workers if w.ready))
+        self._io.shutdown(wait=False)
+        self._io = None
+        logger.info("Conversion pool stopped")
+
+    async def run(
+        self,
+        fn: Callable,
+        *args: Any,
+        pages: int = 1,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Run `fn(*args)` in a worker process and return its result.
+
+        `fn` must be a module-level function; it and its arguments are pickled
+        to the worker.
+
+        Args:
+            fn: Module-level function to run
+            *args: Arguments of `fn`
+            pages: Number of pages the job converts (load and wait estimates)
+            timeout: Time limit of the job in seconds (default: pool timeout)
+            deadline: Event loop time by which the job must be done, shared by
+                the jobs of one conversion (time spent waiting for a worker counts)
+
+        The job is queued as a job of the caller's team (set_conversion_team).
+
+        Raises:
+            ConversionTimeoutError: The job exceeded its timeout or deadline
+            ConversionMemoryError: The worker exceeded the memory limit
+            WorkerCrashedError: The worker died while running the job
+        """
+        if not self.started:
+            await self.start()
+
+        team = _current_team.get()
+        pages = max(1, pages)
+        worker = await self._acquire(team, pages)
+        started = time.monotonic()
+        try:
+            return await self._run_on(worker, fn, args, timeout, deadline)
+        finally:
+            page_seconds = (time.monotonic() - started) / pages
+            self._page_seconds += _DURATION_EWMA_ALPHA * (page_seconds - self._page_seconds)
+            self._job_done(team, pages)
+
+    async def _run_on(
+        self,
+        worker: _Worker,
+        fn: Callable,
+        args: tuple,
+        timeout: Optional[float],
+        deadline: Optional[float],
+    ) -> Any:
+        """Run a job on an acquired worker, then release or replace the worker"""
+        loop = asyncio.get_running_loop()
+        job_timeout = timeout or self.timeout
+        if deadline is not None:
+            job_timeout = min(job_timeout, deadline - loop.time())
+            if job_timeout <= 0:
+                self._release(worker)
+                raise ConversionTimeoutError("Conversion deadline passed before the job started")
+
+        job = loop.run_in_executor(self._io, worker.run_job, fn, args)
+        try:
+            ok, value = await self._watch(worker, job, loop.time() + job_timeout)
+        except ConversionPoolError as e:
+            logger.warning(f"{e}, killing worker {worker.process.pid}")
+            job.cancel()
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            logger.error(f"Conversion worker {worker.process.pid} died: {e}")
+            self._replace(worker)
+            raise WorkerCrashedError("Conversion worker terminated unexpectedly") from None
+        except asyncio.CancelledError:
+            # Caller went away; the worker is still busy with the job
+            job.cancel()
+            self._replace(worker)
+            raise
+
+        worker.jobs_done += 1
+        rss = worker.rss_bytes() if self.max_rss_bytes else None
+        if worker.jobs_done >= self.max_jobs_per_worker:
+            logger.info(f"Recycling conversion worker {worker.process.pid} after {worker.jobs_done} jobs")
+            self._replace(worker, graceful=True)
+        elif rss is not None and rss > self.max_rss_bytes * _RECYCLE_MEMORY_RATIO:
+            logger.info(f"Recycling conversion worker {worker.process.pid} at {rss // (1024 * 1024)} MB")
+            self._replace(worker, graceful=True)
+        else:
+            self._release(worker)
+
+        if not ok:
+            raise value
+        return value
+
+    async def _watch(self, worker: _Worker, job: asyncio.Future, deadline: float) -> tuple[bool, Any]:
+        """Wait for a job, enforcing its deadline and the worker memory limit"""
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise ConversionTimeoutError("Conversion job exceeded its time limit")
+
+            poll = min(remaining, _MEMORY_POLL_SECONDS) if self.max_rss_bytes else remaining
+            done, _ = await asyncio.wait({job}, timeout=poll)
+            if done:
+                return job.result()
+
+            rss = worker.rss_bytes() if self.max_rss_bytes else None
+            if rss is not None and rss > self.max_rss_bytes:
+                raise ConversionMemoryError(
+                    f"Conversion job exceeded the memory limit ({rss // (1024 * 1024)} MB)"
+                )
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._initializer)
+        self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker, graceful: bool = False) -> None:
+        """Discard a worker and put a fresh one in its place"""
+        self._workers.discard(worker)
+        if not self.started:
+            worker.kill()
+            return
+        if graceful:
+            self._io.submit(worker.stop)
+        else:
+            worker.kill()
+        self._release(self._spawn())
+
+    async def _acquire(self, team: ConversionTeam, pages: int = 1) -> _Worker:
+        """Queue a job of a team (converting `pages` pages) and wait until it is handed a worker"""
+        queue = self._queues.get(team.team_id)
+        if queue is None:
+            queue = self._queues[team.team_id] = _TeamQueue(team.weight, self._virtual_time)
+        elif not queue.waiters:
+            # No credit for time spent without waiting jobs
+            queue.stride_pass = max(queue.stride_pass, self._virtual_time)
+        queue.weight = team.weight
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.waiters.append((waiter, pages))
+        queue.queued_pages += pages
+        self._dispatch()
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a worker but cancelled before taking it: pass it on
+                self._release(waiter.result())
+                self._job_done(team, pages)
+            else:
+                # _dispatch drops cancelled waiters it comes across
+                if (waiter, pages) in queue.waiters:
+                    queue.waiters.remove((waiter, pages))
+                    queue.queued_pages -= pages
+                self._forget_if_idle(team.team_id)
+            raise
+
+    def _release(self, worker: _Worker) -> None:
+        self._idle.append(worker)
+        self._dispatch()
+
+    def _job_done(self, team: ConversionTeam, pages: int = 1) -> None:
+        queue = self._queues.get(team.team_id)
+        if queue is not None:
+            queue.running -= 1
+            queue.running_pages -= pages
+            self._forget_if_idle(team.team_id)
+        self._dispatch()
+
+    def _forget_if_idle(self, team_id: Optional[str]) -> None:
+        queue = self._queues.get(team_id)
+        if queue is not None and not queue.waiters and queue.running <= 0:
+            del self._queues[team_id]
+
+    def _dispatch(self) -> None:
+        """Hand idle workers to the waiting teams furthest behind their share"""
+        while self._idle:
+            chosen = None
+            for queue in self._queues.values():
+                # Skip jobs cancelled while waiting (their _acquire has yet to run)
+                while queue.waiters and queue.waiters[0][0].done():
+                    _, pages = queue.waiters.popleft()
+                    queue.queued_pages -= pages
+                if queue.waiters and queue.running < self.max_jobs_per_team:
+                    if chosen is None or queue.stride_pass < chosen.stride_pass:
+                        chosen = queue
+            if chosen is None:
+                return
+
+            waiter, pages = chosen.waiters.popleft()
+            chosen.queued_pages -= pages
+            chosen.running += 1
+            chosen.running_pages += pages
+            self._virtual_time = chosen.stride_pass
+            chosen.stride_pass += 1 / chosen.weight
+            waiter.set_result(self._idle.popleft())
+
+
+# Singleton instance
+conversion_pool = ConversionPool()
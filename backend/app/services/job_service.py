@@ -0,0 +1,589 @@
+"""Asynchronous conversion jobs (submit, poll, fetch result)
+
+A job is stored, handed to a queue and answered with its id right away; the
+conversion runs later, reporting page progress to the job store.
+
+Pluggable backends (see CONVERSION_JOB_QUEUE and CONVERSION_JOB_STORE):
+- Queue "local": in-process asyncio tasks (development, tests, single instance)
+- Queue "cloud_tasks": one Cloud Tasks HTTP task per job, calling the internal
+  POST /v1/convert/jobs/{id}/run endpoint of any instance
+- Store "memory": jobs live in this process (expire after CONVERSION_JOB_TTL_HOURS)
+- Store "supabase": `conversion_jobs` table, input PDFs in the storage bucket
+  (required with Cloud Tasks, as the job may run on another instance)
+
+Jobs with a webhook_url are announced to it when they finish, with retries
+(exponential backoff, each retry queued like a job) and a dead-letter record
+on the job (webhook_status "failed") once WEBHOOK_MAX_ATTEMPTS are exhausted.
+The Supabase store keeps their signing secret encrypted (STORAGE_ENCRYPTION_KEY).
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+from uuid import uuid4
+
+from cryptography.fernet import InvalidToken
+
+from app.core.config import settings
+from app.core.encryption import decrypt_value, encrypt_value
+from app.core.supabase import get_supabase
+from app.services.conversion_pool import set_conversion_team
+from app.services.credit_service import credit_service
+from app.services.pdf_converter_service import ConversionOptions, pdf_converter_service
+from app.services.webhook_service import retry_delay, webhook_service
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Webhook delivery statuses
+WEBHOOK_PENDING = "pending"
+WEBHOOK_DELIVERED = "delivered"
+WEBHOOK_FAILED = "failed"  # dead letter: every attempt failed
+
+# Progress is written to the store at most this often
+PROGRESS_UPDATE_SECONDS = 1.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class ConversionJob:
+    """A conversion job, as stored (column names of the `conversion_jobs` table)"""
+    id: str
+    team_id: str
+    user_id: str
+    is_paid: bool = False  # plan of the team at submission (share of the worker pool)
+    status: str = JOB_QUEUED
+    url: Optional[str] = None  # None: the PDF was uploaded, see put_input
+    pages: Optional[str] = None
+    mode: str = "accurate"
+    pages_done: int = 0
+    pages_total: Optional[int] = None
+    markdown: Optional[str] = None
+    page_count: Optional[int] = None
+    pages_converted: Optional[int] = None
+    pages_from_cache: Optional[int] = None
+    pages_by_mode: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+    webhook_url: Optional[str] = None
+    webhook_secret: Optional[str] = None
+    webhook_status: Optional[str] = None
+    webhook_attempts: int = 0
+    webhook_last_error: Optional[str] = None
+    created_at: str = dataclasses.field(default_factory=_now)
+    updated_at: str = dataclasses.field(default_factory=_now)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def public_fields(self, include_result: bool = True) -> Dict[str, Any]:
+        """Fields of the job status shown to clients (GET /v1/convert/jobs/{id} and webhooks)"""
+        result = None
+        if self.status == JOB_SUCCEEDED and include_result:
+            result = {
+                "markdown": self.markdown,
+                "page_count": self.page_count,
+                "pages_converted": self.pages_converted,
+                "pages_from_cache": self.pages_from_cache,
+                "pages_by_mode": self.pages_by_mode or {},
+            }
+        if self.status == JOB_SUCCEEDED:
+            progress = 1.0
+        else:
+            progress = self.pages_done / self.pages_total if self.pages_total else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "progress": progress,
+            "result": result,
+            "error": self.error,
+            "code": self.error_code,
+            "webhook_status": self.webhook_status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class MemoryJobStore:
+    """Jobs and their input PDFs in process memory"""
+
+    def __init__(self, ttl_hours: Optional[int] = None):
+        self.ttl = timedelta(hours=ttl_hours if ttl_hours is not None else settings.CONVERSION_JOB_TTL_HOURS)
+        self._jobs: Dict[str, ConversionJob] = {}
+        self._inputs: Dict[str, bytes] = {}
+
+    async def create(self, job: ConversionJob) -> None:
+        self._expire()
+        self._jobs[job.id] = job
+
+    async def get(self, job_id: str) -> Optional[ConversionJob]:
+        job = self._jobs.get(job_id)
+        return dataclasses.replace(job) if job is not None else None
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = _now()
+
+    async def put_input(self, job_id: str, pdf_bytes: bytes) -> None:
+        self._inputs[job_id] = pdf_bytes
+
+    async def get_input(self, job_id: str) -> Optional[bytes]:
+        return self._inputs.get(job_id)
+
+    async def delete_input(self, job_id: str) -> None:
+        self._inputs.pop(job_id, None)
+
+    def _expire(self) -> None:
+        cutoff = (datetime.now(timezone.utc) - self.ttl).isoformat()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.updated_at < cutoff]:
+            del self._jobs[job_id]
+            self._inputs.pop(job_id, None)
+
+
+class SupabaseJobStore:
+    """Jobs in the `conversion_jobs` table, input PDFs in the storage bucket"""
+
+    TABLE = "conversion_jobs"
+    INPUT_PREFIX = "conversion-jobs"
+
+    async def create(self, job: ConversionJob) -> None:
+        row = dataclasses.asdict(job)
+        # The table is readable by team members: the signing secret is stored encrypted
+        secret = row.pop("webhook_secret")
+        row["webhook_secret_encrypted"] = encrypt_value(secret) if secret else None
+        await self._run(lambda client: client.table(self.TABLE).insert(row).execute())
+
+    async def get(self, job_id: str) -> Optional[ConversionJob]:
+        response = await self._run(
+            lambda client: client.table(self.TABLE).select("*").eq("id", job_id).limit(1).execute()
+        )
+        if not response.data:
+            return None
+        row = response.data[0]
+        names = {f.name for f in dataclasses.fields(ConversionJob)}
+        job = ConversionJob(**{k: v for k, v in row.items() if k in names})
+        if row.get("webhook_secret_encrypted"):
+            try:
+                job.webhook_secret = decrypt_value(row["webhook_secret_encrypted"])
+            except (InvalidToken, RuntimeError) as e:
+                logger.error(f"Cannot decrypt webhook secret of conversion job {job_id}: {e!r}")
+        return job
+
+    async def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = _now()
+        await self._run(lambda client: client.table(self.TABLE).update(fields).eq("id", job_id).execute())
+
+    async def put_input(self, job_id: str, pdf_bytes: bytes) -> None:
+        await self._run(lambda client: self._bucket(client).upload(
+            self._input_path(job_id), pdf_bytes, {"content-type": "application/pdf"}
+        ))
+
+    async def get_input(self, job_id: str) -> Optional[bytes]:
+        try:
+            return await self._run(lambda client: self._bucket(client).download(self._input_path(job_id)))
+        except Exception as e:
+            logger.error(f"Failed to download input of conversion job {job_id}: {e}")
+            return None
+
+    async def delete_input(self, job_id: str) -> None:
+        try:
+            await self._run(lambda client: self._bucket(client).remove([self._input_path(job_id)]))
+        except Exception as e:
+            logger.warning(f"Failed to delete input of conversion job {job_id}: {e}")
+
+    def _input_path(self, job_id: str) -> str:
+        return f"{self.INPUT_PREFIX}/{job_id}.pdf"
+
+    @staticmethod
+    def _bucket(client):
+        return client.storage.from_(settings.NEXT_PUBLIC_SUPABASE_STORAGE_BUCKET)
+
+    @staticmethod
+    async def _run(call):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: call(get_supabase()))
+
+
+class LocalJobQueue:
+    """Runs jobs as asyncio tasks of this process, a few at a time"""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self._semaphore = asyncio.Semaphore(concurrency or settings.CONVERSION_JOB_LOCAL_CONCURRENCY)
+        self._tasks: Set[asyncio.Task] = set()
+        self._runs: Dict[asyncio.Task, str] = {}  # job runs, and the job each one runs
+
+    async def enqueue(self, job_id: str) -> None:
+        task = asyncio.ensure_future(self._run(job_id))
+        self._tasks.add(task)
+        self._runs[task] = job_id
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda task: self._runs.pop(task, None))
+
+    async def enqueue_webhook(self, job_id: str, attempt: int, delay: float) -> None:
+        task = asyncio.ensure_future(self._deliver(job_id, attempt, delay))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str) -> None:
+        async with self._semaphore:
+            await job_service.run(job_id)
+
+    async def _deliver(self, job_id: str, attempt: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await job_service.deliver_webhook(job_id, attempt)
+
+    async def close(self) -> None:
+        """
+        Cancel queued and running jobs, then fail them (refunding their
+        credit): nothing runs them again once this process is gone.
+        """
+        interrupted = list(self._runs.values())
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job_id in interrupted:
+            try:
+                await job_service.interrupt(job_id)
+            except Exception as e:
+                logger.error(f"Failed to record the interruption of conversion job {job_id}: {e}")
+
+
+class CloudTasksJobQueue:
+    """Creates one Cloud Tasks HTTP task per job, targeting the internal run endpoint"""
+
+    def __init__(self):
+        self._client = None
+
+    async def enqueue(self, job_id: str) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None,
+            lambda: self._create_task(
+                f"/v1/convert/jobs/{job_id}/run",
+                # Named after the job: Cloud Tasks drops duplicate submissions
+                job_id,
+                # Conversion time limit plus fetch and bookkeeping (Cloud Tasks max: 30 min)
+                min(settings.ASYNC_PDF_TIMEOUT_SECONDS + 60, 1800),
+            ),
+        )
+
+    async def enqueue_webhook(self, job_id: str, attempt: int, delay: float) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None,
+            lambda: self._create_task(
+                f"/v1/convert/jobs/{job_id}/webhook?attempt={attempt}",
+                f"{job_id}-webhook-{attempt}",
+                settings.WEBHOOK_TIMEOUT_SECONDS + 30,
+                delay,
+            ),
+        )
+
+    def _create_task(self, path: str, name: str, deadline_seconds: int, delay: float = 0) -> None:
+        from google.cloud import tasks_v2
+
+        if self._client is None:
+            self._client = tasks_v2.CloudTasksClient()
+
+        parent = self._client.queue_path(
+            settings.CLOUD_TASKS_PROJECT,
+            settings.CLOUD_TASKS_REGION,
+            settings.CONVERSION_JOB_CLOUD_TASKS_QUEUE,
+        )
+        http_request = {
+            "http_method": tasks_v2.HttpMethod.POST,
+            "url": f"{settings.CLOUD_TASKS_SERVICE_URL.rstrip('/')}{path}",
+            "headers": {"X-Internal-Api-Key": settings.INTERNAL_API_KEY},
+        }
+        if settings.CLOUD_TASKS_SERVICE_ACCOUNT:
+            http_request["oidc_token"] = {
+                "service_account_email": settings.CLOUD_TASKS_SERVICE_ACCOUNT,
+                "audience": settings.CLOUD_TASKS_SERVICE_URL,
+            }
+
+        task = {
+            "name": f"{parent}/tasks/{name}",
+            "http_request": http_request,
+            "dispatch_deadline": {"seconds": deadline_seconds},
+        }
+        if delay > 0:
+            task["schedule_time"] = {"seconds": int(time.time() + delay)}
+        self._client.create_task(parent=parent, task=task)
+
+    async def close(self) -> None:
+        pass
+
+
+class JobService:
+    """Service for asynchronous conversion jobs"""
+
+    def __init__(self):
+        if settings.CONVERSION_JOB_STORE == "supabase":
+            self.store = SupabaseJobStore()
+        else:
+            self.store = MemoryJobStore()
+        self._queue = None
+
+    @property
+    def queue(self):
+        # Created on first use: the local queue needs the running event loop
+        if self._queue is None:
+            if settings.CONVERSION_JOB_QUEUE == "cloud_tasks":
+                self._queue = CloudTasksJobQueue()
+            else:
+                self._queue = LocalJobQueue()
+        return self._queue
+
+    async def submit(
+        self,
+        team_id: str,
+        user_id: str,
+        options: ConversionOptions,
+        url: Optional[str] = None,
+        pdf_bytes: Optional[bytes] = None,
+        job_id: Optional[str] = None,
+        is_paid: bool = False,
+        webhook_url: Optional[str] = None,
+        webhook_secret: Optional[str] = None,
+    ) -> ConversionJob:
+        """
+        Store a job and enqueue it.
+
+        Args:
+            team_id: Team charged for the job
+            user_id: User submitting the job
+            options: Conversion options (page selection, mode)
+            url: URL to fetch the PDF from, or
+            pdf_bytes: The PDF itself
+            job_id: Job id (also the credit transaction resource id), generated if omitted
+            is_paid: Whether the team is on a paid plan (share of the worker pool)
+            webhook_url: URL notified when the job finishes
+            webhook_secret: Signing secret of the webhook requests
+
+        Returns:
+            The queued job
+
+        Raises:
+            Any store or queue error (the job is then marked failed)
+        """
+        job = ConversionJob(
+            id=job_id or str(uuid4()),
+            team_id=team_id,
+            user_id=user_id,
+            is_paid=is_paid,
+            url=url,
+            pages=options.pages,
+            mode=options.mode,
+            webhook_url=webhook_url,
+            webhook_secret=webhook_secret,
+        )
+        if pdf_bytes is not None:
+            await self.store.put_input(job.id, pdf_bytes)
+        await self.store.create(job)
+
+        try:
+            await self.queue.enqueue(job.id)
+        except Exception as e:
+            logger.error(f"Failed to enqueue conversion job {job.id}: {e}")
+            await self.store.update(
+                job.id,
+                status=JOB_FAILED,
+                error="Failed to enqueue job",
+                error_code="JOB_ENQUEUE_FAILED",
+            )
+            await self.store.delete_input(job.id)
+            raise
+
+        logger.info(f"Conversion job queued: id={job.id}, team={team_id}, url={bool(url)}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[ConversionJob]:
+        return await self.store.get(job_id)
+
+    async def run(self, job_id: str) -> None:
+        """
+        Run a job to completion, recording progress and the outcome, then
+        queue its webhook. Finished jobs are skipped (queue redelivery); failed
+        jobs have their credit refunded.
+        """
+        job = await self.store.get(job_id)
+        if job is None:
+            logger.warning(f"Conversion job {job_id} not found")
+            return
+        if job.finished:
+            return
+
+        await self.store.update(job_id, status=JOB_RUNNING)
+        set_conversion_team(job.team_id, job.is_paid)
+        start_time = time.time()
+        last_update = 0.0
+
+        async def on_progress(done: int, total: int) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if done == 0 or done == total or now - last_update >= PROGRESS_UPDATE_SECONDS:
+                last_update = now
+                await self.store.update(job_id, pages_done=done, pages_total=total)
+
+        try:
+            options = ConversionOptions(pages=job.pages, mode=job.mode)
+            if job.url:
+                result = await pdf_converter_service.convert(
+                    url=job.url,
+                    options=options,
+                    on_progress=on_progress,
+                    timeout=settings.ASYNC_PDF_TIMEOUT_SECONDS,
+                )
+            else:
+                pdf_bytes = await self.store.get_input(job_id)
+                if pdf_bytes is None:
+                    result = None
+                else:
+                    result = await pdf_converter_service.convert_bytes(
+                        pdf_bytes,
+                        options,
+                        on_progress=on_progress,
+                        timeout=settings.ASYNC_PDF_TIMEOUT_SECONDS,
+                    )
+        except Exception as e:
+            logger.error(f"Unexpected error in conversion job {job_id}: {e}")
+            result = pdf_converter_service.failure_result(e)
+
+        if result is None:
+            await self._fail(job, "Job input is no longer available", "JOB_INPUT_MISSING")
+        elif not result.success:
+            await self._fail(job, result.error or "Conversion failed", result.error_code or "CONVERSION_FAILED")
+        else:
+            await self.store.update(
+                job_id,
+                status=JOB_SUCCEEDED,
+                pages_done=result.pages_converted,
+                pages_total=result.pages_converted,
+                markdown=result.markdown,
+                page_count=result.page_count,
+                pages_converted=result.pages_converted,
+                pages_from_cache=result.pages_from_cache,
+                pages_by_mode=result.pages_by_mode,
+            )
+            logger.info(
+                f"Conversion job successful: id={job_id}, team={job.team_id}, "
+                f"pages={result.pages_converted}/{result.page_count}, "
+                f"exec_time={int((time.time() - start_time) * 1000)}ms"
+            )
+
+        await self.store.delete_input(job_id)
+
+        if job.webhook_url:
+            await self.store.update(job_id, webhook_status=WEBHOOK_PENDING)
+            try:
+                await self.queue.enqueue_webhook(job_id, 1, 0)
+            except Exception as e:
+                logger.error(f"Failed to queue webhook of conversion job {job_id}: {e}")
+                await self.store.update(job_id, webhook_status=WEBHOOK_FAILED, webhook_last_error=str(e))
+
+    async def interrupt(self, job_id: str) -> None:
+        """Fail a job cut short by the shutdown of its queue (credit refunded), unless it finished"""
+        job = await self.store.get(job_id)
+        if job is None or job.finished:
+            return
+        await self._fail(job, "The server shut down before the job finished, please submit it again", "JOB_INTERRUPTED")
+        await self.store.delete_input(job_id)
+
+    async def deliver_webhook(self, job_id: str, attempt: int) -> None:
+        """
+        Make one attempt at delivering the webhook of a finished job, and
+        queue the next attempt (or record the dead letter) if it fails.
+
+        The body is the job status; the markdown is only included up to
+        WEBHOOK_MAX_RESULT_BYTES (larger results are fetched from the job).
+        """
+        job = await self.store.get(job_id)
+        if job is None or not job.webhook_url or job.webhook_status != WEBHOOK_PENDING:
+            return
+        if attempt <= job.webhook_attempts:
+            # Redelivered task for an attempt already made
+            return
+
+        include_result = len((job.markdown or "").encode()) <= settings.WEBHOOK_MAX_RESULT_BYTES
+        event = f"conversion_job.{job.status}"
+        payload = {
+            "event": event,
+            "job": job.public_fields(include_result=include_result),
+            "result_included": include_result and job.status == JOB_SUCCEEDED,
+            "status_url": f"/v1/convert/jobs/{job_id}",
+        }
+        payload["job"].pop("webhook_status")
+
+        if not job.webhook_secret:
+            # Unsigned requests could be forged: never send them
+            await self.store.update(
+                job_id,
+                webhook_status=WEBHOOK_FAILED,
+                webhook_attempts=attempt,
+                webhook_last_error="Webhook signing secret unavailable",
+            )
+            logger.error(f"Webhook delivery abandoned: job={job_id}, team={job.team_id}: signing secret unavailable")
+            return
+
+        delivered, error, retryable = await webhook_service.send(
+            job.webhook_url, job.webhook_secret, event, payload, delivery_id=job_id
+        )
+        if delivered:
+            await self.store.update(job_id, webhook_status=WEBHOOK_DELIVERED, webhook_attempts=attempt)
+            logger.info(f"Webhook delivered: job={job_id}, attempt={attempt}")
+            return
+
+        if retryable and attempt < settings.WEBHOOK_MAX_ATTEMPTS:
+            await self.store.update(job_id, webhook_attempts=attempt, webhook_last_error=error)
+            delay = retry_delay(attempt)
+            logger.warning(f"Webhook attempt {attempt} failed for job {job_id} ({error}), retrying in {delay:.0f}s")
+            await self.queue.enqueue_webhook(job_id, attempt + 1, delay)
+            return
+
+        # Dead letter: kept on the job, visible as webhook_status "failed"
+        await self.store.update(
+            job_id,
+            webhook_status=WEBHOOK_FAILED,
+            webhook_attempts=attempt,
+            webhook_last_error=error,
+        )
+        logger.error(f"Webhook delivery abandoned: job={job_id}, team={job.team_id}, attempts={attempt}: {error}")
+
+    async def _fail(self, job: ConversionJob, error: str, error_code: str) -> None:
+        await self.store.update(job.id, status=JOB_FAILED, error=error, error_code=error_code)
+        # Refund the credit reserved at submission
+        await credit_service.refund_credit(
+            team_id=job.team_id,
+            user_id=job.user_id,
+            amount=1,
+            resource_id=job.id,
+        )
+        logger.warning(f"Conversion job failed: id={job.id}, team={job.team_id}: {error_code} - {error}")
+
+    async def close(self) -> None:
+        """Stop in-process jobs (application shutdown)"""
+        if self._queue is not None:
+            await self._queue.close()
+
+
+# Singleton instance
+job_service = JobService()
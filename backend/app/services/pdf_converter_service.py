@@ -1,24 +1,110 @@
 """PDF to Markdown conversion service using pymupdf4llm"""
 
+import asyncio
 import base64
 import io
-import ipaddress
+import json
 import logging
-import socket
-from dataclasses import dataclass
-from typing import Optional
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
+import fitz
 import httpx
 import pymupdf4llm
 
+from app.core.chunking import ChunkingOptions, Segment, chunk_pages, segment_page
+from app.core.config import settings
+from app.core.http_client import pinned_stream
+from app.core.page_ranges import PageRangeError, resolve_page_ranges
+from app.security.dns_resolver import IPAddress, resolve_public_address
+from app.services.conversion_pool import (
+    conversion_pool,
+    conversion_team,
+    ConversionMemoryError,
+    ConversionPoolError,
+    ConversionTimeoutError,
+    WorkerCrashedError,
+)
+from app.services.result_cache import (
+    CACHE_MISS,
+    CachedConversion,
+    content_digest,
+    fetch_cache,
+    page_cache,
+    result_cache,
+)
+
 logger = logging.getLogger(__name__)
 
 # Maximum PDF file size (10MB)
 MAX_PDF_SIZE_BYTES = 10 * 1024 * 1024
 
-# Timeout for fetching PDFs
-FETCH_TIMEOUT_SECONDS = 30
+# Redirects followed when fetching a PDF (each target is validated)
+MAX_REDIRECTS = 5
+
+# Progress callback of long conversions: (pages done, pages to convert)
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# Page-parallel conversion: split into more batches than workers so one slow
+# batch does not leave the other workers idle at the end
+BATCHES_PER_WORKER = 2
+
+# Streaming conversion: average pages per batch (small, so the first pages
+# come back quickly)
+STREAM_BATCH_PAGES = 4
+
+# Page cost estimate used to balance batches: fixed per-page overhead plus the
+# size of the decompressed content stream, with a flat weight per image
+PAGE_BASE_COST = 2_000
+IMAGE_COST = 20_000
+
+# Conversion modes:
+# - fast: PyMuPDF text blocks with font-size headings (no layout or table analysis)
+# - balanced: pymupdf4llm layout analysis without table detection
+# - accurate: full pymupdf4llm conversion, including tables
+# - auto: fast, balanced or accurate for each page, from its vector graphics
+MODE_FAST = "fast"
+MODE_BALANCED = "balanced"
+MODE_ACCURATE = "accurate"
+MODE_AUTO = "auto"
+
+# Auto mode: pages without vector graphics have no tables to detect and use
+# fast mode; a ruled table needs at least this many paths (grid lines or cell
+# backgrounds), below it balanced mode is enough
+AUTO_TABLE_MIN_PATHS = 6
+
+# Output formats:
+# - markdown: one markdown document
+# - json: blocks of each page (see _page_blocks)
+OUTPUT_MARKDOWN = "markdown"
+OUTPUT_JSON = "json"
+
+# Block types of the json output
+BLOCK_HEADING = "heading"
+BLOCK_TEXT = "text"
+BLOCK_TABLE = "table"
+BLOCK_IMAGE = "image"
+
+# Output of one page: markdown, or the block columns of the json output
+PageOutput = Union[str, Dict[str, Any]]
+
+# Inspection: a page without a text layer whose images cover at least this
+# fraction of it is a scan (there is no OCR, it converts to little or no text)
+SCANNED_MIN_IMAGE_COVERAGE = 0.5
+
+# Inspection estimates: single-core conversion seconds per page for each mode,
+# plus per vector path in accurate mode (table detection), measured on
+# typical text and table pages
+ESTIMATE_SECONDS_PER_PAGE = {MODE_FAST: 0.004, MODE_BALANCED: 0.02, MODE_ACCURATE: 0.07}
+ESTIMATE_SECONDS_PER_PATH = 0.0015
+
+# Inspections run in the API process: MuPDF is not thread-safe, so they run
+# one at a time, off the event loop
+_inspect_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-inspect")
 
 
 @dataclass
@@ -26,106 +112,362 @@ class ConversionResult:
     """Result of a PDF to Markdown conversion"""
     success: bool
     markdown: str = ""
+    pages: Optional[List[Dict[str, Any]]] = None  # json output: blocks of each page
+    chunks: Optional[List[Dict[str, Any]]] = None  # with chunking options
     page_count: int = 0
+    pages_converted: int = 0
+    pages_from_cache: int = 0
+    pages_by_mode: Dict[str, int] = field(default_factory=dict)
     error: Optional[str] = None
     error_code: Optional[str] = None
+    cache_status: Optional[str] = None  # HIT-MEMORY, HIT-DISK or MISS
 
 
-class PdfConverterService:
-    """Service for converting PDFs to Markdown"""
+@dataclass(frozen=True)
+class ConversionOptions:
+    """Per-request conversion options (sent to the worker with the PDF)"""
+    pages: Optional[str] = None  # page selection, e.g. "1-3,10,20-" (None = all pages)
+    mode: str = MODE_ACCURATE  # fast, balanced, accurate or auto
+    output_format: str = OUTPUT_MARKDOWN  # markdown or json
+    chunking: Optional[ChunkingOptions] = None  # chunks of the markdown output (RAG)
 
-    def _is_private_ip(self, hostname: str) -> bool:
-        """
-        Check if a hostname resolves to a private IP (SSRF protection).
 
-        Blocks:
-        - Private IP ranges (10.x, 172.16-31.x, 192.168.x)
-        - Loopback addresses (127.x)
-        - Link-local addresses (169.254.x)
-        - Reserved addresses
-        """
-        try:
-            # Resolve hostname to IP
-            ip_str = socket.gethostbyname(hostname)
-            ip = ipaddress.ip_address(ip_str)
-
-            # Check if IP is private, loopback, link-local, or reserved
-            return (
-                ip.is_private or
-                ip.is_loopback or
-                ip.is_link_local or
-                ip.is_reserved or
-                ip.is_multicast
-            )
-        except (socket.gaierror, ValueError):
-            # If we can't resolve, block it
-            return True
+@dataclass
+class ConversionPlan:
+    """Page batches for a document that is converted in parallel"""
+    page_count: int
+    batches: List[List[int]]  # 0-based page numbers, batches and pages in order
+    hdr_info: Any  # pymupdf4llm.IdentifyHeaders computed once over the selected pages
+    options: ConversionOptions
+    deadline: Optional[float] = None  # event loop time by which all batches must be done
+
+    @property
+    def pages_converted(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+
+@dataclass
+class BatchMarkdown:
+    """Markdown (or json output) of a batch of pages, in page order"""
+    pages: List[PageOutput]
+    cached: List[bool]  # whether each page came from the page cache
+    modes: List[str]  # conversion mode used for each page
+    segments: Optional[List[List[Segment]]] = None  # chunking segments of each page
+
+    def pages_by_mode(self) -> Dict[str, int]:
+        return dict(Counter(self.modes))
+
+
+@dataclass
+class PageMarkdown:
+    """Markdown for a single page, emitted by streaming conversions"""
+    page: int  # 1-based page number
+    markdown: str
+    elapsed_ms: int  # time since the stream started
+    cached: bool = False  # served from the page cache
+    mode: str = MODE_ACCURATE  # conversion mode used for the page
+    segments: Optional[List[Segment]] = None  # chunking segments of the page
+
+
+@dataclass
+class PageInspection:
+    """Cheap signals about a page, read without converting it"""
+    page: int  # 1-based page number
+    width: float  # points
+    height: float
+    text_chars: int  # non-whitespace characters of the text layer
+    images: int  # images drawn on the page
+    image_coverage: float  # fraction of the page covered by images (0 to 1)
+    drawings: int  # vector paths (lines, rectangles, curves)
+    scanned: bool  # mostly image, no text layer
+    auto_mode: str  # mode picked for the page by auto mode
+
+
+@dataclass
+class PdfInspection:
+    """Result of a PDF inspection (no conversion)"""
+    page_count: int
+    encrypted: bool
+    password_required: bool  # cannot be opened (nor converted) without a password
+    pages: List[PageInspection]  # selected pages, empty if password_required
+    estimated_seconds: Dict[str, float] = field(default_factory=dict)  # conversion time per mode
 
-    def _validate_url(self, url: str) -> tuple[bool, Optional[str], Optional[str]]:
+
+@dataclass
+class FetchedPdf:
+    """A PDF fetched from a URL"""
+    pdf_bytes: Optional[bytes]  # None when the server answered 304 Not Modified
+    digest: str  # SHA-256 of the content
+
+
+def _page_cost(page: fitz.Page) -> int:
+    """Cheap complexity estimate for a page (no layout analysis)"""
+    return PAGE_BASE_COST + len(page.read_contents()) + IMAGE_COST * len(page.get_images())
+
+
+def _page_mode(page: fitz.Page, mode: str) -> str:
+    """Conversion mode of a page (resolves auto mode from cheap signals)"""
+    if mode != MODE_AUTO:
+        return mode
+    return _auto_mode(len(page.get_cdrawings()))
+
+
+def _auto_mode(paths: int) -> str:
+    """Auto mode of a page with this many vector paths"""
+    if paths == 0:
+        return MODE_FAST
+    if paths < AUTO_TABLE_MIN_PATHS:
+        return MODE_BALANCED
+    return MODE_ACCURATE
+
+
+def _inspect_page(page: fitz.Page) -> PageInspection:
+    """Inspect a page: one text extraction pass (text and images) and the vector paths"""
+    page_rect = page.rect
+    textpage = page.get_textpage(flags=fitz.TEXT_PRESERVE_IMAGES | fitz.TEXT_MEDIABOX_CLIP)
+    text_chars = sum(len(word) for word in textpage.extractText().split())
+    images = textpage.extractIMGINFO()
+    image_area = sum(abs(fitz.Rect(image["bbox"]) & page_rect) for image in images)
+    image_coverage = min(1.0, image_area / abs(page_rect)) if abs(page_rect) else 0.0
+    drawings = len(page.get_cdrawings())
+    return PageInspection(
+        page=page.number + 1,
+        width=round(page_rect.width, 2),
+        height=round(page_rect.height, 2),
+        text_chars=text_chars,
+        images=len(images),
+        image_coverage=round(image_coverage, 3),
+        drawings=drawings,
+        scanned=text_chars == 0 and image_coverage >= SCANNED_MIN_IMAGE_COVERAGE,
+        auto_mode=_auto_mode(drawings),
+    )
+
+
+def _fast_page_markdown(page: fitz.Page, hdr_info: Any) -> str:
+    """
+    Fast mode: one paragraph per text block, in reading order. A block whose
+    first span has a header font size (per hdr_info) becomes a heading.
+    """
+    paragraphs = []
+    blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT, sort=True)["blocks"]
+    for block in blocks:
+        lines = []
+        header = None
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            if header is None:
+                header = hdr_info.get_header_id(spans[0], page=page)
+            lines.append("".join(span["text"] for span in line["spans"]).strip())
+        if lines:
+            paragraphs.append(header + " ".join(lines))
+    return "".join(paragraph + "\n\n" for paragraph in paragraphs)
+
+
+def _page_blocks(page: fitz.Page, hdr_info: Any, mode: str) -> Dict[str, Any]:
+    """
+    json output of a page: its text blocks (headings per hdr_info), images
+    and, in accurate mode, tables, in reading order.
+
+    Blocks are stored column-wise: `blocks` holds one array per attribute,
+    and index i of every array describes block i. Coordinates are in points
+    from the top-left corner of the page; font_size is 0 for images and tables, and
+    level (heading level) is 0 for anything but headings. Table text is
+    markdown.
+    """
+    tables = []
+    if mode == MODE_ACCURATE:
+        # Same table detection as accurate markdown (pymupdf4llm lines_strict)
+        tables = [(fitz.Rect(table.bbox), table) for table in page.find_tables(strategy="lines_strict").tables]
+
+    rows = []  # (type, text, rect, font size, level)
+    for rect, table in tables:
+        rows.append((BLOCK_TABLE, table.to_markdown(clean=False).strip(), rect, 0.0, 0))
+
+    blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT, sort=True)["blocks"]
+    for block in blocks:
+        rect = fitz.Rect(block["bbox"])
+        if any(table_rect.contains(fitz.Point((rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2))
+               for table_rect, _ in tables):
+            continue
+        lines = []
+        first_span = None
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            first_span = first_span or spans[0]
+            lines.append("".join(span["text"] for span in line["spans"]).strip())
+        if not lines:
+            continue
+        header = hdr_info.get_header_id(first_span, page=page)
+        level = header.count("#")
+        rows.append((BLOCK_HEADING if level else BLOCK_TEXT, " ".join(lines), rect, first_span["size"], level))
+
+    for image in page.get_image_info():
+        rect = fitz.Rect(image["bbox"]) & page.rect
+        if not rect.is_empty:
+            rows.append((BLOCK_IMAGE, "", rect, 0.0, 0))
+
+    rows.sort(key=lambda row: (round(row[2].y0), row[2].x0))
+    return {
+        "page": page.number + 1,
+        "width": round(page.rect.width, 1),
+        "height": round(page.rect.height, 1),
+        "blocks": {
+            "type": [row[0] for row in rows],
+            "text": [row[1] for row in rows],
+            "x0": [round(row[2].x0, 1) for row in rows],
+            "y0": [round(row[2].y0, 1) for row in rows],
+            "x1": [round(row[2].x1, 1) for row in rows],
+            "y1": [round(row[2].y1, 1) for row in rows],
+            "font_size": [round(row[3], 1) for row in rows],
+            "level": [row[4] for row in rows],
+        },
+    }
+
+
+def _assembled(outputs: List[PageOutput], output_format: str) -> Dict[str, Any]:
+    """The markdown and pages fields of a ConversionResult, from the outputs of its pages"""
+    if output_format == OUTPUT_JSON:
+        return {"markdown": "", "pages": outputs}
+    return {"markdown": "".join(outputs)}
+
+
+def _split_batches(costs: List[int], max_batches: int, min_pages: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into contiguous batches of roughly equal total cost.
+
+    Expensive pages end up in smaller batches, cheap pages in larger ones.
+    """
+    page_count = len(costs)
+    batch_count = max(1, min(max_batches, page_count // max(1, min_pages)))
+    target = sum(costs) / batch_count
+
+    batches: List[Tuple[int, int]] = []
+    start = 0
+    acc = 0
+    for i, cost in enumerate(costs):
+        acc += cost
+        if acc >= target and len(batches) < batch_count - 1:
+            batches.append((start, i + 1))
+            start = i + 1
+            acc = 0
+    if start < page_count:
+        batches.append((start, page_count))
+    return batches
+
+
+class PdfConverterService:
+    """Service for converting PDFs to Markdown"""
+
+    async def validate_url(self, url: str) -> tuple[Optional[IPAddress], Optional[str], Optional[str]]:
         """
-        Validate URL for safety and correctness.
+        Validate URL for safety and correctness (also used for webhook URLs).
 
         Returns:
-            Tuple of (is_valid, error_message, error_code)
+            Tuple of (vetted address to connect to, error_message, error_code)
         """
         try:
             parsed = urlparse(url)
 
             # Must be HTTPS
             if parsed.scheme != "https":
-                return False, "URL must use HTTPS", "INVALID_URL"
+                return None, "URL must use HTTPS", "INVALID_URL"
 
             # Must have a hostname
             if not parsed.hostname:
-                return False, "Invalid URL format", "INVALID_URL"
-
-            # Check for SSRF - private IPs
-            if self._is_private_ip(parsed.hostname):
-                return False, "URL points to a private or reserved address", "SSRF_BLOCKED"
-
-            return True, None, None
+                return None, "Invalid URL format", "INVALID_URL"
 
         except Exception as e:
             logger.warning(f"URL validation error: {e}")
-            return False, "Invalid URL format", "INVALID_URL"
+            return None, "Invalid URL format", "INVALID_URL"
+
+        # Check for SSRF - private IPs
+        address = await resolve_public_address(parsed.hostname)
+        if address is None:
+            return None, "URL points to a private or reserved address", "SSRF_BLOCKED"
+
+        return address, None, None
 
     async def fetch_pdf_from_url(self, url: str) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
         """
         Fetch PDF content from a URL.
 
+        A URL fetched before is revalidated with a conditional GET: on a 304
+        the body comes from the fetch cache instead of being downloaded.
+
         Returns:
             Tuple of (pdf_bytes, error_message, error_code)
         """
-        # Validate URL first
-        is_valid, error_msg, error_code = self._validate_url(url)
-        if not is_valid:
+        fetched, error_msg, error_code = await self._fetch_url(url)
+        if fetched is None:
             return None, error_msg, error_code
+        return await self._fetched_body(url, fetched)
 
-        try:
-            async with httpx.AsyncClient(
-                timeout=FETCH_TIMEOUT_SECONDS,
-                follow_redirects=True,
-                max_redirects=5
-            ) as client:
-                response = await client.get(url)
-                response.raise_for_status()
+    async def _fetched_body(
+        self,
+        url: str,
+        fetched: FetchedPdf
+    ) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """Bytes of a fetched PDF, from the fetch cache when the URL was not modified"""
+        if fetched.pdf_bytes is not None:
+            return fetched.pdf_bytes, None, None
 
-                # Check content length
-                content_length = response.headers.get("content-length")
-                if content_length and int(content_length) > MAX_PDF_SIZE_BYTES:
-                    return None, f"PDF exceeds maximum size of {MAX_PDF_SIZE_BYTES // (1024*1024)}MB", "FILE_TOO_LARGE"
+        pdf_bytes = await fetch_cache.body(fetched.digest)
+        if pdf_bytes is not None:
+            return pdf_bytes, None, None
 
-                pdf_bytes = response.content
+        # Body evicted since: download it again
+        fetch_cache.forget(url)
+        fetched, error_msg, error_code = await self._fetch_url(url)
+        if fetched is None:
+            return None, error_msg, error_code
+        return fetched.pdf_bytes, None, None
 
-                # Double-check actual size
-                if len(pdf_bytes) > MAX_PDF_SIZE_BYTES:
-                    return None, f"PDF exceeds maximum size of {MAX_PDF_SIZE_BYTES // (1024*1024)}MB", "FILE_TOO_LARGE"
+    async def _fetch_url(self, url: str) -> tuple[Optional[FetchedPdf], Optional[str], Optional[str]]:
+        """
+        Fetch a PDF, conditionally if the URL is in the fetch cache.
 
-                # Basic PDF validation - check magic bytes
-                if not pdf_bytes.startswith(b"%PDF"):
-                    return None, "URL does not point to a valid PDF file", "INVALID_PDF"
+        The connection goes to the address vetted by validate_url (the
+        hostname is only sent as Host header and TLS SNI), so the hostname
+        cannot be re-resolved to an internal address in between. Redirects
+        are followed here, each target being validated the same way.
 
-                return pdf_bytes, None, None
+        Returns:
+            Tuple of (fetched PDF, error_message, error_code). The PDF has no
+            bytes when the server answered 304 Not Modified.
+        """
+        validators = fetch_cache.validators(url)
+        conditional_headers = validators.request_headers() if validators is not None else {}
+        request_url = url
+
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                # Validate URL first
+                address, error_msg, error_code = await self.validate_url(request_url)
+                if address is None:
+                    return None, error_msg, error_code
+
+                # Shared client: keep-alive connections are reused across requests.
+                # Stream the body: stop as soon as it is too large or not a PDF
+                async with pinned_stream("GET", request_url, address, headers=conditional_headers) as response:
+                    if response.status_code == 304 and validators is not None:
+                        return FetchedPdf(pdf_bytes=None, digest=validators.digest), None, None
+                    if response.is_redirect:
+                        request_url = str(httpx.URL(request_url).join(response.headers["location"]))
+                        continue
+                    response.raise_for_status()
+                    pdf_bytes, error_msg, error_code = await self._read_pdf_response(response)
+                    if pdf_bytes is None:
+                        return None, error_msg, error_code
+
+                    digest = await content_digest(pdf_bytes)
+                    await fetch_cache.put(url, response.headers, digest, pdf_bytes)
+                    return FetchedPdf(pdf_bytes=pdf_bytes, digest=digest), None, None
+
+            return None, "Too many redirects fetching PDF", "URL_FETCH_FAILED"
 
         except httpx.TimeoutException:
             return None, "Timeout fetching PDF from URL", "URL_FETCH_TIMEOUT"
@@ -135,6 +477,67 @@ class PdfConverterService:
             logger.error(f"Error fetching PDF from URL: {e}")
             return None, "Failed to fetch PDF from URL", "URL_FETCH_FAILED"
 
+    async def _read_pdf_response(
+        self,
+        response: httpx.Response
+    ) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """
+        Read a streamed PDF response within MAX_PDF_SIZE_BYTES.
+
+        With a Content-Length, chunks are copied into a buffer allocated once
+        at that size; otherwise they go into a growing BytesIO. The PDF magic
+        bytes are checked as soon as they arrive.
+
+        Returns:
+            Tuple of (pdf_bytes, error_message, error_code)
+        """
+        too_large = None, f"PDF exceeds maximum size of {MAX_PDF_SIZE_BYTES // (1024*1024)}MB", "FILE_TOO_LARGE"
+        not_pdf = None, "URL does not point to a valid PDF file", "INVALID_PDF"
+
+        # Check content length
+        content_length = response.headers.get("content-length")
+        expected = int(content_length) if content_length and content_length.isdigit() else None
+        # Content-Length is the encoded size: only trust it when not compressed
+        if response.headers.get("content-encoding", "identity") != "identity":
+            expected = None
+        if expected is not None and expected > MAX_PDF_SIZE_BYTES:
+            return too_large
+
+        preallocated = bytearray(expected) if expected else None
+        spool = io.BytesIO() if preallocated is None else None
+        head = b""
+        size = 0
+
+        async for chunk in response.aiter_bytes():
+            end = size + len(chunk)
+            if end > MAX_PDF_SIZE_BYTES:
+                return too_large
+
+            # Basic PDF validation - check magic bytes on the first bytes
+            if len(head) < 4:
+                head += chunk[:4 - len(head)]
+                if len(head) == 4 and head != b"%PDF":
+                    return not_pdf
+
+            if preallocated is not None and end <= len(preallocated):
+                preallocated[size:end] = chunk
+            else:
+                if spool is None:
+                    # Body longer than announced: continue in a spool
+                    spool = io.BytesIO()
+                    spool.write(memoryview(preallocated)[:size])
+                    preallocated = None
+                spool.write(chunk)
+            size = end
+
+        if head != b"%PDF":
+            return not_pdf
+
+        if spool is not None:
+            return spool.getvalue(), None, None
+        # Body shorter than announced: keep what was received
+        return bytes(memoryview(preallocated)[:size]), None, None
+
     def decode_base64_pdf(self, pdf_base64: str) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
         """
         Decode base64-encoded PDF.
@@ -167,61 +570,438 @@ class PdfConverterService:
             logger.error(f"Error decoding base64 PDF: {e}")
             return None, "Invalid base64-encoded PDF", "INVALID_BASE64"
 
-    def convert_pdf_to_markdown(self, pdf_bytes: bytes) -> ConversionResult:
+    def convert_pdf_to_markdown(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions = ConversionOptions()
+    ) -> ConversionResult:
         """
         Convert PDF bytes to Markdown using pymupdf4llm.
 
+        The document is opened once, from memory, and that handle is used for
+        both the conversion and the page count (no temp file, no second parse).
+
         Args:
             pdf_bytes: Raw PDF file bytes
+            options: Conversion options (page selection, mode)
 
         Returns:
             ConversionResult with markdown content and metadata
         """
-        import tempfile
-        import os
+        return self.convert_or_plan(pdf_bytes, options, max_batches=1)
+
+    def plan_conversion(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions,
+        pages_per_batch: int
+    ) -> ConversionPlan:
+        """
+        Split a document into batches of about `pages_per_batch` pages for
+        convert_page_batch (cost-balanced, so complex pages get smaller batches).
 
-        temp_path = None
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            options: Conversion options (page selection, mode)
+            pages_per_batch: Average number of pages per batch
+
+        Returns:
+            ConversionPlan
+
+        Raises:
+            PageRangeError: If the page selection does not fit the document
+        """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            pages = self._select_pages(doc, options)
+            max_batches = max(1, -(-len(pages) // pages_per_batch))
+            return self._plan(doc, pages, options, max_batches, min_batch_pages=1)
+
+    def _select_pages(self, doc: fitz.Document, options: ConversionOptions) -> List[int]:
+        if options.pages:
+            return resolve_page_ranges(options.pages, doc.page_count)
+        return list(range(doc.page_count))
+
+    def _plan(
+        self,
+        doc: fitz.Document,
+        pages: List[int],
+        options: ConversionOptions,
+        max_batches: int,
+        min_batch_pages: int
+    ) -> ConversionPlan:
+        costs = [_page_cost(doc[pno]) for pno in pages]
+        return ConversionPlan(
+            page_count=doc.page_count,
+            batches=[pages[start:end] for start, end in _split_batches(costs, max_batches, min_batch_pages)],
+            # Header levels depend on font sizes across all converted pages:
+            # compute them once so that all batches agree
+            hdr_info=pymupdf4llm.IdentifyHeaders(doc, pages=pages),
+            options=options,
+        )
+
+    def convert_or_plan(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions,
+        max_batches: int
+    ) -> Union[ConversionResult, ConversionPlan]:
+        """
+        Convert a document, or plan a page-parallel conversion if it is large.
+
+        Selections below PARALLEL_CONVERSION_PAGE_THRESHOLD pages (or when
+        max_batches is 1) are converted right away. Larger ones return a
+        ConversionPlan whose batches are converted with convert_page_batch.
+
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            options: Conversion options (page selection, mode)
+            max_batches: Upper bound on the number of batches
+
+        Returns:
+            ConversionResult, or ConversionPlan for large documents
+        """
         try:
-            # Write bytes to temporary file (pymupdf4llm requires file path)
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
-                f.write(pdf_bytes)
-                temp_path = f.name
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = doc.page_count
+                pages = self._select_pages(doc, options)
 
-            # Use pymupdf4llm to convert PDF to markdown
-            # This extracts text while preserving structure, tables, and formatting
-            markdown = pymupdf4llm.to_markdown(temp_path)
+                if max_batches > 1 and len(pages) >= settings.PARALLEL_CONVERSION_PAGE_THRESHOLD:
+                    plan = self._plan(doc, pages, options, max_batches, settings.PARALLEL_CONVERSION_MIN_BATCH_PAGES)
+                    if len(plan.batches) > 1:
+                        return plan
 
-            # Get page count using fitz (PyMuPDF)
-            import fitz
-            doc = fitz.open(temp_path)
-            page_count = doc.page_count
-            doc.close()
+                batch = self._convert_pages(doc, pages, pymupdf4llm.IdentifyHeaders(doc, pages=pages), options)
 
             return ConversionResult(
                 success=True,
-                markdown=markdown,
-                page_count=page_count
+                **_assembled(batch.pages, options.output_format),
+                chunks=chunk_pages(batch.segments, options.chunking) if batch.segments is not None else None,
+                page_count=page_count,
+                pages_converted=len(pages),
+                pages_from_cache=sum(batch.cached),
+                pages_by_mode=batch.pages_by_mode()
             )
 
         except Exception as e:
-            logger.error(f"Error converting PDF to markdown: {e}")
-            return ConversionResult(
-                success=False,
-                error=f"Failed to convert PDF: {str(e)}",
-                error_code="CONVERSION_FAILED"
+            return self.failure_result(e)
+
+    def convert_page_batch(
+        self,
+        pdf_bytes: bytes,
+        pages: List[int],
+        hdr_info: Any,
+        options: ConversionOptions
+    ) -> BatchMarkdown:
+        """
+        Convert a batch of pages to Markdown.
+
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            pages: 0-based page numbers, in order
+            hdr_info: Header levels from the ConversionPlan
+            options: Conversion options (mode, output format, chunking; the
+                page selection is not used)
+
+        Returns:
+            BatchMarkdown (pages concatenate to the full-document output)
+        """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return self._convert_pages(doc, pages, hdr_info, options)
+
+    def _convert_pages(
+        self,
+        doc: fitz.Document,
+        pages: List[int],
+        hdr_info: Any,
+        options: ConversionOptions
+    ) -> BatchMarkdown:
+        """
+        Convert pages in the requested mode and output format. With chunking
+        options, the markdown of each page is also split into chunking
+        segments (while it is still in this process).
+        """
+        modes = {pno: _page_mode(doc[pno], options.mode) for pno in pages}
+        if options.output_format == OUTPUT_JSON:
+            return self._page_blocks_batch(doc, pages, hdr_info, modes)
+
+        batch = self._markdown_batch(doc, pages, hdr_info, modes)
+        if options.chunking is not None:
+            batch.segments = [
+                segment_page(markdown, pno + 1, options.chunking.max_tokens)
+                for pno, markdown in zip(pages, batch.pages)
+            ]
+        return batch
+
+    def _markdown_batch(
+        self,
+        doc: fitz.Document,
+        pages: List[int],
+        hdr_info: Any,
+        modes: Dict[int, str]
+    ) -> BatchMarkdown:
+        """
+        Markdown of pages, reusing the page cache: only pages whose content
+        changed since they were last seen are converted.
+        """
+        keys = {pno: page_cache.page_key(doc[pno], hdr_info, modes[pno]) for pno in pages} if page_cache.enabled else {}
+        cached = {pno: page_cache.get(key) for pno, key in keys.items()}
+        missing = [pno for pno in pages if cached.get(pno) is None]
+
+        converted = {}
+        for pno in missing:
+            if modes[pno] == MODE_FAST:
+                converted[pno] = _fast_page_markdown(doc[pno], hdr_info)
+
+        for layout_mode in (MODE_BALANCED, MODE_ACCURATE):
+            group = [pno for pno in missing if modes[pno] == layout_mode]
+            if not group:
+                continue
+            # Use pymupdf4llm to convert PDF to markdown
+            # This extracts text while preserving structure, tables, and formatting
+            chunks = pymupdf4llm.to_markdown(
+                doc,
+                pages=group,
+                hdr_info=hdr_info,
+                page_chunks=True,
+                table_strategy="lines_strict" if layout_mode == MODE_ACCURATE else None,
             )
-        finally:
-            # Clean up temp file
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except Exception:
-                    pass
+            converted.update(zip(group, (chunk["text"] for chunk in chunks)))
 
-    async def convert(
+        for pno in missing:
+            if pno in keys:
+                page_cache.put(keys[pno], converted[pno])
+
+        return BatchMarkdown(
+            pages=[converted[pno] if pno in converted else cached[pno] for pno in pages],
+            cached=[pno not in converted for pno in pages],
+            modes=[modes[pno] for pno in pages],
+        )
+
+    def _page_blocks_batch(
+        self,
+        doc: fitz.Document,
+        pages: List[int],
+        hdr_info: Any,
+        modes: Dict[int, str]
+    ) -> BatchMarkdown:
+        """json output of pages, through the page cache (stored as JSON text, next to the markdown)"""
+        outputs = []
+        cached = []
+        for pno in pages:
+            key = page_cache.page_key(doc[pno], hdr_info, f"{modes[pno]}/{OUTPUT_JSON}") if page_cache.enabled else None
+            data = page_cache.get(key) if key else None
+            cached.append(data is not None)
+            if data is not None:
+                outputs.append(json.loads(data))
+                continue
+            blocks = _page_blocks(doc[pno], hdr_info, modes[pno])
+            if key:
+                page_cache.put(key, json.dumps(blocks, separators=(",", ":")))
+            outputs.append(blocks)
+        return BatchMarkdown(pages=outputs, cached=cached, modes=[modes[pno] for pno in pages])
+
+    def _chunks(self, batches: List[BatchMarkdown], options: ConversionOptions) -> Optional[List[Dict[str, Any]]]:
+        """
+        Chunks of a page-parallel conversion. The workers segmented each
+        page; packing the segments across batches only sums token counts
+        and joins strings.
+        """
+        if options.chunking is None or options.output_format != OUTPUT_MARKDOWN:
+            return None
+        return chunk_pages((segments for batch in batches for segments in batch.segments), options.chunking)
+
+    async def _convert_in_pool(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions,
+        timeout: Optional[float] = None
+    ) -> ConversionResult:
+        """
+        Convert in the worker pool. Large documents are split into page
+        batches that run on several workers and are stitched back in order.
+
+        The time limit applies to the conversion as a whole, not per batch.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or conversion_pool.timeout)
+        max_batches = conversion_pool.size * BATCHES_PER_WORKER if conversion_pool.size > 1 else 1
+        pages = await loop.run_in_executor(None, _selected_page_count, pdf_bytes, options)
+        if max_batches > 1 and pages >= settings.PARALLEL_CONVERSION_PAGE_THRESHOLD:
+            pages = 1  # planned in one job, the pages are converted in batch jobs
+        outcome = await conversion_pool.run(
+            _convert_or_plan_in_worker, pdf_bytes, options, max_batches,
+            pages=pages, timeout=timeout, deadline=deadline
+        )
+        if isinstance(outcome, ConversionResult):
+            return outcome
+
+        plan = outcome
+        logger.info(f"Converting {plan.pages_converted} pages in {len(plan.batches)} parallel batches")
+
+        tasks = [
+            asyncio.ensure_future(conversion_pool.run(
+                _convert_batch_in_worker, pdf_bytes, batch, plan.hdr_info, plan.options,
+                pages=len(batch), timeout=timeout, deadline=deadline
+            ))
+            for batch in plan.batches
+        ]
+        try:
+            batches = await asyncio.gather(*tasks)
+        except (ConversionPoolError, asyncio.CancelledError):
+            for task in tasks:
+                task.cancel()
+            raise
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            return self.failure_result(e)
+
+        return ConversionResult(
+            success=True,
+            **_assembled([page for batch in batches for page in batch.pages], plan.options.output_format),
+            chunks=self._chunks(batches, plan.options),
+            page_count=plan.page_count,
+            pages_converted=plan.pages_converted,
+            pages_from_cache=sum(sum(batch.cached) for batch in batches),
+            pages_by_mode=dict(sum((Counter(batch.modes) for batch in batches), Counter()))
+        )
+
+    async def _convert_with_progress(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions,
+        on_progress: ProgressCallback,
+        timeout: Optional[float] = None
+    ) -> ConversionResult:
+        """Convert through the streaming path, reporting progress after each page"""
+        try:
+            plan = await self.plan_stream(pdf_bytes, options, timeout)
+            await on_progress(0, plan.pages_converted)
+
+            pages: List[str] = []
+            pages_from_cache = 0
+            pages_by_mode = Counter()
+            async for page in self.stream_pages(pdf_bytes, plan):
+                pages.append(page.markdown)
+                pages_from_cache += page.cached
+                pages_by_mode[page.mode] += 1
+                await on_progress(len(pages), plan.pages_converted)
+        except ConversionPoolError:
+            raise
+        except Exception as e:
+            return self.failure_result(e, timeout)
+
+        return ConversionResult(
+            success=True,
+            markdown="".join(pages),
+            page_count=plan.page_count,
+            pages_converted=plan.pages_converted,
+            pages_from_cache=pages_from_cache,
+            pages_by_mode=dict(pages_by_mode)
+        )
+
+    async def load_pdf(
         self,
         url: Optional[str] = None,
         pdf_base64: Optional[str] = None
+    ) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
+        """
+        Get PDF bytes from either a URL or base64 input.
+
+        Returns:
+            Tuple of (pdf_bytes, error_message, error_code)
+        """
+        if url:
+            return await self.fetch_pdf_from_url(url)
+        if pdf_base64:
+            return self.decode_base64_pdf(pdf_base64)
+        return None, "Must provide either 'url' or 'pdf_base64'", "INVALID_REQUEST"
+
+    def inspect_pdf(self, pdf_bytes: bytes, pages: Optional[str] = None) -> PdfInspection:
+        """
+        Inspect a PDF without converting it: page count, encryption and, for
+        each selected page, its text layer, images and vector graphics.
+
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            pages: Page selection, e.g. "1-3,10,20-" (None = all pages)
+
+        Returns:
+            PdfInspection, without estimates
+
+        Raises:
+            PageRangeError: If the page selection does not fit the document
+        """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            encrypted = bool(doc.needs_pass or (doc.metadata or {}).get("encryption"))
+            if doc.needs_pass:
+                return PdfInspection(
+                    page_count=doc.page_count, encrypted=encrypted, password_required=True, pages=[]
+                )
+            selected = self._select_pages(doc, ConversionOptions(pages=pages))
+            return PdfInspection(
+                page_count=doc.page_count,
+                encrypted=encrypted,
+                password_required=False,
+                pages=[_inspect_page(doc[pno]) for pno in selected],
+            )
+
+    async def inspect(
+        self,
+        pdf_bytes: bytes,
+        pages: Optional[str] = None
+    ) -> tuple[Optional[PdfInspection], Optional[str], Optional[str]]:
+        """
+        Inspect a PDF (see inspect_pdf) and estimate its conversion time in
+        each mode. Runs in the API process, not in the worker pool: it takes
+        milliseconds and must not queue behind conversions.
+
+        Returns:
+            Tuple of (inspection, error_message, error_code)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            inspection = await loop.run_in_executor(_inspect_executor, self.inspect_pdf, pdf_bytes, pages)
+        except PageRangeError as e:
+            return None, str(e), "INVALID_PAGE_RANGE"
+        except Exception as e:
+            logger.warning(f"Error inspecting PDF: {e}")
+            return None, "Invalid PDF data", "INVALID_PDF"
+
+        if not inspection.password_required:
+            inspection.estimated_seconds = self._estimated_seconds(inspection.pages)
+        return inspection, None, None
+
+    def _estimated_seconds(self, pages: List[PageInspection]) -> Dict[str, float]:
+        """
+        Conversion time of the pages in each mode (auto: the mode of each
+        page), spread over the workers for documents converted page-parallel.
+        """
+        def page_seconds(page: PageInspection, mode: str) -> float:
+            seconds = ESTIMATE_SECONDS_PER_PAGE[mode]
+            if mode == MODE_ACCURATE:
+                seconds += ESTIMATE_SECONDS_PER_PATH * page.drawings
+            return seconds
+
+        workers = 1
+        if len(pages) >= settings.PARALLEL_CONVERSION_PAGE_THRESHOLD:
+            workers = max(1, min(
+                conversion_pool.size,
+                conversion_pool.max_jobs_per_team,
+                len(pages) // settings.PARALLEL_CONVERSION_MIN_BATCH_PAGES,
+            ))
+
+        estimates = {mode: sum(page_seconds(page, mode) for page in pages) for mode in ESTIMATE_SECONDS_PER_PAGE}
+        estimates[MODE_AUTO] = sum(page_seconds(page, page.auto_mode) for page in pages)
+        return {mode: round(seconds / workers, 2) for mode, seconds in estimates.items()}
+
+    async def convert(
+        self,
+        url: Optional[str] = None,
+        pdf_base64: Optional[str] = None,
+        options: ConversionOptions = ConversionOptions(),
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
     ) -> ConversionResult:
         """
         Main conversion method - handles both URL and base64 input.
@@ -229,37 +1009,263 @@ class PdfConverterService:
         Args:
             url: URL to fetch PDF from (HTTPS only)
             pdf_base64: Base64-encoded PDF content
+            options: Conversion options (page selection, mode)
+            on_progress: See convert_bytes
+            timeout: See convert_bytes
 
         Returns:
             ConversionResult with markdown content or error
         """
-        pdf_bytes: Optional[bytes] = None
-
-        if url:
-            pdf_bytes, error, error_code = await self.fetch_pdf_from_url(url)
+        if not url:
+            pdf_bytes, error, error_code = await self.load_pdf(url, pdf_base64)
             if error:
-                return ConversionResult(
-                    success=False,
-                    error=error,
-                    error_code=error_code
-                )
-        elif pdf_base64:
-            pdf_bytes, error, error_code = self.decode_base64_pdf(pdf_base64)
-            if error:
-                return ConversionResult(
-                    success=False,
-                    error=error,
-                    error_code=error_code
-                )
-        else:
+                return ConversionResult(success=False, error=error, error_code=error_code)
+            return await self.convert_bytes(pdf_bytes, options, on_progress, timeout)
+
+        fetched, error, error_code = await self._fetch_url(url)
+        if fetched is None:
+            return ConversionResult(success=False, error=error, error_code=error_code)
+
+        if fetched.pdf_bytes is None:
+            # Not modified since the last fetch: the result is likely cached,
+            # in which case the body is not even read back from the fetch cache
+            cached = await self._cached_result(result_cache.key_for_digest(fetched.digest, options))
+            if cached is not None:
+                return cached
+
+        pdf_bytes, error, error_code = await self._fetched_body(url, fetched)
+        if error:
+            return ConversionResult(success=False, error=error, error_code=error_code)
+        return await self.convert_bytes(pdf_bytes, options, on_progress, timeout)
+
+    async def convert_bytes(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions = ConversionOptions(),
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> ConversionResult:
+        """
+        Convert an already loaded PDF (result cache, then worker pool).
+
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            options: Conversion options (page selection, mode)
+            on_progress: Called as pages complete (the conversion then runs
+                in streaming batches, in page order)
+            timeout: Time limit of the conversion, defaults to
+                CONVERSION_TIMEOUT_SECONDS
+
+        Returns:
+            ConversionResult with markdown content or error
+        """
+        cache_key = await result_cache.key_for(pdf_bytes, options)
+        cached = await self._cached_result(cache_key)
+        if cached is not None:
+            return cached
+
+        # Convert PDF to markdown in worker processes (keeps the event loop free)
+        try:
+            if on_progress is None:
+                result = await self._convert_in_pool(pdf_bytes, options, timeout)
+            else:
+                result = await self._convert_with_progress(pdf_bytes, options, on_progress, timeout)
+        except ConversionPoolError as e:
+            return self.failure_result(e, timeout)
+
+        if result.success:
+            await result_cache.put(cache_key, CachedConversion(
+                markdown=result.markdown,
+                pages=result.pages,
+                chunks=result.chunks,
+                page_count=result.page_count,
+                pages_converted=result.pages_converted,
+                pages_by_mode=result.pages_by_mode
+            ), team_id=conversion_team().team_id)
+        result.cache_status = CACHE_MISS
+        return result
+
+    async def _cached_result(self, cache_key: str) -> Optional[ConversionResult]:
+        """Conversion result from the result cache, if present"""
+        cached, cache_status = await result_cache.get(cache_key, team_id=conversion_team().team_id)
+        if cached is None:
+            return None
+        return ConversionResult(
+            success=True,
+            markdown=cached.markdown,
+            pages=cached.pages,
+            chunks=cached.chunks,
+            page_count=cached.page_count,
+            pages_converted=cached.pages_converted,
+            # Another team's result is served as if converted for this one
+            pages_from_cache=cached.pages_converted if cache_status != CACHE_MISS else 0,
+            pages_by_mode=cached.pages_by_mode,
+            cache_status=cache_status
+        )
+
+    def failure_result(self, error: Exception, timeout: Optional[float] = None) -> ConversionResult:
+        """Map an exception raised by a pooled conversion to a failed ConversionResult"""
+        if isinstance(error, ConversionTimeoutError):
             return ConversionResult(
                 success=False,
-                error="Must provide either 'url' or 'pdf_base64'",
-                error_code="INVALID_REQUEST"
+                error=f"Conversion exceeded the {timeout or conversion_pool.timeout}s time limit",
+                error_code="CONVERSION_TIMEOUT"
             )
+        if isinstance(error, ConversionMemoryError):
+            return ConversionResult(
+                success=False,
+                error=(
+                    "Document is too complex to convert "
+                    f"(exceeded the {conversion_pool.max_rss_bytes // (1024 * 1024)} MB memory limit)"
+                ),
+                error_code="CONVERSION_TOO_COMPLEX"
+            )
+        if isinstance(error, PageRangeError):
+            return ConversionResult(
+                success=False,
+                error=str(error),
+                error_code="INVALID_PAGE_RANGE"
+            )
+        if isinstance(error, WorkerCrashedError):
+            return ConversionResult(
+                success=False,
+                error="Conversion worker terminated unexpectedly",
+                error_code="CONVERSION_FAILED"
+            )
+        logger.error(f"Error converting PDF to markdown: {error}")
+        return ConversionResult(
+            success=False,
+            error=f"Failed to convert PDF: {str(error)}",
+            error_code="CONVERSION_FAILED"
+        )
+
+    async def plan_stream(
+        self,
+        pdf_bytes: bytes,
+        options: ConversionOptions = ConversionOptions(),
+        timeout: Optional[float] = None
+    ) -> ConversionPlan:
+        """
+        Plan a streaming conversion: small page batches, in order. The
+        conversion time limit (timeout, defaults to CONVERSION_TIMEOUT_SECONDS)
+        starts now and covers the whole stream.
+
+        Raises:
+            Any conversion error (map it with failure_result)
+        """
+        deadline = asyncio.get_running_loop().time() + (timeout or conversion_pool.timeout)
+        plan = await conversion_pool.run(
+            _plan_in_worker, pdf_bytes, options, STREAM_BATCH_PAGES, timeout=timeout, deadline=deadline
+        )
+        plan.deadline = deadline
+        return plan
+
+    async def stream_pages(self, pdf_bytes: bytes, plan: ConversionPlan) -> AsyncIterator[PageMarkdown]:
+        """
+        Convert a planned document and yield each page as soon as it (and
+        every page before it) is ready.
+
+        At most one batch per worker is in flight, so memory held for a
+        stream does not grow with the document size.
+
+        Raises:
+            Any conversion error (map it with failure_result)
+        """
+        started = time.monotonic()
+        batches = iter(plan.batches)
+        pending: deque = deque()
+
+        def submit_next() -> None:
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append((batch, asyncio.ensure_future(conversion_pool.run(
+                    _convert_batch_in_worker, pdf_bytes, batch, plan.hdr_info, plan.options,
+                    pages=len(batch), deadline=plan.deadline
+                ))))
+
+        try:
+            for _ in range(conversion_pool.size):
+                submit_next()
+
+            while pending:
+                batch, task = pending.popleft()
+                result = await task
+                submit_next()
+
+                elapsed_ms = int((time.monotonic() - started) * 1000)
+                segments = result.segments or [None] * len(batch)
+                for pno, markdown, cached, mode, page_segments in zip(
+                    batch, result.pages, result.cached, result.modes, segments
+                ):
+                    yield PageMarkdown(
+                        page=pno + 1,
+                        markdown=markdown,
+                        elapsed_ms=elapsed_ms,
+                        cached=cached,
+                        mode=mode,
+                        segments=page_segments,
+                    )
+        finally:
+            # Stream closed early (error or client disconnect): stop the rest
+            for _, task in pending:
+                task.cancel()
+
+
+def _selected_page_count(pdf_bytes: bytes, options: ConversionOptions) -> int:
+    """
+    Number of pages a conversion will convert, for the pool's load estimates
+    (1 if the PDF cannot be read: the worker reports the error).
+    """
+    try:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return len(pdf_converter_service._select_pages(doc, options))
+    except Exception:
+        return 1
+
+
+# Conversion pool entry points (run inside worker processes)
+
+def warm_up_worker() -> None:
+    """
+    Conversion pool initializer: load MuPDF, pymupdf4llm and the fonts they use
+    by converting a tiny generated PDF (heading, body text and a ruled table),
+    so that no request pays first-use costs. Bypasses the caches.
+    """
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "Warm-up", fontsize=20)
+        page.insert_text((72, 100), "Body text before a small table.", fontsize=11)
+        for i in range(3):
+            page.draw_line((72, 120 + i * 20), (312, 120 + i * 20))
+            page.draw_line((72 + i * 120, 120), (72 + i * 120, 160))
+        for row in range(2):
+            for col in range(2):
+                page.insert_text((78 + col * 120, 134 + row * 20), f"Cell {row}{col}", fontsize=10)
+        pdf_bytes = doc.tobytes()
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pymupdf4llm.to_markdown(doc, hdr_info=pymupdf4llm.IdentifyHeaders(doc))
+
+
+def _convert_or_plan_in_worker(
+    pdf_bytes: bytes,
+    options: ConversionOptions,
+    max_batches: int
+) -> Union[ConversionResult, ConversionPlan]:
+    return pdf_converter_service.convert_or_plan(pdf_bytes, options, max_batches)
+
+
+def _plan_in_worker(pdf_bytes: bytes, options: ConversionOptions, pages_per_batch: int) -> ConversionPlan:
+    return pdf_converter_service.plan_conversion(pdf_bytes, options, pages_per_batch)
+
 
-        # Convert PDF to markdown
-        return self.convert_pdf_to_markdown(pdf_bytes)
+def _convert_batch_in_worker(
+    pdf_bytes: bytes,
+    pages: List[int],
+    hdr_info: Any,
+    options: ConversionOptions
+) -> BatchMarkdown:
+    return pdf_converter_service.convert_page_batch(pdf_bytes, pages, hdr_info, options)
 
 
 # Singleton instance
@@ -0,0 +1,465 @@
+"""Content-addressed cache of conversion results
+
+Results are keyed by the SHA-256 of the PDF bytes, the conversion options and
+the pymupdf4llm version, so a re-submitted document is served without being
+converted again, and upgrading the converter invalidates every entry.
+
+Two tiers:
+- Memory: LRU bounded by the total size of the cached markdown
+- Disk: zlib-compressed entries, capped in size, oldest entries evicted first
+  (entries are touched on every hit, so "oldest" means least recently used)
+
+The cache is shared by all teams, but whether a result came from it is only
+reported (X-Cache) to the team that stored or already received it: for any
+other team the hit looks like a miss, so it learns nothing about documents
+converted by other teams.
+
+PageCache reuses the disk tier for the markdown of individual pages, and
+FetchCache for the bodies of PDFs fetched from URLs (revalidated with
+conditional GETs).
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import fitz
+import pymupdf4llm
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Values of the X-Cache response header
+CACHE_HIT_MEMORY = "HIT-MEMORY"
+CACHE_HIT_DISK = "HIT-DISK"
+CACHE_MISS = "MISS"
+
+_ENTRY_SUFFIX = ".md.z"
+
+# (team, result) pairs remembered to report cache hits per team
+SEEN_MAX_ENTRIES = 100_000
+
+
+@dataclass
+class CachedConversion:
+    """A successful conversion, as stored in the cache"""
+    markdown: str
+    page_count: int
+    pages_converted: int
+    pages_by_mode: Dict[str, int] = field(default_factory=dict)
+    pages: Optional[List[Dict[str, Any]]] = None  # json output
+    chunks: Optional[List[Dict[str, Any]]] = None  # with chunking options
+
+    @cached_property
+    def size(self) -> int:
+        size = len(self.markdown)
+        if self.pages is not None:
+            size += len(json.dumps(self.pages, separators=(",", ":")))
+        if self.chunks is not None:
+            size += sum(len(chunk["text"]) for chunk in self.chunks)
+        return size
+
+
+class _DiskStore:
+    """
+    Directory of zlib-compressed entries, capped in size.
+
+    Safe to share between threads and between processes (the conversion
+    workers write page entries concurrently): entries are written atomically.
+    The size of the directory is tracked as entries are written; measuring it
+    and evicting (which list the whole directory) happen in a background
+    thread, when the cap is exceeded or once this process has written
+    REMEASURE_FRACTION of the cap since the last measure (to account for
+    the entries written by other processes).
+    """
+
+    REMEASURE_FRACTION = 0.05
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._used: Optional[int] = None  # None: not measured yet
+        self._written = 0  # bytes written since the last measure
+        self._maintenance: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+            os.utime(path)  # mark as recently used
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        data = zlib.compress(data, 6)
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            # Atomic: readers never see a partial entry
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            if self._used is not None:
+                self._used += len(data) - replaced
+            self._written += len(data)
+            if (
+                self._used is None
+                or self._used > self.max_bytes
+                or self._written >= self.max_bytes * self.REMEASURE_FRACTION
+            ) and (self._maintenance is None or not self._maintenance.is_alive()):
+                self._maintenance = threading.Thread(
+                    target=self._maintain, name="cache-eviction", daemon=True
+                )
+                self._maintenance.start()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def _scan(self):
+        """Yield (path, size, mtime) of the entries on disk"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def _maintain(self) -> None:
+        """
+        Measure the directory and, if it exceeds the cap, remove least
+        recently used entries down to 90% of it (background thread).
+        """
+        with self._lock:
+            written = self._written
+        entries = list(self._scan())
+        used = sum(size for _, size, _ in entries)
+
+        target = int(self.max_bytes * 0.9)
+        if used > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if used <= target:
+                    break
+                if self._remove(path):
+                    used -= size
+
+        with self._lock:
+            # Entries written during the scan may or may not have been seen:
+            # count them, the next measure corrects the estimate
+            self._written -= written
+            self._used = used + self._written
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+async def content_digest(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of a PDF"""
+    loop = asyncio.get_running_loop()
+    # hashlib releases the GIL on large buffers: hash off the event loop
+    return await loop.run_in_executor(None, lambda: hashlib.sha256(pdf_bytes).hexdigest())
+
+
+def _default_directory() -> str:
+    return settings.RESULT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "docuprocess-result-cache")
+
+
+class ResultCache:
+    """Two-tier (memory, disk) conversion result cache"""
+
+    def __init__(
+        self,
+        memory_bytes: Optional[int] = None,
+        disk_bytes: Optional[int] = None,
+        directory: Optional[str] = None,
+    ):
+        self.enabled = settings.RESULT_CACHE_ENABLED
+        self.memory_bytes = memory_bytes if memory_bytes is not None else settings.RESULT_CACHE_MEMORY_MB * 1024 * 1024
+        disk_bytes = disk_bytes if disk_bytes is not None else settings.RESULT_CACHE_DISK_MB * 1024 * 1024
+
+        self._memory: "OrderedDict[str, CachedConversion]" = OrderedDict()
+        self._memory_used = 0
+        # (team, key) pairs of the results each team stored or received
+        self._seen: "OrderedDict[Tuple[Optional[str], str], None]" = OrderedDict()
+        self._disk = _DiskStore(directory or _default_directory(), disk_bytes) if disk_bytes > 0 else None
+
+    async def key_for(self, pdf_bytes: bytes, options: Any) -> str:
+        """
+        Compute the cache key of a conversion.
+
+        Args:
+            pdf_bytes: Raw PDF file bytes
+            options: Conversion options (a dataclass)
+
+        Returns:
+            Hex digest identifying the conversion
+        """
+        return self.key_for_digest(await content_digest(pdf_bytes), options)
+
+    @staticmethod
+    def key_for_digest(pdf_digest: str, options: Any) -> str:
+        """Compute the cache key of a conversion from the content digest of the PDF"""
+        options_json = json.dumps(dataclasses.asdict(options), sort_keys=True)
+        return hashlib.sha256(
+            f"{pdf_digest}:{options_json}:{pymupdf4llm.__version__}".encode()
+        ).hexdigest()
+
+    async def get(self, key: str, team_id: Optional[str] = None) -> Tuple[Optional[CachedConversion], str]:
+        """
+        Look up a conversion, memory tier first.
+
+        Args:
+            key: Cache key (see key_for)
+            team_id: Team asking; a hit is only reported as such if this team
+                stored or already received the entry
+
+        Returns:
+            Tuple of (cached conversion or None, cache status)
+        """
+        if not self.enabled:
+            return None, CACHE_MISS
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry, self._status_for(team_id, key, CACHE_HIT_MEMORY)
+
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, self._disk.get, key)
+            if data is not None:
+                entry = CachedConversion(**json.loads(data))
+                self._put_memory(key, entry)
+                return entry, self._status_for(team_id, key, CACHE_HIT_DISK)
+
+        return None, CACHE_MISS
+
+    async def put(self, key: str, entry: CachedConversion, team_id: Optional[str] = None) -> None:
+        """Store a conversion in both tiers (disk write happens off the event loop)"""
+        if not self.enabled:
+            return
+
+        self._status_for(team_id, key, CACHE_MISS)
+        self._put_memory(key, entry)
+        if self._disk is not None:
+            data = json.dumps(dataclasses.asdict(entry)).encode()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._disk.put, key, data)
+
+    def _status_for(self, team_id: Optional[str], key: str, hit_status: str) -> str:
+        """Cache status of an entry for a team (hit_status if the team has seen it), marking it seen"""
+        seen = (team_id, key)
+        status = hit_status if seen in self._seen else CACHE_MISS
+        self._seen[seen] = None
+        self._seen.move_to_end(seen)
+        while len(self._seen) > SEEN_MAX_ENTRIES:
+            self._seen.popitem(last=False)
+        return status
+
+    def _put_memory(self, key: str, entry: CachedConversion) -> None:
+        if entry.size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous.size
+        self._memory[key] = entry
+        self._memory_used += entry.size
+
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.size
+
+
+class PageCache:
+    """
+    Markdown of individual pages, keyed by page content (see page_key).
+
+    Used inside the conversion workers, so that a re-uploaded document with a
+    few edited pages only converts those pages. Disk only: the directory is
+    shared by all worker processes.
+    """
+
+    def __init__(self, disk_bytes: Optional[int] = None, directory: Optional[str] = None):
+        disk_bytes = disk_bytes if disk_bytes is not None else settings.PAGE_CACHE_DISK_MB * 1024 * 1024
+        self.enabled = settings.RESULT_CACHE_ENABLED and disk_bytes > 0
+        self._disk = _DiskStore(directory or os.path.join(_default_directory(), "pages"), disk_bytes)
+
+    @staticmethod
+    def page_key(page: "fitz.Page", hdr_info: Any, mode: str) -> str:
+        """
+        Hash everything the markdown of a page depends on: its content stream,
+        form XObjects, fonts (with their ToUnicode maps), links and geometry,
+        plus the header levels of the font sizes used on the page, the
+        conversion mode and the converter version.
+
+        Header levels are computed over the whole selection, but only those of
+        the page's own font sizes are keyed: converting other pages along with
+        it does not change the key unless it changes how the page's text is
+        leveled.
+
+        Image pixels are not part of the key: the markdown only reflects where
+        images are drawn, which is in the content stream.
+        """
+        doc = page.parent
+        digest = hashlib.sha256()
+        digest.update(page.read_contents())
+        for xref, *_ in page.get_xobjects():
+            digest.update(doc.xref_stream_raw(xref) or b"")
+        for xref, *font in page.get_fonts():
+            digest.update(repr(font).encode())
+            kind, value = doc.xref_get_key(xref, "ToUnicode")
+            if kind == "xref":
+                digest.update(doc.xref_stream_raw(int(value.split()[0])) or b"")
+        for _, *image in page.get_images():
+            digest.update(repr(image).encode())
+        links = [(link.get("uri"), link.get("page"), tuple(link["from"])) for link in page.get_links()]
+        digest.update(repr((links, tuple(page.rect), page.rotation)).encode())
+        sizes = {
+            span["size"]
+            for block in page.get_text("dict")["blocks"]
+            for line in block.get("lines", ())
+            for span in line["spans"]
+        }
+        levels = sorted({(round(size), hdr_info.get_header_id({"size": size})) for size in sizes})
+        digest.update(repr(levels).encode())
+        digest.update(f"{mode}:{pymupdf4llm.__version__}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        data = self._disk.get(key)
+        return data.decode() if data is not None else None
+
+    def put(self, key: str, markdown: str) -> None:
+        if self.enabled:
+            self._disk.put(key, markdown.encode())
+
+
+@dataclass
+class FetchValidators:
+    """Cache validators of a fetched URL, and the digest of the body they validate"""
+    digest: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def request_headers(self) -> Dict[str, str]:
+        """Headers turning a GET into a conditional GET"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FetchCache:
+    """
+    PDFs fetched from URLs, so scheduled re-conversions of the same URL can
+    revalidate with a conditional GET instead of downloading the file again.
+
+    Validators (ETag, Last-Modified) are kept in memory per URL, bodies on
+    disk keyed by content digest. A body evicted from disk only means the
+    next fetch of its URL is unconditional.
+    """
+
+    def __init__(
+        self,
+        max_urls: Optional[int] = None,
+        disk_bytes: Optional[int] = None,
+        directory: Optional[str] = None,
+    ):
+        self.max_urls = max_urls if max_urls is not None else settings.FETCH_CACHE_MAX_URLS
+        disk_bytes = disk_bytes if disk_bytes is not None else settings.FETCH_CACHE_DISK_MB * 1024 * 1024
+        self.enabled = settings.RESULT_CACHE_ENABLED and disk_bytes > 0 and self.max_urls > 0
+        self._validators: "OrderedDict[str, FetchValidators]" = OrderedDict()
+        self._disk = _DiskStore(directory or os.path.join(_default_directory(), "fetched"), disk_bytes)
+
+    def validators(self, url: str) -> Optional[FetchValidators]:
+        """Validators of the last successful fetch of a URL, if any"""
+        if not self.enabled:
+            return None
+        validators = self._validators.get(url)
+        if validators is not None:
+            self._validators.move_to_end(url)
+        return validators
+
+    async def body(self, digest: str) -> Optional[bytes]:
+        """Cached body of a fetched PDF (read off the event loop)"""
+        if not self.enabled:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._disk.get, digest)
+
+    async def put(self, url: str, response_headers: Mapping[str, str], digest: str, pdf_bytes: bytes) -> None:
+        """
+        Remember a fetched PDF, if the response can be revalidated (has an
+        ETag or Last-Modified and is not marked no-store).
+        """
+        if not self.enabled:
+            return
+
+        etag = response_headers.get("etag")
+        last_modified = response_headers.get("last-modified")
+        if (not etag and not last_modified) or "no-store" in response_headers.get("cache-control", "").lower():
+            self._validators.pop(url, None)
+            return
+
+        self._validators[url] = FetchValidators(digest=digest, etag=etag, last_modified=last_modified)
+        self._validators.move_to_end(url)
+        while len(self._validators) > self.max_urls:
+            self._validators.popitem(last=False)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._disk.put, digest, pdf_bytes)
+
+    def forget(self, url: str) -> None:
+        self._validators.pop(url, None)
+
+
+# Singleton instances
+result_cache = ResultCache()
+page_cache = PageCache()
+fetch_cache = FetchCache()
@@ -0,0 +1,99 @@
+"""Signed webhook deliveries (conversion job notifications)
+
+Each delivery is a JSON POST signed with HMAC-SHA256, so receivers can check
+it came from us and is not a replay:
+
+    X-DocuProcess-Signature: t=<unix timestamp>,v1=<hex HMAC-SHA256 of "<t>.<body>">
+
+The target URL goes through the same SSRF checks as PDF fetches (HTTPS only,
+every resolved address vetted, connection pinned to the vetted address) and
+redirects are not followed.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.http_client import pinned_stream
+from app.services.pdf_converter_service import pdf_converter_service
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-DocuProcess-Signature"
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """Value of the signature header for a request body"""
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait after failed attempt number `attempt` (1-based): exponential, with jitter"""
+    delay = min(settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempt - 1), settings.WEBHOOK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class WebhookService:
+    """Service for sending signed webhook requests"""
+
+    async def send(
+        self,
+        url: str,
+        secret: str,
+        event: str,
+        payload: Dict[str, Any],
+        delivery_id: str,
+    ) -> Tuple[bool, Optional[str], bool]:
+        """
+        POST one signed webhook request.
+
+        Args:
+            url: Receiver URL (HTTPS only, SSRF-checked)
+            secret: Signing secret
+            event: Event name (X-DocuProcess-Event header)
+            payload: JSON body
+            delivery_id: Identifier of the delivery, identical across retries
+                (X-DocuProcess-Delivery header, lets receivers deduplicate)
+
+        Returns:
+            Tuple of (delivered, error_message, retryable)
+        """
+        address, error_msg, error_code = await pdf_converter_service.validate_url(url)
+        if address is None:
+            # Blocked targets do not become valid by retrying
+            return False, f"{error_code}: {error_msg}", False
+
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "DocuProcess-Webhooks/1",
+            "X-DocuProcess-Event": event,
+            "X-DocuProcess-Delivery": delivery_id,
+            SIGNATURE_HEADER: sign_payload(secret, int(time.time()), body),
+        }
+
+        try:
+            async with pinned_stream(
+                "POST",
+                url,
+                address,
+                headers=headers,
+                content=body,
+                timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+            ) as response:
+                # The response body is not needed
+                if 200 <= response.status_code < 300:
+                    return True, None, True
+                return False, f"HTTP {response.status_code}", True
+        except Exception as e:
+            return False, f"{type(e).__name__}: {e}", True
+
+
+# Singleton instance
+webhook_service = WebhookService()
@@ -0,0 +1,46 @@
+"""Tests for admission control: shed requests get the OVERLOADED envelope"""
+
+import pytest
+
+from app.services.admission_service import AdmissionInfo, admission_service
+
+
+def _info(allowed: bool) -> AdmissionInfo:
+    return AdmissionInfo(
+        workers=2,
+        running_jobs=2,
+        queued_jobs=6,
+        running_pages=40,
+        queued_pages=120,
+        average_page_seconds=0.5,
+        backlog_seconds=30.0,
+        estimated_wait_seconds=37.5,
+        allowed=allowed,
+        retry_after=38,
+    )
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    monkeypatch.setattr(admission_service, "check", lambda: _info(allowed=False))
+
+
+class TestCheckAdmission:
+    """Shedding before any credit is used"""
+
+    def test_shed_request_gets_error_envelope(
+        self, client, mock_auth, mock_rate_limit, mock_credits_available, overloaded
+    ):
+        response = client.post(
+            "/v1/convert/pdf-to-markdown",
+            json={"url": "https://example.com/document.pdf"},
+            headers={"x-api-key": "sk_test"},
+        )
+
+        assert response.status_code == 503
+        body = response.json()
+        assert body["success"] is False
+        assert body["code"] == "OVERLOADED"
+        assert response.headers["retry-after"] == "38"
+        assert response.headers["x-estimated-wait-seconds"] == "37.5"
+        mock_credits_available.assert_not_called()
@@ -0,0 +1,128 @@
+"""Tests for chunking converted markdown: segmentation, packing, overlap"""
+
+from app.core.chunking import (
+    SEP_BLOCK,
+    SEP_LINE,
+    SEP_SENTENCE,
+    ChunkingOptions,
+    ChunkPacker,
+    chunk_pages,
+    count_tokens,
+    segment_page,
+)
+
+
+def _sentences(count: int, words: int = 5) -> str:
+    """A paragraph of `count` sentences of `words` short words (one token each)"""
+    return " ".join("Word " + " ".join(["word"] * (words - 2)) + f" s{i}." for i in range(count))
+
+
+class TestCountTokens:
+    """Tokenizer-free token estimate"""
+
+    def test_words_and_punctuation(self):
+        assert count_tokens("Hello, world!") == 4
+
+    def test_long_words_count_per_six_characters(self):
+        assert count_tokens("internationalization") == 4
+
+    def test_whitespace_is_free(self):
+        assert count_tokens("  a \n\n b\t") == 2
+        assert count_tokens("") == 0
+
+
+class TestSegmentPage:
+    """Splitting one page into segments"""
+
+    def test_headings_sentences_and_lines(self):
+        markdown = "# Title\n\nFirst sentence. Second one!\n\n- item one\n- item two\n\n| a | b |\n|---|---|"
+        segments = segment_page(markdown, page=3, max_tokens=100)
+
+        assert [(s.text, s.level, s.sep) for s in segments] == [
+            ("# Title", 1, SEP_BLOCK),
+            ("First sentence.", 0, SEP_BLOCK),
+            ("Second one!", 0, SEP_SENTENCE),
+            ("- item one", 0, SEP_BLOCK),
+            ("- item two", 0, SEP_LINE),
+            ("| a | b |", 0, SEP_BLOCK),
+            ("|---|---|", 0, SEP_LINE),
+        ]
+        assert all(s.page == 3 for s in segments)
+        # The heading marker is not counted
+        assert segments[0].tokens == 1
+
+    def test_oversized_sentence_is_split_at_words(self):
+        sentence = " ".join(f"w{i}" for i in range(30)) + "."
+        segments = segment_page(sentence, page=1, max_tokens=20)
+
+        assert len(segments) > 1
+        assert all(s.tokens <= 10 for s in segments)
+        assert " ".join(s.text for s in segments) == sentence
+
+    def test_blank_page(self):
+        assert segment_page("\n\n  \n", page=1, max_tokens=100) == []
+
+
+class TestChunkPacker:
+    """Packing segments into chunks under the token budget"""
+
+    def test_chunks_stay_within_budget_with_overlap(self):
+        segments = segment_page(_sentences(12), page=1, max_tokens=30)
+        chunks = chunk_pages([segments], ChunkingOptions(max_tokens=30, overlap_tokens=10))
+
+        assert len(chunks) > 1
+        assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+        assert all(chunk["tokens"] <= 30 for chunk in chunks)
+        # Each chunk starts with the last sentence of the previous one
+        for previous, chunk in zip(chunks, chunks[1:]):
+            last_sentence = previous["text"].rsplit(". ", 1)[-1]
+            assert chunk["text"].startswith(last_sentence)
+        # Every sentence is in some chunk
+        text = " ".join(chunk["text"] for chunk in chunks)
+        assert all(f"s{i}." in text for i in range(12))
+
+    def test_overlap_is_capped_at_half_the_budget(self):
+        packer = ChunkPacker(ChunkingOptions(max_tokens=20, overlap_tokens=50))
+        assert packer.overlap_tokens == 10
+
+    def test_headings_start_chunks_and_give_their_path(self):
+        page_one = segment_page("# Guide\n\n## Install\n\n" + _sentences(2), page=1, max_tokens=100)
+        page_two = segment_page("## Usage\n\n" + _sentences(1) + "\n\n### Options\n\n" + _sentences(1), page=2, max_tokens=100)
+        chunks = chunk_pages([page_one, page_two], ChunkingOptions(max_tokens=100, overlap_tokens=20))
+
+        assert [chunk["headings"] for chunk in chunks] == [
+            ["Guide", "Install"],
+            ["Guide", "Usage"],
+            ["Guide", "Usage", "Options"],
+        ]
+        assert chunks[0]["text"].startswith("# Guide\n\n## Install\n\nWord")
+        # No overlap across sections
+        assert chunks[1]["text"].startswith("## Usage")
+        assert [(chunk["page_start"], chunk["page_end"]) for chunk in chunks] == [(1, 1), (2, 2), (2, 2)]
+
+    def test_chunk_spans_pages(self):
+        pages = [segment_page(_sentences(1), page=number, max_tokens=100) for number in (1, 2, 3)]
+        (chunk,) = chunk_pages(pages, ChunkingOptions(max_tokens=100))
+
+        assert (chunk["page_start"], chunk["page_end"]) == (1, 3)
+        assert chunk["text"].count("\n\n") == 2
+
+    def test_chunks_are_returned_as_pages_complete(self):
+        packer = ChunkPacker(ChunkingOptions(max_tokens=12, overlap_tokens=0))
+        assert packer.add(segment_page(_sentences(2), page=1, max_tokens=12)) == []
+        completed = packer.add(segment_page(_sentences(1), page=2, max_tokens=12))
+        assert len(completed) == 1
+        assert completed[0]["page_end"] == 1
+
+        (last,) = packer.finish()
+        assert (last["page_start"], last["page_end"]) == (2, 2)
+
+    def test_trailing_heading_is_its_own_chunk(self):
+        pages = [segment_page(_sentences(1) + "\n\n## Appendix", page=1, max_tokens=100)]
+        chunks = chunk_pages(pages, ChunkingOptions(max_tokens=100))
+
+        assert chunks[-1]["text"] == "## Appendix"
+        assert chunks[-1]["headings"] == ["Appendix"]
+
+    def test_no_segments_no_chunks(self):
+        assert chunk_pages([[], []], ChunkingOptions()) == []
@@ -0,0 +1,149 @@
+"""Tests for response compression: content coding negotiation, middleware"""
+
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+DECOMPRESS = {
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+    "br": brotli.decompress,
+    "gzip": gzip.decompress,
+}
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, "CODINGS", {"gzip": None})
+
+
+class TestNegotiateEncoding:
+    """Accept-Encoding handling"""
+
+    def test_all_codings_are_available(self):
+        # brotli and zstandard are dependencies: all three codings can be produced
+        assert list(compression.CODINGS) == ["zstd", "br", "gzip"]
+
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("GZIP", "gzip"),
+            ("*", "zstd"),
+            ("deflate", None),
+            ("", None),
+            ("identity", None),
+        ],
+    )
+    def test_server_preference_breaks_ties(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding) == expected
+
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip;q=1.0, br;q=0.5, zstd;q=0.1", "gzip"),
+            ("br;q=0.9, gzip;q=0.9", "br"),
+            ("zstd;q=0, br", "br"),
+            ("*;q=0.5, gzip;q=1", "gzip"),
+            ("*, zstd;q=0", "br"),
+            ("gzip; q=0.8 , br ; Q=0.9", "br"),
+        ],
+    )
+    def test_q_values(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding) == expected
+
+    @pytest.mark.parametrize("accept_encoding", ["gzip;q=0", "*;q=0", "gzip;q=abc", "br, zstd"])
+    def test_nothing_acceptable(self, gzip_only, accept_encoding):
+        assert negotiate_encoding(accept_encoding) is None
+
+    def test_only_available_codings_are_picked(self, gzip_only):
+        assert negotiate_encoding("zstd, br, gzip;q=0.1") == "gzip"
+
+
+@pytest.fixture
+def compressed_client(monkeypatch):
+    monkeypatch.setattr(compression.settings, "COMPRESSION_ENABLED", True)
+    monkeypatch.setattr(compression.settings, "COMPRESSION_MIN_BYTES", 1024)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/large")
+    def large():
+        return JSONResponse({"markdown": "# Title\n\nSome text. " * 500})
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i}\n" * 500 for i in range(3)), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+class TestCompressionMiddleware:
+    """Which responses are compressed"""
+
+    @pytest.mark.parametrize(
+        "accept_encoding, coding",
+        [("gzip, deflate, br, zstd", "zstd"), ("gzip, deflate, br", "br"), ("gzip", "gzip")],
+    )
+    def test_large_json_is_compressed(self, compressed_client, accept_encoding, coding):
+        with compressed_client.stream("GET", "/large", headers={"Accept-Encoding": accept_encoding}) as response:
+            body = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == coding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(body)
+        assert DECOMPRESS[coding](body).startswith(b'{"markdown":"# Title')
+
+    @pytest.mark.parametrize("coding", ["zstd", "br", "gzip"])
+    def test_compressed_body_decodes_to_the_original(self, compressed_client, coding):
+        with compressed_client.stream("GET", "/large", headers={"Accept-Encoding": coding}) as response:
+            body = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == coding
+        assert DECOMPRESS[coding](body) == compressed_client.get("/large", headers={"Accept-Encoding": "identity"}).content
+
+    def test_small_or_unaccepted_responses_are_sent_as_is(self, compressed_client):
+        assert "content-encoding" not in compressed_client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in compressed_client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+    @pytest.mark.parametrize(
+        "path, accept_encoding",
+        [("/small", "gzip"), ("/large", "identity"), ("/large", "")],
+    )
+    def test_uncompressed_variants_vary_on_accept_encoding(self, compressed_client, path, accept_encoding):
+        response = compressed_client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    def test_incompressible_content_type_has_no_vary(self, compressed_client):
+        response = compressed_client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert "vary" not in response.headers
+
+    def test_streamed_response_is_not_compressed(self, compressed_client):
+        with compressed_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            body = b"".join(response.iter_raw())
+
+        assert "content-encoding" not in response.headers
+        assert body.startswith(b"0\n")
+        with pytest.raises(gzip.BadGzipFile):
+            gzip.decompress(body)
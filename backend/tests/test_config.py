@@ -0,0 +1,19 @@
+"""Tests for settings validation"""
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+
+class TestConversionJobBackends:
+    """Cloud Tasks jobs need a store shared by all instances"""
+
+    def test_cloud_tasks_with_memory_store_is_rejected(self):
+        with pytest.raises(ValidationError, match="requires CONVERSION_JOB_STORE=supabase"):
+            Settings(_env_file=None, CONVERSION_JOB_QUEUE="cloud_tasks", CONVERSION_JOB_STORE="memory")
+
+    @pytest.mark.parametrize("queue, store", [("cloud_tasks", "supabase"), ("local", "memory"), ("local", "supabase")])
+    def test_supported_combinations(self, queue, store):
+        settings = Settings(_env_file=None, CONVERSION_JOB_QUEUE=queue, CONVERSION_JOB_STORE=store)
+        assert (settings.CONVERSION_JOB_QUEUE, settings.CONVERSION_JOB_STORE) == (queue, store)
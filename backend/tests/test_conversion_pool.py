@@ -0,0 +1,337 @@
+"""Tests for the conversion worker pool: fair scheduling, load and cancellation"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.conversion_pool import (
+    ConversionMemoryError,
+    ConversionPool,
+    ConversionTeam,
+    ConversionTimeoutError,
+)
+
+
+TEAM_A = ConversionTeam("team-a", 4)
+TEAM_B = ConversionTeam("team-b", 1)
+
+
+def _allocate(mb: int) -> int:
+    """Worker job: hold `mb` MB of touched memory for a while"""
+    data = b"x" * (mb * 1024 * 1024)
+    time.sleep(5)
+    return len(data)
+
+
+def _hang_on_first_warm_up() -> None:
+    """Worker initializer: the first worker to run it never finishes warming up"""
+    marker = os.environ["POOL_TEST_WARM_UP_MARKER"]
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(60)
+
+
+def _pool_with_fake_workers(size: int, max_jobs_per_team: int) -> ConversionPool:
+    """A pool whose idle workers are placeholders (scheduling only, no processes)"""
+    pool = ConversionPool(size=size, max_jobs_per_team=max_jobs_per_team)
+    pool._idle.extend(object() for _ in range(size))
+    return pool
+
+
+async def _hold_and_release(pool: ConversionPool, team: ConversionTeam, served: list) -> None:
+    """Acquire a worker, record the team, give it back the way run() does"""
+    worker = await pool._acquire(team)
+    served.append(team.team_id)
+    await asyncio.sleep(0)
+    pool._release(worker)
+    pool._job_done(team)
+
+
+class TestScheduling:
+    """Stride scheduling across teams"""
+
+    async def test_busy_pool_is_shared_by_weight(self):
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        served = []
+        tasks = [
+            asyncio.ensure_future(_hold_and_release(pool, team, served))
+            for _ in range(8)
+            for team in (TEAM_A, TEAM_B)
+        ]
+        await asyncio.gather(*tasks)
+
+        # Weight 4 against 1: team A gets about 4 of the first 5 workers
+        assert served[:5].count("team-a") >= 3
+        assert served.count("team-a") == served.count("team-b") == 8
+        assert pool.running == 0
+        assert pool.queued == 0
+        assert len(pool._idle) == 1
+        assert pool._queues == {}
+
+    async def test_team_is_capped_below_pool_size(self):
+        pool = _pool_with_fake_workers(size=3, max_jobs_per_team=2)
+        held = [asyncio.ensure_future(pool._acquire(TEAM_A)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        assert sum(task.done() for task in held) == 2
+        assert pool.queued == 1
+        # The third worker stays free for another team
+        worker = await asyncio.wait_for(pool._acquire(TEAM_B), timeout=1)
+        assert worker is not None
+
+        for task in held:
+            task.cancel()
+        await asyncio.gather(*held, return_exceptions=True)
+
+    async def test_cancelled_waiter_is_removed(self):
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        worker = await pool._acquire(TEAM_A)
+        waiting = asyncio.ensure_future(pool._acquire(TEAM_B))
+        await asyncio.sleep(0)
+        assert pool.queued == 1
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert pool.queued == 0
+
+        pool._release(worker)
+        pool._job_done(TEAM_A)
+        assert len(pool._idle) == 1
+        assert pool._queues == {}
+
+    async def test_worker_released_with_cancelled_waiter_in_queue(self):
+        """A worker freed in the same step as the waiter's cancellation goes back to idle"""
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        worker = await pool._acquire(TEAM_A)
+        waiting = asyncio.ensure_future(pool._acquire(TEAM_B))
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        pool._release(worker)  # before the waiting task has handled its cancellation
+        pool._job_done(TEAM_A)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert len(pool._idle) == 1
+        assert pool.running == 0
+        assert pool.queued == 0
+
+
+class TestLoad:
+    """Page accounting and wait estimates"""
+
+    async def test_pages_move_from_queued_to_running(self):
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        worker = await pool._acquire(TEAM_A, pages=10)
+        waiting = asyncio.ensure_future(pool._acquire(TEAM_B, pages=4))
+        await asyncio.sleep(0)
+        assert (pool.running_pages, pool.queued_pages) == (10, 4)
+
+        pool._release(worker)
+        pool._job_done(TEAM_A, pages=10)
+        worker = await waiting
+        assert (pool.running_pages, pool.queued_pages) == (4, 0)
+
+        pool._release(worker)
+        pool._job_done(TEAM_B, pages=4)
+        assert (pool.running_pages, pool.queued_pages) == (0, 0)
+
+    async def test_cancelled_waiter_takes_its_pages(self):
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        worker = await pool._acquire(TEAM_A, pages=3)
+        waiting = asyncio.ensure_future(pool._acquire(TEAM_B, pages=7))
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert pool.queued_pages == 0
+
+        pool._release(worker)
+        pool._job_done(TEAM_A, pages=3)
+
+    async def test_wait_is_estimated_from_pages(self):
+        pool = _pool_with_fake_workers(size=1, max_jobs_per_team=1)
+        pool._page_seconds = 0.5
+        assert pool.estimated_wait_seconds(TEAM_A) == 0.0
+
+        worker = await pool._acquire(TEAM_A, pages=10)
+        waiting = asyncio.ensure_future(pool._acquire(TEAM_A, pages=4))
+        await asyncio.sleep(0)
+
+        # Half of the running job (10 pages), then the 4 queued pages
+        assert pool.estimated_wait_seconds(TEAM_A) == pytest.approx(10 * 0.5 / 2 + 4 * 0.5)
+        assert pool.backlog_seconds == pytest.approx(4 * 0.5)
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        pool._release(worker)
+        pool._job_done(TEAM_A, pages=10)
+
+
+@pytest.mark.slow
+class TestRun:
+    """Jobs run in worker processes"""
+
+    async def test_result_and_error_come_back_from_the_worker(self):
+        pool = ConversionPool(size=1, timeout=10)
+        await pool.start()
+        try:
+            assert await pool.run(os.getpid) != os.getpid()
+            with pytest.raises(ValueError, match="invalid literal"):
+                await pool.run(int, "not a number")
+            # The worker survives a failed job
+            assert await pool.run(abs, -7) == 7
+            assert pool.running == 0
+        finally:
+            await pool.stop()
+
+    async def test_jobs_run_in_parallel_up_to_the_pool_size(self):
+        pool = ConversionPool(size=2, timeout=10, max_jobs_per_team=2)
+        await pool.start()
+        try:
+            started = time.monotonic()
+            await asyncio.gather(*(pool.run(time.sleep, 1) for _ in range(4)))
+            elapsed = time.monotonic() - started
+
+            # Two rounds of two jobs
+            assert 2 <= elapsed < 3.5
+        finally:
+            await pool.stop()
+
+    async def test_event_loop_is_free_during_a_job(self):
+        pool = ConversionPool(size=1, timeout=10)
+        await pool.start()
+        try:
+            job = asyncio.ensure_future(pool.run(time.sleep, 1))
+            ticks = 0
+            while not job.done():
+                await asyncio.sleep(0.05)
+                ticks += 1
+            assert ticks >= 10
+        finally:
+            await pool.stop()
+
+
+@pytest.mark.slow
+class TestCancellation:
+    """Cancelling jobs on real worker processes"""
+
+    async def test_cancel_running_and_queued_jobs_together(self):
+        pool = ConversionPool(size=1, timeout=10, max_jobs_per_team=1)
+        await pool.start()
+        try:
+            running = asyncio.ensure_future(pool.run(time.sleep, 5))
+            while pool.running == 0:
+                await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(pool.run(abs, -3))
+            await asyncio.sleep(0.05)
+            assert pool.queued == 1
+
+            # As when a stream is closed or a batch fails: both at once
+            running.cancel()
+            queued.cancel()
+            for task in (running, queued):
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+
+            assert pool.running == 0
+            assert pool.queued == 0
+            assert len(pool._idle) == 1
+            # The pool still serves jobs
+            assert await asyncio.wait_for(pool.run(abs, -2), timeout=30) == 2
+        finally:
+            await pool.stop()
+
+
+@pytest.mark.slow
+class TestWarmUp:
+    """Readiness when worker warm-up fails"""
+
+    async def test_pool_is_not_ready_until_stuck_worker_is_replaced(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("POOL_TEST_WARM_UP_MARKER", str(tmp_path / "warmed"))
+        pool = ConversionPool(size=2, timeout=3, max_jobs_per_team=2)
+        await pool.start(initializer=_hang_on_first_warm_up)
+        try:
+            # One worker timed out: the other one serves, the replacement warms up
+            assert not pool.ready
+            assert len(pool._idle) == 1
+            assert await asyncio.wait_for(pool.run(abs, -1), timeout=30) == 1
+
+            for _ in range(300):
+                if pool.ready:
+                    break
+                await asyncio.sleep(0.1)
+            assert pool.ready
+            assert len(pool._idle) == 2
+            assert len(pool._workers) == 2
+        finally:
+            await pool.stop()
+
+    async def test_stop_while_warming_up(self, tmp_path, monkeypatch):
+        marker = tmp_path / "warmed"
+        monkeypatch.setenv("POOL_TEST_WARM_UP_MARKER", str(marker))
+        pool = ConversionPool(size=1, timeout=1)
+        await pool.start(initializer=_hang_on_first_warm_up)
+        marker.unlink()  # the replacement hangs too
+
+        assert not pool.ready
+        await asyncio.wait_for(pool.stop(), timeout=15)
+        assert not pool.started
+
+
+@pytest.mark.slow
+class TestLimits:
+    """Time and memory limits kill the worker, which is replaced"""
+
+    async def test_job_over_its_time_limit(self):
+        pool = ConversionPool(size=1, timeout=10)
+        await pool.start()
+        try:
+            (worker,) = pool._workers
+            with pytest.raises(ConversionTimeoutError):
+                await pool.run(time.sleep, 5, timeout=0.5)
+
+            assert not worker.process.is_alive()
+            assert worker not in pool._workers
+            assert len(pool._workers) == 1
+            assert await asyncio.wait_for(pool.run(abs, -4), timeout=30) == 4
+        finally:
+            await pool.stop()
+
+    async def test_deadline_shared_by_jobs(self):
+        pool = ConversionPool(size=1, timeout=10)
+        await pool.start()
+        try:
+            deadline = asyncio.get_running_loop().time() + 0.5
+            with pytest.raises(ConversionTimeoutError):
+                await pool.run(time.sleep, 5, deadline=deadline)
+            with pytest.raises(ConversionTimeoutError, match="deadline passed"):
+                await pool.run(abs, -1, deadline=deadline)
+        finally:
+            await pool.stop()
+
+    async def test_job_over_the_memory_limit(self):
+        pool = ConversionPool(size=1, timeout=30, max_rss_mb=300)
+        await pool.start()
+        try:
+            with pytest.raises(ConversionMemoryError):
+                await pool.run(_allocate, 600)
+
+            assert len(pool._workers) == 1
+            assert await asyncio.wait_for(pool.run(abs, -5), timeout=30) == 5
+        finally:
+            await pool.stop()
+
+    async def test_worker_is_recycled_after_max_jobs(self):
+        pool = ConversionPool(size=1, timeout=10, max_jobs_per_worker=2)
+        await pool.start()
+        try:
+            pids = [await pool.run(os.getpid) for _ in range(3)]
+
+            assert pids[0] == pids[1] != pids[2]
+        finally:
+            await pool.stop()
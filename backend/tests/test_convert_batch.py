@@ -0,0 +1,136 @@
+"""Tests for batch conversions: credit reservation and refund, time limit"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.models.convert import BatchConvertRequest
+from app.routers.v1.convert import convert_pdf_batch_to_markdown
+from app.services.pdf_converter_service import ConversionResult
+
+
+@pytest.fixture
+def refund():
+    with patch("app.services.credit_service.credit_service.refund_credit", new_callable=AsyncMock) as mock:
+        yield mock
+
+
+@pytest.fixture
+def converter():
+    """Items convert instantly, except "slow" (never ends), "missing" (fails) and "broken" (raises) URLs"""
+    timeouts = []
+
+    async def convert(url=None, pdf_base64=None, options=None, timeout=None):
+        timeouts.append(timeout)
+        if "slow" in url:
+            await asyncio.sleep(3600)
+        if "missing" in url:
+            return ConversionResult(success=False, error="HTTP error 404 fetching PDF", error_code="URL_FETCH_FAILED")
+        if "broken" in url:
+            raise RuntimeError("converter bug")
+        return ConversionResult(success=True, markdown=f"# {url}", page_count=1, pages_converted=1)
+
+    with patch("app.routers.v1.convert.pdf_converter_service.convert", side_effect=convert):
+        yield timeouts
+
+
+async def _batch(user, rate_limit, urls, accept=None):
+    request = BatchConvertRequest(items=[{"id": str(i), "url": url} for i, url in enumerate(urls)], mode="fast")
+    return await convert_pdf_batch_to_markdown(request=request, accept=accept, user=user, rate_limit=rate_limit)
+
+
+class TestBatchCredits:
+    """One deduction for the whole batch, one refund for the failed items"""
+
+    async def test_failed_items_are_refunded_together(
+        self, converter, refund, mock_user, mock_rate_limit, mock_credits_available
+    ):
+        urls = ["https://example.com/a.pdf", "https://example.com/missing.pdf", "https://example.com/broken.pdf"]
+        response = await _batch(mock_user, mock_rate_limit, urls)
+        body = json.loads(response.body)
+
+        mock_credits_available.assert_awaited_once()
+        assert mock_credits_available.await_args.kwargs["amount"] == 3
+        refund.assert_awaited_once()
+        assert refund.await_args.kwargs["amount"] == 2
+        assert refund.await_args.kwargs["resource_id"] == mock_credits_available.await_args.kwargs["resource_id"]
+
+        assert body["success"] is False
+        assert [item["code"] for item in body["items"]] == [None, "URL_FETCH_FAILED", "CONVERSION_FAILED"]
+        assert [item["id"] for item in body["items"]] == ["0", "1", "2"]
+        # 29 left after reserving 3, 2 of them refunded
+        assert (body["credits_used"], body["remaining_credits"]) == (1, 31)
+
+    async def test_successful_batch_is_not_refunded(
+        self, converter, refund, mock_user, mock_rate_limit, mock_credits_available
+    ):
+        response = await _batch(mock_user, mock_rate_limit, ["https://example.com/a.pdf", "https://example.com/b.pdf"])
+        body = json.loads(response.body)
+
+        assert body["success"] is True
+        assert body["credits_used"] == 2
+        refund.assert_not_awaited()
+
+    async def test_insufficient_credits_for_the_whole_batch(
+        self, converter, refund, mock_user, mock_rate_limit, mock_credits_unavailable
+    ):
+        response = await _batch(mock_user, mock_rate_limit, ["https://example.com/a.pdf"] * 3)
+
+        assert response.status_code == 402
+        assert json.loads(response.body)["code"] == "INSUFFICIENT_CREDITS"
+        assert converter == []
+        refund.assert_not_awaited()
+
+    async def test_streamed_batch_refunds_unfinished_items_when_closed(
+        self, converter, refund, mock_user, mock_rate_limit, mock_credits_available
+    ):
+        urls = ["https://example.com/a.pdf", "https://example.com/slow.pdf", "https://example.com/slow.pdf"]
+        response = await _batch(mock_user, mock_rate_limit, urls, accept="application/x-ndjson")
+        events = response.body_iterator
+
+        first = json.loads(await events.__anext__())
+        assert (first["index"], first["success"]) == (0, True)
+        await events.aclose()
+
+        refund.assert_awaited_once()
+        assert refund.await_args.kwargs["amount"] == 2
+
+
+class TestBatchTimeLimit:
+    """Items not done within BATCH_TIMEOUT_SECONDS fail and are refunded"""
+
+    async def test_slow_items_time_out(
+        self, converter, refund, monkeypatch, mock_user, mock_rate_limit, mock_credits_available
+    ):
+        monkeypatch.setattr(settings, "BATCH_TIMEOUT_SECONDS", 0.2)
+        monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 2)
+        urls = ["https://example.com/a.pdf", "https://example.com/slow.pdf", "https://example.com/b.pdf"]
+
+        response = await asyncio.wait_for(_batch(mock_user, mock_rate_limit, urls), timeout=5)
+        body = json.loads(response.body)
+
+        assert [item["success"] for item in body["items"]] == [True, False, True]
+        assert body["items"][1]["code"] == "CONVERSION_TIMEOUT"
+        assert (body["succeeded"], body["failed"], body["credits_used"]) == (2, 1, 2)
+        refund.assert_awaited_once()
+        assert refund.await_args.kwargs["amount"] == 1
+        # Each conversion gets at most the time left in the batch
+        assert all(0 < timeout <= 0.2 for timeout in converter)
+
+    async def test_items_still_queued_at_the_deadline_time_out(
+        self, converter, refund, monkeypatch, mock_user, mock_rate_limit, mock_credits_available
+    ):
+        monkeypatch.setattr(settings, "BATCH_TIMEOUT_SECONDS", 0.2)
+        monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 1)
+        urls = ["https://example.com/slow.pdf", "https://example.com/a.pdf"]
+
+        response = await asyncio.wait_for(_batch(mock_user, mock_rate_limit, urls), timeout=5)
+        body = json.loads(response.body)
+
+        assert [item["code"] for item in body["items"]] == ["CONVERSION_TIMEOUT", "CONVERSION_TIMEOUT"]
+        # The queued item never started
+        assert len(converter) == 1
+        assert refund.await_args.kwargs["amount"] == 2
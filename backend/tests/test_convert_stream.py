@@ -0,0 +1,73 @@
+"""Tests for the streaming conversion endpoint: credit refund when the client disconnects"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.convert import PdfToMarkdownStreamRequest
+from app.routers.v1.convert import convert_pdf_to_markdown_stream
+from app.services.pdf_converter_service import ConversionOptions
+
+
+def _page(number: int) -> SimpleNamespace:
+    return SimpleNamespace(page=number, markdown=f"# Page {number}", elapsed_ms=10, cached=False, mode="fast")
+
+
+@pytest.fixture
+def slow_stream():
+    """A 2-page conversion whose second page never comes; yields the refund mock"""
+    async def load_pdf(*args, **kwargs):
+        return b"%PDF", None, None
+
+    async def plan_stream(pdf_bytes, options):
+        return SimpleNamespace(options=ConversionOptions(), page_count=2, pages_converted=2)
+
+    async def stream_pages(pdf_bytes, plan):
+        yield _page(1)
+        await asyncio.sleep(3600)
+        yield _page(2)
+
+    with patch("app.routers.v1.convert.pdf_converter_service") as converter, \
+            patch("app.services.credit_service.credit_service.refund_credit", new_callable=AsyncMock) as refund:
+        converter.load_pdf = load_pdf
+        converter.plan_stream = plan_stream
+        converter.stream_pages = stream_pages
+        yield refund
+
+
+async def _open_stream(user, rate_limit):
+    response = await convert_pdf_to_markdown_stream(
+        request=PdfToMarkdownStreamRequest(pdf_base64="JVBERg=="),
+        accept=None,
+        user=user,
+        rate_limit=rate_limit,
+    )
+    events = response.body_iterator
+    first = await events.__anext__()
+    assert '"page":1' in first
+    return events
+
+
+class TestStreamDisconnect:
+    """The credit is refunded when the stream ends before the conversion completes"""
+
+    async def test_cancelled_while_converting(self, slow_stream, mock_user, mock_rate_limit, mock_credits_available):
+        events = await _open_stream(mock_user, mock_rate_limit)
+
+        pending = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+
+        slow_stream.assert_awaited_once()
+        assert slow_stream.await_args.kwargs["amount"] == 1
+
+    async def test_closed_between_events(self, slow_stream, mock_user, mock_rate_limit, mock_credits_available):
+        events = await _open_stream(mock_user, mock_rate_limit)
+
+        await events.aclose()
+
+        slow_stream.assert_awaited_once()
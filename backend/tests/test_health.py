@@ -0,0 +1,15 @@
+"""Tests for the health check: 503 until the conversion workers are warm"""
+
+from app.services.conversion_pool import conversion_pool
+
+
+class TestHealth:
+    """Readiness of the conversion pool"""
+
+    def test_starting_until_pool_is_ready(self, client, monkeypatch):
+        monkeypatch.setattr(conversion_pool, "_ready", False)
+        response = client.get("/health")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "starting"
+        assert response.json()["checks"]["conversion_workers"] == "warming_up"
@@ -0,0 +1,106 @@
+"""Tests for the outbound HTTP clients: shared pools per hostname, per-host request slots"""
+
+import asyncio
+import ipaddress
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.core.http_client import _HostLimiter, pinned_stream
+
+
+SHARED_ADDRESS = ipaddress.ip_address("93.184.216.34")
+
+
+@pytest.fixture
+def mock_clients(monkeypatch):
+    """Replace the clients with mock transports; yields the requests each client sent"""
+    sent = []
+
+    def create_client(http2: bool) -> httpx.AsyncClient:
+        requests = []
+        sent.append(requests)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=b"ok")
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(http_client, "_create_client", create_client)
+    monkeypatch.setattr(http_client, "_clients", None)
+    yield sent
+
+
+async def _fetch(url: str) -> None:
+    async with pinned_stream("GET", url, SHARED_ADDRESS) as response:
+        await response.aread()
+
+
+class TestPinnedStream:
+    """pinned_stream connection pooling"""
+
+    async def test_hostnames_on_one_address_do_not_share_connections(self, mock_clients):
+        await _fetch("https://a.example.com/one.pdf")
+        await _fetch("https://b.example.com/two.pdf")
+        await _fetch("https://a.example.com/three.pdf")
+
+        # One pool per hostname, reused for the same hostname
+        assert len(mock_clients) == 2
+        pool_a, pool_b = mock_clients
+        assert [r.url.path for r in pool_a] == ["/one.pdf", "/three.pdf"]
+        assert [r.url.path for r in pool_b] == ["/two.pdf"]
+
+        for pool, hostname in ((pool_a, "a.example.com"), (pool_b, "b.example.com")):
+            for request in pool:
+                assert request.url.host == str(SHARED_ADDRESS)
+                assert request.headers["host"] == hostname
+                assert request.extensions["sni_hostname"] == hostname
+
+        await http_client.close_http_client()
+
+    async def test_idle_pools_beyond_the_limit_are_closed(self, mock_clients, monkeypatch):
+        monkeypatch.setattr(http_client.settings, "OUTBOUND_MAX_POOLED_HOSTS", 2)
+        for host in ("a", "b", "c"):
+            await _fetch(f"https://{host}.example.com/doc.pdf")
+
+        assert list(http_client._host_clients()._clients) == ["b.example.com", "c.example.com"]
+        await http_client.close_http_client()
+
+    async def test_client_is_shared_until_closed(self, mock_clients):
+        await http_client.start_http_client()
+        clients = http_client._clients
+        await http_client.start_http_client()
+        assert http_client._clients is clients
+
+        await _fetch("https://a.example.com/one.pdf")
+        await _fetch("https://a.example.com/two.pdf")
+        client = clients._clients["a.example.com"][0]
+        assert len(mock_clients) == 1
+
+        await http_client.close_http_client()
+        assert http_client._clients is None
+        assert client.is_closed
+
+
+class TestHostSlot:
+    """Concurrent requests per host are capped"""
+
+    async def test_requests_beyond_the_limit_wait(self):
+        limiter = _HostLimiter(2)
+        running = []
+        peak = {"a.example.com": 0, "b.example.com": 0}
+
+        async def request(host: str) -> None:
+            async with limiter.slot(host):
+                running.append(host)
+                peak[host] = max(peak[host], running.count(host))
+                await asyncio.sleep(0.01)
+                running.remove(host)
+
+        await asyncio.gather(*(request(host) for host in ["a.example.com"] * 5 + ["b.example.com"] * 2))
+
+        assert peak == {"a.example.com": 2, "b.example.com": 2}
+        # Hosts without requests are forgotten
+        assert limiter._hosts == {}
@@ -0,0 +1,123 @@
+"""Tests for PDF inspection: page signals and conversion estimates"""
+
+import base64
+
+import fitz
+import pytest
+
+from app.core.config import settings
+from app.services import pdf_converter_service as converter_module
+from app.services.pdf_converter_service import (
+    ESTIMATE_SECONDS_PER_PAGE,
+    ESTIMATE_SECONDS_PER_PATH,
+    PageInspection,
+    pdf_converter_service,
+)
+
+
+def _pdf(encrypt: bool = False) -> bytes:
+    """Three pages: text, text with a ruled table (6 lines), a full-page scan"""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "Plain text page", fontsize=11)
+
+        page = doc.new_page()
+        page.insert_text((72, 72), "Table page", fontsize=11)
+        for i in range(3):
+            page.draw_line((72, 120 + i * 20), (312, 120 + i * 20))
+            page.draw_line((72 + i * 120, 120), (72 + i * 120, 160))
+
+        page = doc.new_page()
+        pixmap = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 8, 8), False)
+        page.insert_image(page.rect, pixmap=pixmap)
+
+        if encrypt:
+            return doc.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="user")
+        return doc.tobytes()
+
+
+def _page(drawings: int = 0, auto_mode: str = "fast") -> PageInspection:
+    return PageInspection(
+        page=1, width=612, height=792, text_chars=100, images=0, image_coverage=0.0,
+        drawings=drawings, scanned=False, auto_mode=auto_mode,
+    )
+
+
+class TestInspectPdf:
+    """Signals read from each page"""
+
+    async def test_pages_are_described(self):
+        inspection, error, _ = await pdf_converter_service.inspect(_pdf())
+        assert error is None
+
+        text, table, scan = inspection.pages
+        assert (inspection.page_count, inspection.encrypted, inspection.password_required) == (3, False, False)
+        assert (text.text_chars, text.drawings, text.auto_mode, text.scanned) == (13, 0, "fast", False)
+        assert (table.drawings, table.auto_mode) == (6, "accurate")
+        assert (scan.text_chars, scan.images, scan.image_coverage, scan.scanned) == (0, 1, 1.0, True)
+
+    async def test_page_selection(self):
+        inspection, _, _ = await pdf_converter_service.inspect(_pdf(), pages="2-")
+        assert [page.page for page in inspection.pages] == [2, 3]
+
+    @pytest.mark.parametrize("pdf_bytes, pages, code", [(b"%PDF-1.7 garbage", None, "INVALID_PDF"), (None, "4", "INVALID_PAGE_RANGE")])
+    async def test_errors(self, pdf_bytes, pages, code):
+        inspection, _, error_code = await pdf_converter_service.inspect(pdf_bytes or _pdf(), pages=pages)
+        assert (inspection, error_code) == (None, code)
+
+    async def test_password_protected_pdf_is_not_inspected(self):
+        inspection, _, _ = await pdf_converter_service.inspect(_pdf(encrypt=True))
+
+        assert (inspection.encrypted, inspection.password_required) == (True, True)
+        assert inspection.pages == []
+        assert inspection.estimated_seconds == {}
+
+
+class TestEstimatedSeconds:
+    """Conversion time estimates per mode"""
+
+    def test_estimates_per_mode(self):
+        estimates = pdf_converter_service._estimated_seconds([_page(), _page(drawings=100, auto_mode="accurate")])
+
+        assert estimates["fast"] == pytest.approx(2 * ESTIMATE_SECONDS_PER_PAGE["fast"], abs=0.01)
+        assert estimates["accurate"] == pytest.approx(
+            2 * ESTIMATE_SECONDS_PER_PAGE["accurate"] + 100 * ESTIMATE_SECONDS_PER_PATH, abs=0.01
+        )
+        # Auto mode: fast for the text page, accurate for the drawing
+        assert estimates["auto"] == pytest.approx(
+            ESTIMATE_SECONDS_PER_PAGE["fast"] + ESTIMATE_SECONDS_PER_PAGE["accurate"] + 100 * ESTIMATE_SECONDS_PER_PATH, abs=0.01
+        )
+
+    def test_large_documents_are_spread_over_the_workers(self, monkeypatch):
+        monkeypatch.setattr(settings, "PARALLEL_CONVERSION_PAGE_THRESHOLD", 64)
+        monkeypatch.setattr(settings, "PARALLEL_CONVERSION_MIN_BATCH_PAGES", 8)
+        monkeypatch.setattr(converter_module.conversion_pool, "size", 4)
+        monkeypatch.setattr(converter_module.conversion_pool, "max_jobs_per_team", 3)
+
+        small = pdf_converter_service._estimated_seconds([_page(drawings=10)] * 63)
+        large = pdf_converter_service._estimated_seconds([_page(drawings=10)] * 64)
+
+        page_seconds = ESTIMATE_SECONDS_PER_PAGE["accurate"] + 10 * ESTIMATE_SECONDS_PER_PATH
+        assert small["accurate"] == pytest.approx(63 * page_seconds, abs=0.01)
+        # 3 workers for the team: a third of the single-worker time
+        assert large["accurate"] == pytest.approx(64 * page_seconds / 3, abs=0.01)
+
+
+class TestInspectEndpoint:
+    """POST /v1/convert/inspect is free"""
+
+    def test_inspection_response(self, client, mock_auth, mock_rate_limit, mock_credits_available):
+        response = client.post(
+            "/v1/convert/inspect",
+            json={"pdf_base64": base64.b64encode(_pdf()).decode()},
+            headers={"x-api-key": "sk_test"},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["page_count"], body["pages_inspected"]) == (3, 3)
+        assert (body["pages_with_text"], body["scanned_pages"]) == (2, 1)
+        assert body["pages_by_mode"] == {"fast": 2, "accurate": 1}
+        assert set(body["estimated_seconds"]) == {"fast", "balanced", "accurate", "auto"}
+        assert body["estimated_credits"] == 1
+        mock_credits_available.assert_not_called()
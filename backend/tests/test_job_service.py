@@ -0,0 +1,133 @@
+"""Tests for conversion jobs: webhook secrets encrypted at rest, shutdown of the local queue"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core import encryption
+from app.services import job_service as job_service_module
+from app.services.job_service import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    ConversionJob,
+    LocalJobQueue,
+    MemoryJobStore,
+    SupabaseJobStore,
+    job_service,
+)
+from app.services.pdf_converter_service import ConversionOptions, pdf_converter_service
+
+
+class FakeTable:
+    """The few supabase-py table calls the job store makes, on an in-memory list"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.query = None
+
+    def insert(self, row: dict) -> "FakeTable":
+        self.rows.append(dict(row))
+        return self
+
+    def select(self, columns: str) -> "FakeTable":
+        return self
+
+    def eq(self, column: str, value) -> "FakeTable":
+        self.query = (column, value)
+        return self
+
+    def limit(self, count: int) -> "FakeTable":
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        if self.query is None:
+            return SimpleNamespace(data=[])
+        column, value = self.query
+        return SimpleNamespace(data=[row for row in self.rows if row[column] == value])
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    """Rows of the fake conversion_jobs table, with a fresh encryption key"""
+    rows = []
+    client = SimpleNamespace(table=lambda name: FakeTable(rows))
+    monkeypatch.setattr(job_service_module, "get_supabase", lambda: client)
+    monkeypatch.setattr(encryption.settings, "STORAGE_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setattr(encryption, "_fernet", None)
+    yield rows
+
+
+class TestSupabaseJobStore:
+    """Webhook secret storage"""
+
+    async def test_webhook_secret_is_stored_encrypted(self, rows):
+        store = SupabaseJobStore()
+        job = ConversionJob(
+            id="job-1",
+            team_id="team-1",
+            user_id="user-1",
+            webhook_url="https://example.com/hook",
+            webhook_secret="s3cret-signing-key",
+        )
+        await store.create(job)
+
+        (row,) = rows
+        assert "webhook_secret" not in row
+        assert "s3cret-signing-key" not in str(row)
+        assert encryption.decrypt_value(row["webhook_secret_encrypted"]) == "s3cret-signing-key"
+
+        stored = await store.get("job-1")
+        assert stored.webhook_secret == "s3cret-signing-key"
+        assert stored.webhook_url == "https://example.com/hook"
+
+    async def test_job_without_webhook_has_no_secret(self, rows):
+        store = SupabaseJobStore()
+        await store.create(ConversionJob(id="job-2", team_id="team-1", user_id="user-1"))
+
+        assert rows[0]["webhook_secret_encrypted"] is None
+        assert (await store.get("job-2")).webhook_secret is None
+
+    async def test_undecryptable_secret_is_dropped(self, rows, monkeypatch):
+        store = SupabaseJobStore()
+        await store.create(ConversionJob(id="job-3", team_id="team-1", user_id="user-1", webhook_secret="old"))
+        # Key rotated without re-encrypting
+        monkeypatch.setattr(encryption.settings, "STORAGE_ENCRYPTION_KEY", Fernet.generate_key().decode())
+        monkeypatch.setattr(encryption, "_fernet", None)
+
+        assert (await store.get("job-3")).webhook_secret is None
+
+
+class TestLocalJobQueue:
+    """Jobs of the in-process queue at shutdown"""
+
+    async def test_close_fails_and_refunds_running_and_queued_jobs(self, monkeypatch):
+        monkeypatch.setattr(job_service, "store", MemoryJobStore())
+        monkeypatch.setattr(job_service, "_queue", LocalJobQueue(concurrency=1))
+        refund = AsyncMock()
+        monkeypatch.setattr(job_service_module.credit_service, "refund_credit", refund)
+        started = asyncio.Event()
+
+        async def convert_forever(*args, **kwargs):
+            started.set()
+            await asyncio.sleep(3600)
+
+        monkeypatch.setattr(pdf_converter_service, "convert_bytes", convert_forever)
+
+        running = await job_service.submit("team-1", "user-1", ConversionOptions(), pdf_bytes=b"%PDF-1")
+        queued = await job_service.submit("team-1", "user-1", ConversionOptions(), pdf_bytes=b"%PDF-2")
+        await asyncio.wait_for(started.wait(), timeout=5)
+        assert (await job_service.get(running.id)).status == JOB_RUNNING
+        assert (await job_service.get(queued.id)).status == JOB_QUEUED
+
+        await job_service.close()
+
+        for job_id in (running.id, queued.id):
+            job = await job_service.get(job_id)
+            assert job.status == JOB_FAILED
+            assert job.error_code == "JOB_INTERRUPTED"
+            assert await job_service.store.get_input(job_id) is None
+        assert sorted(call.kwargs["resource_id"] for call in refund.await_args_list) == sorted([running.id, queued.id])
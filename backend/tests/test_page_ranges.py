@@ -0,0 +1,53 @@
+"""Tests for page selection parsing ("1-3,10,20-")"""
+
+import pytest
+
+from app.core.page_ranges import PageRangeError, parse_page_ranges, resolve_page_ranges
+
+
+class TestParsePageRanges:
+    """Syntax of page selections"""
+
+    @pytest.mark.parametrize(
+        "spec, expected",
+        [
+            ("7", [(7, 7)]),
+            ("1-3", [(1, 3)]),
+            ("20-", [(20, None)]),
+            ("-5", [(1, 5)]),
+            ("1-3,10,20-", [(1, 3), (10, 10), (20, None)]),
+            (" 2 - 4 , 6 ", [(2, 4), (6, 6)]),
+            ("3-3", [(3, 3)]),
+        ],
+    )
+    def test_valid_selections(self, spec, expected):
+        assert parse_page_ranges(spec) == expected
+
+    @pytest.mark.parametrize("spec", ["", " ", ",", "1,", "-", "0", "0-2", "5-2", "a", "1-2-3", "1.5", "+3"])
+    def test_malformed_selections(self, spec):
+        with pytest.raises(PageRangeError):
+            parse_page_ranges(spec)
+
+    def test_error_is_a_value_error(self):
+        with pytest.raises(ValueError, match="Invalid page range 'x'"):
+            parse_page_ranges("1,x")
+
+
+class TestResolvePageRanges:
+    """Selections resolved against a page count"""
+
+    def test_pages_are_zero_based_sorted_and_unique(self):
+        assert resolve_page_ranges("5,1-3,2", 10) == [0, 1, 2, 4]
+
+    def test_open_ended_range_runs_to_the_last_page(self):
+        assert resolve_page_ranges("8-", 10) == [7, 8, 9]
+        assert resolve_page_ranges("-2,9-", 10) == [0, 1, 8, 9]
+
+    def test_whole_document(self):
+        assert resolve_page_ranges("1-", 3) == [0, 1, 2]
+        assert resolve_page_ranges("1-3", 3) == [0, 1, 2]
+
+    @pytest.mark.parametrize("spec", ["11", "9-11", "11-"])
+    def test_selection_beyond_the_last_page(self, spec):
+        with pytest.raises(PageRangeError, match="exceeds the document's 10 page"):
+            resolve_page_ranges(spec, 10)
@@ -0,0 +1,218 @@
+"""Tests for the PDF converter service: in-memory conversion, worker batches, modes, json output"""
+
+import tempfile
+
+import fitz
+import pytest
+
+from app.services import pdf_converter_service as converter_module
+from app.services.pdf_converter_service import (
+    AUTO_TABLE_MIN_PATHS,
+    ConversionOptions,
+    _auto_mode,
+    _split_batches,
+    pdf_converter_service,
+)
+from app.services.result_cache import PageCache
+
+
+def _assert_contiguous(batches, page_count):
+    assert batches[0][0] == 0
+    assert batches[-1][1] == page_count
+    for (_, end), (start, _) in zip(batches, batches[1:]):
+        assert end == start
+    assert all(start < end for start, end in batches)
+
+
+class TestSplitBatches:
+    """Contiguous batches of roughly equal cost"""
+
+    def test_equal_costs_give_equal_batches(self):
+        assert _split_batches([1] * 10, max_batches=5, min_pages=2) == [(0, 2), (2, 4), (4, 6), (6, 8), (8, 10)]
+
+    def test_expensive_pages_get_smaller_batches(self):
+        costs = [10] + [1] * 10
+        assert _split_batches(costs, max_batches=2, min_pages=1) == [(0, 1), (1, 11)]
+
+    def test_batch_count_is_limited_by_min_pages(self):
+        batches = _split_batches([1] * 5, max_batches=8, min_pages=2)
+        assert len(batches) == 2
+        _assert_contiguous(batches, 5)
+
+    @pytest.mark.parametrize("min_pages", [0, 1])
+    def test_single_page(self, min_pages):
+        assert _split_batches([7], max_batches=4, min_pages=min_pages) == [(0, 1)]
+
+    def test_no_more_batches_than_allowed(self):
+        costs = [1, 50, 2, 3, 40, 1, 1, 1, 30, 5, 5, 5]
+        batches = _split_batches(costs, max_batches=3, min_pages=1)
+        assert len(batches) <= 3
+        _assert_contiguous(batches, len(costs))
+
+    def test_zero_costs(self):
+        batches = _split_batches([0] * 6, max_batches=3, min_pages=1)
+        _assert_contiguous(batches, 6)
+
+
+BODY = "Body text of the page, long enough to set the body font size. " * 3
+
+
+def _add_page(doc: fitz.Document, title: str, lines: int = 0) -> None:
+    """A page with a heading, body text and `lines` rules (a ruled table from AUTO_TABLE_MIN_PATHS)"""
+    page = doc.new_page()
+    page.insert_text((72, 72), title, fontsize=20)
+    page.insert_textbox(fitz.Rect(72, 90, 540, 200), BODY, fontsize=11)
+    if lines < AUTO_TABLE_MIN_PATHS:
+        for i in range(lines):
+            page.draw_line((72, 220 + i * 10), (312, 220 + i * 10))
+    else:
+        # A 2x2 grid (6 lines)
+        for i in range(3):
+            page.draw_line((72, 220 + i * 20), (312, 220 + i * 20))
+            page.draw_line((72 + i * 120, 220), (72 + i * 120, 260))
+        for row in range(2):
+            for col in range(2):
+                page.insert_text((78 + col * 120, 234 + row * 20), f"Cell {row}{col}", fontsize=10)
+
+
+def _pdf(*pages) -> bytes:
+    """A PDF with one page per (title, lines) pair"""
+    with fitz.open() as doc:
+        for title, lines in pages:
+            _add_page(doc, title, lines)
+        return doc.tobytes()
+
+
+@pytest.fixture
+def no_page_cache(monkeypatch):
+    monkeypatch.setattr(converter_module.page_cache, "enabled", False)
+
+
+def _convert(pdf_bytes: bytes, **options):
+    result = pdf_converter_service.convert_or_plan(pdf_bytes, ConversionOptions(**options), max_batches=1)
+    assert result.success, result.error
+    return result
+
+
+class TestInMemoryConversion:
+    """The PDF is converted from memory, opened once"""
+
+    def test_single_open_and_no_temp_file(self, no_page_cache, monkeypatch):
+        opened = []
+        real_open = fitz.open
+
+        def counting_open(*args, **kwargs):
+            opened.append(kwargs.get("stream") is not None)
+            return real_open(*args, **kwargs)
+
+        def no_temp_file(*args, **kwargs):
+            raise AssertionError("temporary file created")
+
+        pdf_bytes = _pdf(("First", 0), ("Second", 0))
+        monkeypatch.setattr(fitz, "open", counting_open)
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temp_file)
+        monkeypatch.setattr(tempfile, "mkstemp", no_temp_file)
+        result = _convert(pdf_bytes, mode="accurate")
+
+        assert opened == [True]
+        assert (result.page_count, result.pages_converted) == (2, 2)
+        assert "# First" in result.markdown and "# Second" in result.markdown
+
+    def test_invalid_pdf_fails(self):
+        result = pdf_converter_service.convert_or_plan(b"%PDF-1.7 truncated", ConversionOptions(), max_batches=1)
+
+        assert not result.success
+        assert result.error_code == "CONVERSION_FAILED"
+
+
+class TestConversionModes:
+    """Fast, balanced, accurate and per-page auto mode"""
+
+    @pytest.mark.parametrize(
+        "paths, mode",
+        [(0, "fast"), (1, "balanced"), (AUTO_TABLE_MIN_PATHS - 1, "balanced"), (AUTO_TABLE_MIN_PATHS, "accurate")],
+    )
+    def test_auto_mode_from_vector_paths(self, paths, mode):
+        assert _auto_mode(paths) == mode
+
+    def test_auto_mode_picks_a_mode_per_page(self, no_page_cache):
+        result = _convert(_pdf(("Text", 0), ("Rule", 1), ("Table", AUTO_TABLE_MIN_PATHS)), mode="auto")
+
+        assert result.pages_by_mode == {"fast": 1, "balanced": 1, "accurate": 1}
+        assert "Cell 00" in result.markdown
+
+    @pytest.mark.parametrize("mode", ["fast", "balanced", "accurate"])
+    def test_explicit_mode_applies_to_every_page(self, no_page_cache, mode):
+        result = _convert(_pdf(("Text", 0), ("Table", AUTO_TABLE_MIN_PATHS)), mode=mode)
+
+        assert result.pages_by_mode == {mode: 2}
+        assert result.markdown.startswith("# Text")
+        assert "Body text of the page" in result.markdown
+
+    def test_fast_mode_has_no_tables(self, no_page_cache):
+        fast = _convert(_pdf(("Table", AUTO_TABLE_MIN_PATHS)), mode="fast")
+        accurate = _convert(_pdf(("Table", AUTO_TABLE_MIN_PATHS)), mode="accurate")
+
+        assert "|" not in fast.markdown
+        assert "|" in accurate.markdown
+        assert "Cell 00" in fast.markdown
+
+
+COLUMNS = ["type", "text", "x0", "y0", "x1", "y1", "font_size", "level"]
+
+
+class TestJsonOutput:
+    """output_format=json: blocks of each page, column-wise"""
+
+    def test_blocks_are_stored_by_column(self, no_page_cache):
+        result = _convert(_pdf(("Report", AUTO_TABLE_MIN_PATHS), ("Next", 0)), mode="accurate", output_format="json")
+
+        assert result.markdown == ""
+        assert [page["page"] for page in result.pages] == [1, 2]
+        page = result.pages[0]
+        assert (page["width"], page["height"]) == (595.0, 842.0)
+        blocks = page["blocks"]
+        assert list(blocks) == COLUMNS
+        assert len({len(column) for column in blocks.values()}) == 1
+
+        rows = list(zip(*blocks.values()))
+        assert rows[0][:2] == ("heading", "Report")
+        assert rows[0][6:] == (20.0, 1)
+        (table,) = [row for row in rows if row[0] == "table"]
+        assert "Cell 00" in table[1] and "|" in table[1]
+        assert table[6:] == (0.0, 0)
+        # Cell text is only in the table, and blocks are in reading order
+        assert not any("Cell" in row[1] for row in rows if row[0] != "table")
+        assert [row[3] for row in rows] == sorted(row[3] for row in rows)
+
+    def test_fast_mode_has_no_table_blocks(self, no_page_cache):
+        result = _convert(_pdf(("Report", AUTO_TABLE_MIN_PATHS)), mode="fast", output_format="json")
+
+        types = result.pages[0]["blocks"]["type"]
+        assert "table" not in types
+        assert set(types) == {"heading", "text"}
+
+    def test_images_are_blocks_without_text(self, no_page_cache):
+        with fitz.open() as doc:
+            _add_page(doc, "Figure")
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+            doc[0].insert_image(fitz.Rect(72, 300, 172, 400), pixmap=pixmap)
+            pdf_bytes = doc.tobytes()
+
+        blocks = _convert(pdf_bytes, mode="fast", output_format="json").pages[0]["blocks"]
+        index = blocks["type"].index("image")
+        assert blocks["text"][index] == ""
+        assert [blocks[column][index] for column in ("x0", "y0", "x1", "y1")] == [72.0, 300.0, 172.0, 400.0]
+
+    def test_page_cache_keeps_json_apart_from_markdown(self, tmp_path, monkeypatch):
+        cache = PageCache(disk_bytes=1024 * 1024, directory=str(tmp_path))
+        cache.enabled = True
+        monkeypatch.setattr(converter_module, "page_cache", cache)
+        pdf_bytes = _pdf(("Report", 0))
+
+        markdown = _convert(pdf_bytes, mode="fast")
+        first = _convert(pdf_bytes, mode="fast", output_format="json")
+        second = _convert(pdf_bytes, mode="fast", output_format="json")
+
+        assert (markdown.pages_from_cache, first.pages_from_cache, second.pages_from_cache) == (0, 0, 1)
+        assert second.pages == first.pages
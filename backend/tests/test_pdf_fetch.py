@@ -0,0 +1,159 @@
+"""Tests for fetching PDFs from URLs: streamed size and magic checks, conditional re-fetch"""
+
+import ipaddress
+import os
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.services import pdf_converter_service as converter_module
+from app.services.pdf_converter_service import pdf_converter_service
+from app.services.result_cache import FetchCache
+
+MAX_BYTES = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_limit(monkeypatch):
+    monkeypatch.setattr(converter_module, "MAX_PDF_SIZE_BYTES", MAX_BYTES)
+
+
+async def _read(chunks, headers=None):
+    """_read_pdf_response on a streamed body; also returns the chunks the server got to send"""
+    sent = []
+
+    async def body():
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, headers=headers or {}, content=body()))
+    async with httpx.AsyncClient(transport=transport) as client:
+        async with client.stream("GET", "https://example.com/doc.pdf") as response:
+            result = await pdf_converter_service._read_pdf_response(response)
+    return result, sent
+
+
+class TestReadPdfResponse:
+    """Size limit and PDF magic bytes, checked while the body streams in"""
+
+    @pytest.mark.parametrize("content_length", [None, "400"])
+    async def test_pdf_within_the_limit(self, content_length):
+        chunks = [b"%PDF-1.7\n", b"a" * 191, b"b" * 200]
+        headers = {"content-length": content_length} if content_length else None
+        (pdf_bytes, error, code), _ = await _read(chunks, headers)
+
+        assert pdf_bytes == b"".join(chunks)
+        assert (error, code) == (None, None)
+
+    async def test_announced_size_over_the_limit_is_not_read(self):
+        (pdf_bytes, _, code), sent = await _read([b"%PDF" + bytes(MAX_BYTES)], {"content-length": str(MAX_BYTES + 4)})
+
+        assert (pdf_bytes, code) == (None, "FILE_TOO_LARGE")
+        assert sent == []
+
+    async def test_streamed_body_is_cut_at_the_limit(self):
+        chunks = [b"%PDF"] + [bytes(256)] * 20
+        (pdf_bytes, _, code), sent = await _read(chunks)
+
+        assert (pdf_bytes, code) == (None, "FILE_TOO_LARGE")
+        assert len(sent) < len(chunks)
+
+    async def test_not_a_pdf_stops_at_the_first_bytes(self):
+        chunks = [b"<!doctype html>", bytes(256), bytes(256)]
+        (pdf_bytes, _, code), sent = await _read(chunks)
+
+        assert (pdf_bytes, code) == (None, "INVALID_PDF")
+        assert len(sent) == 1
+
+    async def test_magic_bytes_split_across_chunks(self):
+        (pdf_bytes, _, _), _ = await _read([b"%P", b"D", b"F-1.7"])
+        assert pdf_bytes == b"%PDF-1.7"
+
+    @pytest.mark.parametrize("chunks", [[], [b"%P"]])
+    async def test_body_too_short_for_a_pdf(self, chunks):
+        (pdf_bytes, _, code), _ = await _read(chunks)
+        assert (pdf_bytes, code) == (None, "INVALID_PDF")
+
+    @pytest.mark.parametrize("content_length", ["8", "100"])
+    async def test_body_length_differs_from_content_length(self, content_length):
+        # Longer than announced continues in a spool, shorter keeps what arrived
+        chunks = [b"%PDF-1.7\n", b"x" * 30]
+        (pdf_bytes, _, _), _ = await _read(chunks, {"content-length": content_length})
+        assert pdf_bytes == b"".join(chunks)
+
+
+URL = "https://example.com/report.pdf"
+PDF_V1 = b"%PDF-1.7 version one"
+PDF_V2 = b"%PDF-1.7 version two"
+
+
+@pytest.fixture
+async def origin(monkeypatch):
+    """
+    A server for URL (validated without DNS) that honours If-None-Match.
+    Yields its state: body, etag and cache_control of the responses, and the
+    requests received
+    """
+    state = {"body": PDF_V1, "etag": '"v1"', "cache_control": None, "requests": []}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request)
+        if state["etag"] and request.headers.get("if-none-match") == state["etag"]:
+            return httpx.Response(304)
+        headers = {"etag": state["etag"]} if state["etag"] else {}
+        if state["cache_control"]:
+            headers["cache-control"] = state["cache_control"]
+        return httpx.Response(200, headers=headers, content=state["body"])
+
+    async def validate_url(url):
+        return ipaddress.ip_address("93.184.216.34"), None, None
+
+    monkeypatch.setattr(http_client, "_create_client", lambda http2: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(http_client, "_clients", None)
+    monkeypatch.setattr(pdf_converter_service, "validate_url", validate_url)
+    yield state
+    await http_client.close_http_client()
+
+
+@pytest.fixture
+def fetch_cache(tmp_path, monkeypatch):
+    cache = FetchCache(max_urls=10, disk_bytes=1024 * 1024, directory=str(tmp_path))
+    cache.enabled = True
+    monkeypatch.setattr(converter_module, "fetch_cache", cache)
+    return cache
+
+
+class TestConditionalFetch:
+    """URLs fetched before are revalidated, a 304 is served from the fetch cache"""
+
+    async def test_not_modified_body_comes_from_the_cache(self, origin, fetch_cache):
+        assert await pdf_converter_service.fetch_pdf_from_url(URL) == (PDF_V1, None, None)
+        assert "if-none-match" not in origin["requests"][0].headers
+
+        assert await pdf_converter_service.fetch_pdf_from_url(URL) == (PDF_V1, None, None)
+        assert origin["requests"][1].headers["if-none-match"] == '"v1"'
+
+    async def test_modified_body_is_downloaded(self, origin, fetch_cache):
+        await pdf_converter_service.fetch_pdf_from_url(URL)
+        origin.update(body=PDF_V2, etag='"v2"')
+
+        assert await pdf_converter_service.fetch_pdf_from_url(URL) == (PDF_V2, None, None)
+        assert fetch_cache.validators(URL).etag == '"v2"'
+
+    async def test_evicted_body_is_fetched_unconditionally(self, origin, fetch_cache):
+        await pdf_converter_service.fetch_pdf_from_url(URL)
+        os.remove(fetch_cache._disk._path(fetch_cache.validators(URL).digest))
+
+        assert await pdf_converter_service.fetch_pdf_from_url(URL) == (PDF_V1, None, None)
+        assert [r.headers.get("if-none-match") for r in origin["requests"]] == [None, '"v1"', None]
+
+    @pytest.mark.parametrize("etag, cache_control", [(None, None), ('"v1"', "no-store")])
+    async def test_responses_that_cannot_be_revalidated_are_not_kept(self, origin, fetch_cache, etag, cache_control):
+        origin.update(etag=etag, cache_control=cache_control)
+        await pdf_converter_service.fetch_pdf_from_url(URL)
+        await pdf_converter_service.fetch_pdf_from_url(URL)
+
+        assert fetch_cache.validators(URL) is None
+        assert all("if-none-match" not in r.headers for r in origin["requests"])
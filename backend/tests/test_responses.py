@@ -0,0 +1,31 @@
+"""Tests for ModelJSONResponse: same JSON as JSONResponse, NaN and inf as null"""
+
+import json
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.responses import ModelJSONResponse
+from app.models.convert import ConversionError
+
+
+class Measure(BaseModel):
+    value: float
+    values: list
+
+
+class TestModelJSONResponse:
+    """Rendering of models and plain values"""
+
+    def test_model_renders_like_json_response(self):
+        model = ConversionError(success=False, error="Page « 3 » is empty ", code="CONVERSION_FAILED")
+
+        assert ModelJSONResponse(content=model).body == JSONResponse(content=model.model_dump()).body
+
+    def test_nan_and_inf_are_written_as_null(self):
+        for content in (
+            Measure(value=float("nan"), values=[float("inf"), 1.5]),
+            {"value": float("nan"), "values": [float("inf"), 1.5]},
+        ):
+            body = ModelJSONResponse(content=content).body
+            assert json.loads(body) == {"value": None, "values": [None, 1.5]}
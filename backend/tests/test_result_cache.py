@@ -0,0 +1,214 @@
+"""Tests for the result cache: disk eviction, per-team cache status, page keys"""
+
+import os
+import time
+
+import fitz
+import pymupdf4llm
+import pytest
+
+from app.services import pdf_converter_service as converter_module
+from app.services.pdf_converter_service import pdf_converter_service
+from app.services.result_cache import (
+    CACHE_HIT_DISK,
+    CACHE_HIT_MEMORY,
+    CACHE_MISS,
+    CachedConversion,
+    PageCache,
+    ResultCache,
+    _DiskStore,
+)
+
+
+def _wait_for_maintenance(store: _DiskStore) -> None:
+    if store._maintenance is not None:
+        store._maintenance.join(timeout=10)
+
+
+def _entries(store: _DiskStore) -> set:
+    return {name.split(".")[0] for name in os.listdir(store.directory)}
+
+
+class TestDiskStore:
+    """Size cap and eviction of the disk tier"""
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        # Incompressible entries of ~1 KiB each, 10 fit under the cap
+        store = _DiskStore(str(tmp_path), max_bytes=10 * 1100)
+        for i in range(10):
+            store.put(f"k{i}", os.urandom(1024))
+            _wait_for_maintenance(store)
+            # Distinct modification times, oldest first
+            os.utime(store._path(f"k{i}"), (1000 + i, 1000 + i))
+        assert _entries(store) == {f"k{i}" for i in range(10)}
+
+        assert store.get("k0") is not None  # touched: now the most recently used
+        store.put("k10", os.urandom(1024))
+        _wait_for_maintenance(store)
+
+        remaining = _entries(store)
+        assert "k0" in remaining and "k10" in remaining
+        assert "k1" not in remaining
+        assert store._used <= store.max_bytes * 0.9
+        assert store._used == sum(os.path.getsize(store._path(key)) for key in remaining)
+
+    def test_size_is_tracked_without_listing_the_directory(self, tmp_path, monkeypatch):
+        store = _DiskStore(str(tmp_path), max_bytes=1024 * 1024)
+        store.put("first", b"x" * 100)
+        _wait_for_maintenance(store)
+
+        scans = []
+        original_scan = store._scan
+        monkeypatch.setattr(store, "_scan", lambda: scans.append(1) or original_scan())
+        for i in range(200):
+            store.put(f"k{i}", f"entry {i}".encode())
+        _wait_for_maintenance(store)
+
+        assert scans == []
+        assert store._used == sum(size for _, size, _ in original_scan())
+
+    def test_rewritten_entry_is_counted_once(self, tmp_path):
+        store = _DiskStore(str(tmp_path), max_bytes=1024 * 1024)
+        store.put("key", b"a" * 10)
+        _wait_for_maintenance(store)
+        store.put("key", os.urandom(500))
+        store.put("key", os.urandom(500))
+
+        assert store._used == os.path.getsize(store._path("key"))
+
+    def test_entries_written_by_other_processes_are_measured(self, tmp_path):
+        store = _DiskStore(str(tmp_path), max_bytes=10 * 1100)
+        other = _DiskStore(str(tmp_path), max_bytes=10 * 1100)
+        for i in range(8):
+            other.put(f"other{i}", os.urandom(1024))
+            _wait_for_maintenance(other)
+            time.sleep(0.01)
+
+        for i in range(4):
+            store.put(f"own{i}", os.urandom(1024))
+            _wait_for_maintenance(store)
+
+        total = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+        assert total <= store.max_bytes
+        assert "own3" in _entries(store)
+
+
+def _conversion(markdown: str = "# Title") -> CachedConversion:
+    return CachedConversion(markdown=markdown, page_count=1, pages_converted=1)
+
+
+class TestCacheStatus:
+    """X-Cache is reported per team"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = ResultCache(memory_bytes=1024 * 1024, disk_bytes=1024 * 1024, directory=str(tmp_path))
+        cache.enabled = True
+        return cache
+
+    async def test_team_sees_its_own_hits(self, cache):
+        await cache.put("key", _conversion(), team_id="team-a")
+
+        entry, status = await cache.get("key", team_id="team-a")
+        assert entry.markdown == "# Title"
+        assert status == CACHE_HIT_MEMORY
+
+    async def test_other_team_gets_the_result_as_a_miss(self, cache):
+        await cache.put("key", _conversion(), team_id="team-a")
+
+        entry, status = await cache.get("key", team_id="team-b")
+        assert entry.markdown == "# Title"
+        assert status == CACHE_MISS
+        # From then on the result is known to team B as well
+        assert (await cache.get("key", team_id="team-b"))[1] == CACHE_HIT_MEMORY
+
+    async def test_disk_hit_is_reported_per_team(self, cache, tmp_path):
+        await cache.put("key", _conversion(), team_id="team-a")
+        cache._memory.clear()
+        cache._memory_used = 0
+
+        assert (await cache.get("key", team_id="team-b"))[1] == CACHE_MISS
+        cache._memory.clear()
+        cache._memory_used = 0
+        assert (await cache.get("key", team_id="team-a"))[1] == CACHE_HIT_DISK
+
+
+BODY = "Body text of the page, long enough to set the body font size. " * 4
+
+
+def _document(*pages) -> fitz.Document:
+    """A document whose pages are lists of (text, font size) lines"""
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        y = 72
+        for text, size in lines:
+            page.insert_text((72, y), text, fontsize=size)
+            y += size * 2
+    return doc
+
+
+def _key(doc: fitz.Document, pno: int, mode: str = "fast") -> str:
+    hdr_info = pymupdf4llm.IdentifyHeaders(doc, pages=list(range(doc.page_count)))
+    return PageCache.page_key(doc[pno], hdr_info, mode)
+
+
+PAGE_A = [("Introduction", 20), (BODY, 11), (BODY, 11)]
+PAGE_B = [(BODY, 11), (BODY, 11)]
+
+
+class TestPageKey:
+    """What a cached page's markdown is keyed on"""
+
+    def test_same_page_in_another_document(self):
+        assert _key(_document(PAGE_A, PAGE_B), 0) == _key(_document(PAGE_A, [(BODY, 11)] * 3), 0)
+
+    def test_edited_page_gets_a_new_key(self):
+        edited = [("Introduction", 20), (BODY, 11), (BODY.replace("Body", "Main"), 11)]
+        assert _key(_document(PAGE_A, PAGE_B), 0) != _key(_document(edited, PAGE_B), 0)
+
+    def test_mode_is_part_of_the_key(self):
+        doc = _document(PAGE_A, PAGE_B)
+        assert _key(doc, 0, "fast") != _key(doc, 0, "accurate")
+
+    def test_header_levels_of_other_pages_only_matter_if_they_apply(self):
+        doc = _document(PAGE_A, PAGE_B)
+        # A smaller heading elsewhere leaves "Introduction" at level 1
+        with_subheading = _document(PAGE_A, [("Details", 14), (BODY, 11)])
+        # A larger heading elsewhere moves it to level 2
+        with_title = _document(PAGE_A, [("Title", 30), (BODY, 11)])
+
+        assert _key(doc, 0) == _key(with_subheading, 0)
+        assert _key(doc, 0) != _key(with_title, 0)
+
+
+class TestPageCacheReuse:
+    """Only changed pages are converted again"""
+
+    @pytest.fixture
+    def page_cache(self, tmp_path, monkeypatch):
+        cache = PageCache(disk_bytes=1024 * 1024, directory=str(tmp_path))
+        cache.enabled = True
+        monkeypatch.setattr(converter_module, "page_cache", cache)
+        return cache
+
+    def _convert(self, doc: fitz.Document):
+        pages = list(range(doc.page_count))
+        hdr_info = pymupdf4llm.IdentifyHeaders(doc, pages=pages)
+        return pdf_converter_service._markdown_batch(doc, pages, hdr_info, {pno: "fast" for pno in pages})
+
+    def test_edited_page_is_converted_again(self, page_cache):
+        first = self._convert(_document(PAGE_A, PAGE_B))
+        assert first.cached == [False, False]
+        assert first.pages[0].startswith("# Introduction")
+
+        edited = [(BODY, 11), (BODY.replace("Body", "Main"), 11)]
+        second = self._convert(_document(PAGE_A, edited))
+        assert second.cached == [True, False]
+        assert second.pages[0] == first.pages[0]
+        assert "Main text" in second.pages[1]
+
+    def test_disabled_cache_is_not_used(self, page_cache):
+        page_cache.enabled = False
+        self._convert(_document(PAGE_A, PAGE_B))
+        assert self._convert(_document(PAGE_A, PAGE_B)).cached == [False, False]
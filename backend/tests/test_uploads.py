@@ -0,0 +1,113 @@
+"""Tests for the bounded PDF upload readers (raw body and multipart)"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.uploads import read_multipart_pdf, read_multipart_pdfs, read_raw_pdf
+
+MAX_BYTES = 4096
+PDF = b"%PDF-1.7\n" + b"x" * 100
+
+
+def _result(pdf_bytes, error, code):
+    return {"size": len(pdf_bytes) if pdf_bytes is not None else None, "error": error, "code": code}
+
+
+@pytest.fixture
+def upload_client():
+    app = FastAPI()
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        return _result(*await read_raw_pdf(request, MAX_BYTES))
+
+    @app.post("/multipart")
+    async def multipart(request: Request):
+        return _result(*await read_multipart_pdf(request, MAX_BYTES))
+
+    @app.post("/batch")
+    async def batch(request: Request):
+        files, error, code = await read_multipart_pdfs(request, MAX_BYTES, max_total_bytes=3 * MAX_BYTES, max_files=3)
+        if files is None:
+            return {"error": error, "code": code}
+        return {"files": [[filename, _result(*result)] for filename, result in files]}
+
+    return TestClient(app)
+
+
+def _chunks(data: bytes, size: int = 1024):
+    """Body without a Content-Length (chunked), so the limit applies while reading"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+class TestReadRawPdf:
+    """application/pdf request bodies"""
+
+    def test_pdf_is_read(self, upload_client):
+        assert upload_client.post("/raw", content=PDF).json() == {"size": len(PDF), "error": None, "code": None}
+
+    def test_declared_size_over_the_limit(self, upload_client):
+        assert upload_client.post("/raw", content=b"%PDF" + bytes(MAX_BYTES)).json()["code"] == "FILE_TOO_LARGE"
+
+    def test_streamed_body_over_the_limit(self, upload_client):
+        response = upload_client.post("/raw", content=_chunks(b"%PDF" + bytes(2 * MAX_BYTES)))
+        assert response.json()["code"] == "FILE_TOO_LARGE"
+
+    @pytest.mark.parametrize("body, code", [(b"", "INVALID_REQUEST"), (b"<html>not a pdf</html>", "INVALID_PDF")])
+    def test_empty_or_not_a_pdf(self, upload_client, body, code):
+        assert upload_client.post("/raw", content=body).json()["code"] == code
+
+
+class TestReadMultipartPdf:
+    """multipart/form-data with one file part"""
+
+    def test_file_part_is_read(self, upload_client):
+        response = upload_client.post("/multipart", files={"file": ("a.pdf", PDF, "application/pdf")})
+        assert response.json() == {"size": len(PDF), "error": None, "code": None}
+
+    def test_file_over_the_limit(self, upload_client):
+        # Within the multipart framing allowance, but over the file limit
+        response = upload_client.post("/multipart", files={"file": ("a.pdf", b"%PDF" + bytes(MAX_BYTES), "application/pdf")})
+        assert response.json()["code"] == "FILE_TOO_LARGE"
+
+    def test_missing_file_field(self, upload_client):
+        response = upload_client.post("/multipart", files={"document": ("a.pdf", PDF, "application/pdf")})
+        assert response.json() == {"size": None, "error": "Missing 'file' file field", "code": "INVALID_REQUEST"}
+
+    def test_not_a_pdf(self, upload_client):
+        response = upload_client.post("/multipart", files={"file": ("a.txt", b"hello", "text/plain")})
+        assert response.json()["code"] == "INVALID_PDF"
+
+
+class TestReadMultipartPdfs:
+    """multipart/form-data with several file parts, each with its own result"""
+
+    def test_files_get_their_own_results(self, upload_client):
+        response = upload_client.post(
+            "/batch",
+            files=[
+                ("files", ("a.pdf", PDF, "application/pdf")),
+                ("files", ("big.pdf", b"%PDF" + bytes(MAX_BYTES), "application/pdf")),
+                ("files", ("c.txt", b"hello", "text/plain")),
+            ],
+        )
+
+        assert [(name, result["code"]) for name, result in response.json()["files"]] == [
+            ("a.pdf", None),
+            ("big.pdf", "FILE_TOO_LARGE"),
+            ("c.txt", "INVALID_PDF"),
+        ]
+
+    def test_whole_body_over_the_limit(self, upload_client):
+        files = [("files", (f"{i}.pdf", b"%PDF" + bytes(MAX_BYTES - 10), "application/pdf")) for i in range(4)]
+        assert upload_client.post("/batch", files=files).json()["code"] == "FILE_TOO_LARGE"
+
+    def test_too_many_files(self, upload_client):
+        files = [("files", (f"{i}.pdf", PDF, "application/pdf")) for i in range(4)]
+        assert upload_client.post("/batch", files=files).json()["code"] == "INVALID_REQUEST"
+
+    def test_no_file_fields(self, upload_client):
+        response = upload_client.post("/batch", files={"file": ("a.pdf", PDF, "application/pdf")})
+        assert response.json() == {"error": "Missing 'files' file fields", "code": "INVALID_REQUEST"}
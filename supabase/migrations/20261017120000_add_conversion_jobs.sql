@@ -0,0 +1,43 @@
+-- ============================================================================
+-- CONVERSION JOBS TABLE
+-- ============================================================================
+-- Asynchronous PDF to Markdown conversions (POST /v1/convert/jobs), written by
+-- the backend with the service role. Input PDFs of uploaded jobs are kept in the
+-- storage bucket under conversion-jobs/ until the job has run.
+
+CREATE TABLE IF NOT EXISTS public.conversion_jobs (
+    id UUID PRIMARY KEY,
+    team_id UUID NOT NULL REFERENCES public.teams(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES auth.users(id) ON DELETE SET NULL,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    url TEXT,  -- NULL when the PDF was uploaded
+    pages TEXT,
+    mode TEXT NOT NULL DEFAULT 'accurate',
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    markdown TEXT,
+    page_count INTEGER,
+    pages_converted INTEGER,
+    pages_from_cache INTEGER,
+    pages_by_mode JSONB,
+    error TEXT,
+    error_code TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- RLS for conversion_jobs
+ALTER TABLE public.conversion_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Team members can view their team's jobs
+CREATE POLICY "Team members can view conversion jobs"
+    ON public.conversion_jobs FOR SELECT
+    USING (
+        team_id IN (
+            SELECT team_id FROM public.team_members WHERE user_id = auth.uid()
+        )
+    );
+
+-- Index for faster queries
+CREATE INDEX IF NOT EXISTS idx_conversion_jobs_team_id ON public.conversion_jobs(team_id);
+CREATE INDEX IF NOT EXISTS idx_conversion_jobs_created_at ON public.conversion_jobs(created_at DESC);
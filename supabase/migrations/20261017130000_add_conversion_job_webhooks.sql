@@ -0,0 +1,14 @@
+-- Webhook delivery of conversion jobs (webhook_url on POST /v1/convert/jobs).
+-- A job whose every delivery attempt failed keeps webhook_status = 'failed'
+-- with the last error (dead letter).
+
+ALTER TABLE public.conversion_jobs
+    ADD COLUMN IF NOT EXISTS webhook_url TEXT,
+    ADD COLUMN IF NOT EXISTS webhook_secret TEXT,
+    ADD COLUMN IF NOT EXISTS webhook_status TEXT CHECK (webhook_status IN ('pending', 'delivered', 'failed')),
+    ADD COLUMN IF NOT EXISTS webhook_attempts INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS webhook_last_error TEXT;
+
+-- Dead letters, for inspection and replay
+CREATE INDEX IF NOT EXISTS idx_conversion_jobs_webhook_failed
+    ON public.conversion_jobs(updated_at DESC) WHERE webhook_status = 'failed';
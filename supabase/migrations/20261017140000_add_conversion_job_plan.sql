@@ -0,0 +1,5 @@
+-- Plan of the team when a conversion job was submitted: paid teams' jobs get
+-- a larger share of the conversion worker pool.
+
+ALTER TABLE public.conversion_jobs
+    ADD COLUMN IF NOT EXISTS is_paid BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,11 @@
+-- Webhook signing secrets of conversion jobs are stored encrypted (Fernet,
+-- STORAGE_ENCRYPTION_KEY): conversion_jobs rows are readable by every member
+-- of the team, and the plaintext secret would let them forge webhook requests.
+-- Plaintext secrets already stored are dropped; webhooks of those jobs that
+-- are still pending end up as dead letters ('Webhook signing secret unavailable').
+
+ALTER TABLE public.conversion_jobs
+    ADD COLUMN IF NOT EXISTS webhook_secret_encrypted TEXT;
+
+ALTER TABLE public.conversion_jobs
+    DROP COLUMN IF EXISTS webhook_secret;